@@ -5,19 +5,25 @@ This API wraps the Jupyter notebook multi-agent system and provides
 RESTful endpoints and WebSocket support for real-time updates.
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field
 from typing import List, Dict, Optional, Any
 import asyncio
+import functools
 import json
+import os
 from datetime import datetime
 import uuid
 
 # Import our multi-agent system
-from services.research_service import ResearchService
+from services.research_service import ResearchService, APPROVAL_PRIORITY
+from services.scheduler import QueueFullError
+from services.llm_clients import role_config
+from services import metrics
 from services.websocket_manager import WebSocketManager
+from services.agents_integration import get_cache_stats, get_rate_limit_stats, get_llm_stats, get_warmup_status, warm_up
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -39,6 +45,11 @@ app.add_middleware(
 research_service = ResearchService()
 websocket_manager = WebSocketManager()
 
+# Build the agents, vector DB and LLM clients in the background at startup
+# (otherwise on first use)
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+warmup_tasks = set()
+
 
 # ============================================================================
 # 📊 MODELS - Request/Response schemas
@@ -51,12 +62,17 @@ class ResearchRequest(BaseModel):
     search_depth: str = "normal"  # normal, deep
     enable_web: bool = True
     enable_wikipedia: bool = True
+    bypass_cache: bool = False  # skip the LLM response cache for this research
+    # Higher priorities leave the queue first; kept below APPROVAL_PRIORITY so
+    # approved researches always finish before new ones start
+    priority: int = Field(0, ge=0, le=APPROVAL_PRIORITY - 1)
 
 class ResearchResponse(BaseModel):
     """Response model for research creation"""
     research_id: str
     status: str
     message: str
+    queue_position: int = 0  # 0 when started right away
 
 class SourceApproval(BaseModel):
     """Model for approving/rejecting sources"""
@@ -87,6 +103,8 @@ async def root():
         "endpoints": {
             "docs": "/docs",
             "health": "/health",
+            "ready": "/ready",
+            "metrics": "/metrics",
             "architecture": "/api/architecture"
         }
     }
@@ -101,6 +119,13 @@ async def health_check():
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint - 503 until the agents, vector DB and LLM clients are warmed up"""
+    status = get_warmup_status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
 # ============================================================================
 # 📚 ARCHITECTURE EXPLANATION ENDPOINTS
 # ============================================================================
@@ -123,15 +148,19 @@ async def get_architecture():
                 "role": "Analyzes user request and creates research plan",
                 "input": "User research query",
                 "output": "Research plan with search queries",
-                "llm": "GPT-4o-mini",
+                "llm": role_config("planner")["model"],
                 "icon": "🎯"
             },
             {
                 "name": "Retrieval Agent",
-                "role": "Searches web and Wikipedia for information",
+                "role": "Searches the document store, the web and Wikipedia for information",
                 "input": "Search queries from Planner",
                 "output": "List of sources with content",
-                "tools": ["DuckDuckGo Search", "Wikipedia API"],
+                "tools": [
+                    "Hybrid RAG search (Chroma vectors + SQLite FTS5 keywords, fused with RRF)",
+                    "DuckDuckGo Search",
+                    "Wikipedia API"
+                ],
                 "icon": "🔍"
             },
             {
@@ -147,7 +176,7 @@ async def get_architecture():
                 "role": "Creates professional briefing with citations",
                 "input": "Approved sources",
                 "output": "Draft briefing with citations",
-                "llm": "GPT-4o-mini",
+                "llm": role_config("writer")["model"],
                 "icon": "✍️"
             },
             {
@@ -155,7 +184,7 @@ async def get_architecture():
                 "role": "Reviews and improves the briefing",
                 "input": "Draft briefing",
                 "output": "Final polished briefing",
-                "llm": "GPT-4o-mini",
+                "llm": role_config("critic")["model"],
                 "icon": "🔍"
             }
         ],
@@ -170,13 +199,13 @@ async def get_architecture():
                 "Critic Agent → Final Briefing"
             ],
             "state_management": "LangGraph StateGraph with MemorySaver checkpointer",
-            "persistence": "In-memory with checkpoint support"
+            "persistence": "SQLite research store (WAL) with checkpoint support"
         },
         "technologies": {
             "orchestration": "LangGraph",
             "llm_framework": "LangChain",
             "llm_provider": "OpenAI (GPT-4o-mini)",
-            "search_tools": ["DuckDuckGo", "Wikipedia"],
+            "search_tools": ["Hybrid RAG (Chroma + FTS5, RRF)", "DuckDuckGo", "Wikipedia"],
             "state_management": "LangGraph StateGraph",
             "backend_api": "FastAPI",
             "websocket": "FastAPI WebSocket"
@@ -184,7 +213,7 @@ async def get_architecture():
         "features": {
             "human_in_the_loop": "Interactive source approval",
             "fallback_mechanism": "Wikipedia fallback when DuckDuckGo fails",
-            "rate_limiting": "1 second delay between searches",
+            "rate_limiting": "Per-provider token buckets (DuckDuckGo, Wikipedia, OpenAI chat and embeddings), configured with RATE_LIMIT_<PROVIDER>=rate[:burst]",
             "error_handling": "Comprehensive try-catch with logging",
             "real_time_updates": "WebSocket for progress updates"
         }
@@ -227,21 +256,30 @@ async def create_research(request: ResearchRequest):
     try:
         research_id = str(uuid.uuid4())
         
-        # Start research in background
-        asyncio.create_task(
-            research_service.start_research(
-                research_id=research_id,
-                query=request.query,
-                max_sources=request.max_sources,
-                websocket_manager=websocket_manager
-            )
+        # Start research in background (or queue it when all slots are busy)
+        position = await research_service.submit_research(
+            research_id=research_id,
+            query=request.query,
+            max_sources=request.max_sources,
+            websocket_manager=websocket_manager,
+            bypass_cache=request.bypass_cache,
+            priority=request.priority
         )
         
+        if position > 0:
+            return ResearchResponse(
+                research_id=research_id,
+                status="queued",
+                message=f"Research queued (position {position})",
+                queue_position=position
+            )
         return ResearchResponse(
             research_id=research_id,
             status="started",
             message="Research started successfully"
         )
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -249,7 +287,7 @@ async def create_research(request: ResearchRequest):
 async def get_research_status(research_id: str):
     """Get current status of a research"""
     try:
-        status = research_service.get_status(research_id)
+        status = await research_service.get_status(research_id)
         if not status:
             raise HTTPException(status_code=404, detail="Research not found")
         return status
@@ -260,20 +298,39 @@ async def get_research_status(research_id: str):
 async def approve_sources(research_id: str, approval: SourceApproval):
     """Approve sources and continue research"""
     try:
-        result = await research_service.approve_sources(
+        position = await research_service.submit_approval(
             research_id=research_id,
             approved_ids=approval.approved_source_ids,
             websocket_manager=websocket_manager
         )
-        return {"status": "approved", "message": "Sources approved, continuing research"}
+        return {
+            "status": "approved",
+            "message": "Sources approved, continuing research",
+            "queue_position": position
+        }
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/research/{research_id}/cancel")
+async def cancel_research(research_id: str):
+    """Cancel a queued, running or waiting research"""
+    try:
+        cancelled = await research_service.cancel_research(research_id, websocket_manager)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if cancelled is None:
+        raise HTTPException(status_code=404, detail="No cancellable research with this id")
+    return {"status": "cancelled", "was": cancelled}
+
 @app.get("/api/research/{research_id}/briefing")
 async def get_briefing(research_id: str):
     """Get the final briefing"""
     try:
-        briefing = research_service.get_briefing(research_id)
+        briefing = await research_service.get_briefing(research_id)
         if not briefing:
             raise HTTPException(status_code=404, detail="Briefing not found or not ready")
         return briefing
@@ -281,9 +338,105 @@ async def get_briefing(research_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/research/list")
-async def list_researches():
-    """List all researches"""
-    return research_service.list_all()
+async def list_researches(
+    status: Optional[List[str]] = Query(None, description="Filter by status (repeatable)"),
+    since: Optional[str] = Query(None, description="Started at or after this ISO timestamp"),
+    until: Optional[str] = Query(None, description="Started before this ISO timestamp"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200)
+):
+    """
+    List researches with cursor pagination
+    
+    Returns {"items": [...], "next_cursor": ..., "counts": {status: total}}
+    """
+    try:
+        return await research_service.list_all(
+            statuses=status,
+            since=since,
+            until=until,
+            order=order,
+            cursor=cursor,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/websocket/stats")
+async def websocket_stats():
+    """Connection counts and send queue depth of the WebSocket manager"""
+    return websocket_manager.stats()
+
+
+@app.get("/api/scheduler/stats")
+async def scheduler_stats():
+    """Running/queued job counts of the research scheduler (this worker)"""
+    return research_service.scheduler.stats()
+
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss counters and sizes of the search and LLM caches"""
+    return get_cache_stats()
+
+
+@app.get("/api/rate-limits/stats")
+async def rate_limits_stats():
+    """Token bucket usage and throttling per outbound provider"""
+    return get_rate_limit_stats()
+
+
+@app.get("/api/llm/stats")
+async def llm_stats():
+    """Concurrency limits and usage counters of the shared LLM clients"""
+    return get_llm_stats()
+
+
+def _service_metrics():
+    """Counters and gauges the services already keep, read at scrape time"""
+    scheduler = research_service.scheduler.stats()
+    websockets = websocket_manager.stats()
+    caches = get_cache_stats()
+    clients = get_llm_stats()
+    cache_names = [name for name in ("search", "llm", "embeddings") if name in caches]
+    return [
+        ("research_queue_depth", "gauge", "Researches waiting for a scheduler slot",
+         [({}, scheduler["queued"])]),
+        ("research_running", "gauge", "Researches running",
+         [({}, scheduler["running"])]),
+        ("research_jobs_total", "counter", "Research jobs by outcome",
+         [({"outcome": outcome}, scheduler[outcome]) for outcome in ("completed", "cancelled", "rejected")]),
+        ("cache_hits_total", "counter", "Cache hits",
+         [({"cache": name}, caches[name]["hits"]) for name in cache_names]),
+        ("cache_misses_total", "counter", "Cache misses",
+         [({"cache": name}, caches[name]["misses"]) for name in cache_names]),
+        ("llm_requests_total", "counter", "Requests sent per LLM client",
+         [({"client": name, "model": c["model"]}, c["requests"]) for name, c in clients.items()]),
+        ("llm_errors_total", "counter", "Failed requests per LLM client",
+         [({"client": name, "model": c["model"]}, c["errors"]) for name, c in clients.items()]),
+        ("llm_tokens_total", "counter", "Tokens per LLM client and direction",
+         [({"client": name, "model": c["model"], "direction": direction}, c[f"{direction}_tokens"])
+          for name, c in clients.items() for direction in ("input", "output")]),
+        ("llm_in_flight", "gauge", "Requests in flight per LLM client",
+         [({"client": name, "model": c["model"]}, c["in_flight"]) for name, c in clients.items()]),
+        ("websocket_connections", "gauge", "Open WebSocket connections",
+         [({}, websockets["connections"])]),
+        ("websocket_queued_messages", "gauge", "Messages waiting in WebSocket send queues",
+         [({}, websockets["queued_messages"])]),
+        ("websocket_dropped_messages", "gauge", "Messages dropped for slow clients still connected",
+         [({}, websockets["dropped_messages"])]),
+    ]
+
+
+metrics.register_collector(_service_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Stage latency histograms and service counters in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 # ============================================================================
@@ -291,18 +444,42 @@ async def list_researches():
 # ============================================================================
 
 @app.websocket("/ws/{research_id}")
-async def websocket_endpoint(websocket: WebSocket, research_id: str):
+async def websocket_endpoint(websocket: WebSocket, research_id: str, last_seq: Optional[int] = None):
     """
     WebSocket endpoint for real-time updates
-    Sends progress updates as the research progresses
+    
+    Protocol:
+    - On connect the server sends {"type": "snapshot", "seq", "research"}
+    - Each update then carries the next "seq" and only the fields that
+      changed ("changes", a JSON Merge Patch of the research state)
+    - A client that detects a gap in seq sends {"type": "resync"} and
+      receives a fresh snapshot
+    - A client reconnecting with ?last_seq=N gets the updates it missed
+      replayed, followed by {"type": "resumed"}, instead of a snapshot
+      (falls back to a snapshot if they are no longer buffered)
     """
-    await websocket_manager.connect(websocket, research_id)
+    await websocket_manager.connect(
+        websocket,
+        research_id,
+        last_seq=last_seq,
+        snapshot=functools.partial(research_service.get_snapshot, research_id)
+    )
     try:
         while True:
             # Keep connection alive and wait for messages
             data = await websocket.receive_text()
-            # Echo back for now (can be used for commands later)
-            await websocket.send_text(f"Received: {data}")
+            try:
+                command = json.loads(data)
+            except json.JSONDecodeError:
+                command = None
+            
+            if isinstance(command, dict) and command.get("type") == "resync":
+                await websocket_manager.send_snapshot(
+                    websocket, research_id, functools.partial(research_service.get_snapshot, research_id)
+                )
+            else:
+                # Echo back for now (can be used for commands later)
+                await websocket.send_text(f"Received: {data}")
     except WebSocketDisconnect:
         websocket_manager.disconnect(websocket, research_id)
 
@@ -317,6 +494,11 @@ async def startup_event():
     print("🚀 Multi-Agent Research API starting...")
     print("📊 Initializing research service...")
     await research_service.initialize()
+    await websocket_manager.start()
+    if WARMUP_ON_STARTUP:
+        # Heavy imports and client construction happen in the background so
+        # the API serves /health right away; /ready reports when it is done
+        warmup_tasks.add(asyncio.create_task(warm_up()))
     print("✅ API ready!")
 
 @app.on_event("shutdown")
@@ -324,6 +506,7 @@ async def shutdown_event():
     """Cleanup on shutdown"""
     print("🛑 Shutting down Multi-Agent Research API...")
     await research_service.cleanup()
+    await websocket_manager.stop()
     print("✅ Cleanup complete")
 
 
@@ -335,6 +518,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8002,
         reload=False,  # Disabled auto-reload for stability
+        workers=int(os.getenv("API_WORKERS", "1")),  # >1 requires WS_PUBSUB=unix
         log_level="info"
     )
 
@@ -4,10 +4,27 @@
 """
 
 import os
-import sys
-from typing import List, Dict, Any
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, TypedDict
 from datetime import datetime
 
+from services.cache import LLMCache, SearchCache
+from services.embedding_cache import CachedEmbeddings, EmbeddingStore, register_with_langchain
+from services.deadlines import Deadline, DeadlineExceeded
+from services.search_fanout import SearchBackend, SearchFanout
+from services.rate_limit import get_limiter, rate_limit_stats
+from services.dedup import dedupe_sources
+from services.keyword_index import KeywordIndex
+from services.streaming import JSONArrayItemStream
+from services.context_packer import load_tokenizer
+from services.http_clients import get_http_client, get_ddgs_session, reset_ddgs_session
+from services.llm_clients import LLM_ROLES, get_llm_client, role_config, set_llm_callbacks, llm_client_stats
+from services.metrics import STAGE_SECONDS
+
 # Configuration OpenAI
 from dotenv import load_dotenv
 load_dotenv()
@@ -15,56 +32,174 @@ load_dotenv()
 if not os.getenv("OPENAI_API_KEY"):
     print("⚠️  OPENAI_API_KEY not set. Please set it in .env file or environment")
 
-# Langfuse monitoring
-try:
-    from langfuse.callback import CallbackHandler
-    langfuse_handler = CallbackHandler(
-        public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
-        secret_key=os.getenv("LANGFUSE_SECRET_KEY"),
-        host=os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com")
-    )
-    LANGFUSE_AVAILABLE = True
-    print("✅ Langfuse monitoring enabled")
-except Exception as e:
-    LANGFUSE_AVAILABLE = False
-    langfuse_handler = None
-    print(f"⚠️  Langfuse not available: {e}")
 
-try:
-    # Imports pour le système multi-agents
-    from typing import TypedDict, Optional, Annotated
-    from langgraph.graph import StateGraph, START, END
-    from langgraph.types import interrupt, Command
-    from langgraph.checkpoint.sqlite import SqliteSaver  # SqliteSaver for persistence
-    from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-    from langchain_core.messages import SystemMessage
-    from langchain_core.tools import tool
-    from langchain_community.vectorstores import Chroma
-    from langchain_core.documents import Document
-    from duckduckgo_search import DDGS  # Correct import!
-    import wikipedia
-    import time
-    
-    AGENTS_AVAILABLE = True
-    print("✅ Multi-agent system imports successful")
-    
-except ImportError as e:
-    AGENTS_AVAILABLE = False
-    print(f"⚠️  Multi-agent system not available: {e}")
-    print("💡 Using mock data instead")
+# Retrieval fan-out settings
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "2"))
+MAX_SOURCES = int(os.getenv("MAX_SOURCES", "15"))
+# Search the user's request itself while the planner is still generating
+SPECULATIVE_QUERY = os.getenv("SPECULATIVE_QUERY", "true").lower() == "true"
+# Planner queries searched per research (each one runs on every backend)
+MAX_PLAN_QUERIES = int(os.getenv("MAX_PLAN_QUERIES", "5"))
+# Seconds rag_search query embeddings are collected into one provider call
+EMBEDDING_QUERY_BATCH_WINDOW = float(os.getenv("EMBEDDING_QUERY_BATCH_WINDOW", "0.05"))
+
+# Bounded pool for blocking agent work (search SDKs, sync LLM fallbacks) so a
+# research never runs on the event loop thread
+AGENT_EXECUTOR_WORKERS = int(os.getenv("AGENT_EXECUTOR_WORKERS", "8"))
+agent_executor = ThreadPoolExecutor(
+    max_workers=AGENT_EXECUTOR_WORKERS,
+    thread_name_prefix="agent-worker"
+)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking callable on the bounded agent executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(agent_executor, functools.partial(func, *args, **kwargs))
+
+
+# ============================================================================
+# LAZY INITIALIZATION
+# ============================================================================
+# langchain, langgraph, Chroma and the search SDKs take seconds to import,
+# and the embeddings, vector store and chat model are built eagerly. None of
+# that happens at import time: ensure_agents() does it on first use, and the
+# API runs it in a background warm-up task (see warm_up) while it is already
+# serving requests.
+
+class _NotLoaded(Exception):
+    """Stands in for SDK exception classes until the SDK is imported"""
+
+
+AGENTS_AVAILABLE = False
+LANGFUSE_AVAILABLE = False
+langfuse_handler = None
+SystemMessage = None
+RatelimitException = _NotLoaded
+
+_init_lock = threading.Lock()
+_initialized = False
+# Reported by the API's readiness endpoint (see get_warmup_status)
+_warmup = {
+    "state": "pending",
+    "started_at": None,
+    "finished_at": None,
+    "duration_seconds": None,
+    "error": None
+}
 
 
 # ============================================================================
 # VECTOR DATABASE (RAG SYSTEM)
 # ============================================================================
 
-# Initialize ChromaDB vector store
+# ChromaDB vector store, built by ensure_agents()
 vector_db = None
+embeddings = None
 RAG_AVAILABLE = False
 
+
+# Local BM25 index over the same chunks (see services.keyword_index). It
+# does not need the embeddings provider, so it also serves keyword-only
+# lookups when the vector store is unavailable.
+# rag_search mode: hybrid (vector + keyword, fused), vector or keyword
+RAG_SEARCH_MODE = os.getenv("RAG_SEARCH_MODE", "hybrid").lower()
+# Reciprocal rank fusion constant: higher values flatten rank differences
+RAG_RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+# Candidates fetched from each ranking per result, for fusion to reorder
+RAG_FUSION_CANDIDATES = int(os.getenv("RAG_FUSION_CANDIDATES", "3"))
+
+keyword_index = None
+KEYWORD_INDEX_AVAILABLE = False
+# Future of the startup sync with Chroma (None until it is started)
+keyword_index_sync = None
 try:
-    if AGENTS_AVAILABLE:
-        embeddings = OpenAIEmbeddings()
+    keyword_index = KeywordIndex(os.getenv(
+        "RAG_KEYWORD_INDEX_DB",
+        os.path.join(os.path.dirname(__file__), "..", "rag_keyword_index.db")
+    ))
+    KEYWORD_INDEX_AVAILABLE = True
+except Exception as e:
+    print(f"⚠️  Keyword index not available: {e}")
+
+
+def _sync_keyword_index():
+    """Bring the keyword index in line with the Chroma collection"""
+    try:
+        added, removed = keyword_index.sync_from_chroma(vector_db._collection)
+        print(f"🔑 Keyword index synced: +{added} -{removed} ({keyword_index.count()} chunks)")
+    except Exception as e:
+        print(f"⚠️  Keyword index sync failed: {e}")
+
+
+def _init_langfuse():
+    """Langfuse monitoring"""
+    global LANGFUSE_AVAILABLE, langfuse_handler
+    try:
+        from langfuse.callback import CallbackHandler
+        langfuse_handler = CallbackHandler(
+            public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
+            secret_key=os.getenv("LANGFUSE_SECRET_KEY"),
+            host=os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com")
+        )
+        LANGFUSE_AVAILABLE = True
+        print("✅ Langfuse monitoring enabled")
+    except Exception as e:
+        LANGFUSE_AVAILABLE = False
+        langfuse_handler = None
+        print(f"⚠️  Langfuse not available: {e}")
+
+
+def _init_agents():
+    """Import the multi-agent stack and build the shared LLM clients"""
+    global AGENTS_AVAILABLE, SystemMessage, RatelimitException
+    try:
+        # Imports pour le système multi-agents
+        import langgraph.graph  # noqa: F401
+        import httpx  # noqa: F401
+        import langchain_openai  # noqa: F401
+        from langchain_core.messages import SystemMessage as _SystemMessage
+        from duckduckgo_search import DDGS  # noqa: F401
+        from duckduckgo_search.exceptions import RatelimitException as _RatelimitException
+    except ImportError as e:
+        AGENTS_AVAILABLE = False
+        print(f"⚠️  Multi-agent system not available: {e}")
+        print("💡 Using mock data instead")
+        return
+    
+    SystemMessage = _SystemMessage
+    RatelimitException = _RatelimitException
+    # One client per distinct role configuration (see services.llm_clients),
+    # traced by Langfuse if available
+    set_llm_callbacks([langfuse_handler] if LANGFUSE_AVAILABLE else [])
+    for role in LLM_ROLES:
+        get_llm_client(role)
+    AGENTS_AVAILABLE = True
+    print("✅ Multi-agent system imports successful")
+
+
+def _init_vector_db():
+    """Open the Chroma collection behind rag_search"""
+    global vector_db, embeddings, RAG_AVAILABLE
+    if not AGENTS_AVAILABLE:
+        return
+    try:
+        from langchain_openai import OpenAIEmbeddings
+        from langchain_community.vectorstores import Chroma
+        register_with_langchain()
+        
+        # Query embeddings are cached on disk, and the queries rag_search
+        # receives while the planner streams are embedded in shared batches
+        # (see services.embedding_cache)
+        embeddings = CachedEmbeddings(
+            OpenAIEmbeddings(),
+            EmbeddingStore(os.getenv(
+                "EMBEDDING_CACHE_DB",
+                os.path.join(os.path.dirname(__file__), "..", "embedding_cache.db")
+            )),
+            limiter=get_limiter("openai_embeddings"),
+            query_batch_window=EMBEDDING_QUERY_BATCH_WINDOW
+        )
         db_path = os.path.join(os.path.dirname(__file__), "..", "chroma_db")
         
         vector_db = Chroma(
@@ -77,19 +212,225 @@ try:
         try:
             existing_count = vector_db._collection.count()
             if existing_count == 0:
-                print(f"⚠️  Vector DB is empty - run load_pdf_to_rag.py to add your PDF")
-                print(f"   📄 PDF location: RA_2024_en_web (1).pdf")
+                print("⚠️  Vector DB is empty - add documents with: python -m services.ingest <directory>")
             else:
-                print(f"✅ Vector DB loaded with {existing_count} documents from PDF")
+                print(f"✅ Vector DB loaded with {existing_count} document chunks")
         except Exception as e:
-            print(f"⚠️  Vector DB empty - run: python services/load_pdf_to_rag.py")
+            print("⚠️  Vector DB empty - add documents with: python -m services.ingest <directory>")
         
         RAG_AVAILABLE = True
         
-except Exception as e:
-    RAG_AVAILABLE = False
-    print(f"⚠️  Vector DB not available: {e}")
-    print("💡 Continuing without RAG capabilities")
+    except Exception as e:
+        RAG_AVAILABLE = False
+        print(f"⚠️  Vector DB not available: {e}")
+        print("💡 Continuing without RAG capabilities")
+
+
+def ensure_agents() -> bool:
+    """
+    Load the agents, vector store and LLM client on first call.
+
+    Thread-safe and idempotent: concurrent callers wait for the first one.
+    Returns whether the real agents are available.
+    """
+    global _initialized, keyword_index_sync
+    if _initialized:
+        return AGENTS_AVAILABLE
+    with _init_lock:
+        if _initialized:
+            return AGENTS_AVAILABLE
+        started = time.monotonic()
+        _warmup.update(state="warming", started_at=datetime.now().isoformat(), error=None)
+        try:
+            _init_langfuse()
+            _init_agents()
+            _init_vector_db()
+        except Exception as e:
+            _warmup.update(state="failed", error=str(e))
+            raise
+        if KEYWORD_INDEX_AVAILABLE and RAG_AVAILABLE:
+            # Off the warm-up path: large collections take a while to reconcile
+            keyword_index_sync = agent_executor.submit(_sync_keyword_index)
+        _initialized = True
+        duration = time.monotonic() - started
+        _warmup.update(
+            state="ready",
+            finished_at=datetime.now().isoformat(),
+            duration_seconds=round(duration, 2)
+        )
+        print(f"🔥 Agents warmed up in {duration:.1f}s")
+    return AGENTS_AVAILABLE
+
+
+async def ensure_agents_async() -> bool:
+    """ensure_agents() without blocking the event loop"""
+    if _initialized:
+        return AGENTS_AVAILABLE
+    return await run_blocking(ensure_agents)
+
+
+async def warm_up():
+    """Background warm-up task started with the API"""
+    try:
+        await ensure_agents_async()
+    except Exception as e:
+        print(f"❌ Warm-up failed: {e}")
+    try:
+        # The writer context is measured with this encoding
+        await run_blocking(load_tokenizer, role_config("writer")["model"])
+    except Exception as e:
+        print(f"⚠️  Tokenizer warm-up failed: {e}")
+
+
+def get_warmup_status() -> dict:
+    """Warm-up state (pending, warming, ready or failed) and what is available"""
+    return {
+        **_warmup,
+        "ready": _initialized,
+        "components": {
+            "agents": AGENTS_AVAILABLE,
+            "rag": RAG_AVAILABLE,
+            "keyword_index": KEYWORD_INDEX_AVAILABLE,
+            "langfuse": LANGFUSE_AVAILABLE
+        }
+    }
+
+
+# ============================================================================
+# SEARCH RESULT CACHE
+# ============================================================================
+
+# Set SEARCH_CACHE_DB to an empty string to keep the cache in memory only
+search_cache = SearchCache(
+    ttls={
+        "web": float(os.getenv("SEARCH_CACHE_TTL_WEB", "3600")),
+        "wikipedia": float(os.getenv("SEARCH_CACHE_TTL_WIKIPEDIA", "86400")),
+        "rag": float(os.getenv("SEARCH_CACHE_TTL_RAG", "600")),
+    },
+    max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2048")),
+    max_disk_entries=int(os.getenv("SEARCH_CACHE_MAX_DISK_ENTRIES", "20000")),
+    db_path=os.getenv(
+        "SEARCH_CACHE_DB",
+        os.path.join(os.path.dirname(__file__), "..", "search_cache.db")
+    ) or None
+)
+
+# Content-addressed LLM response cache (planner, writer and critic prompts)
+llm_cache = LLMCache(
+    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512")),
+    ttl=float(os.getenv("LLM_CACHE_TTL", "86400")),
+    max_disk_entries=int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", "5000")),
+    db_path=os.getenv(
+        "LLM_CACHE_DB",
+        os.path.join(os.path.dirname(__file__), "..", "llm_cache.db")
+    ) or None
+)
+
+
+# Outbound request budgets (see services.rate_limit); after a 429 the whole
+# provider backs off for RATE_LIMIT_PAUSE seconds
+chat_limiter = get_limiter("openai_chat")
+ddg_limiter = get_limiter("duckduckgo")
+wikipedia_limiter = get_limiter("wikipedia")
+RATE_LIMIT_PAUSE = float(os.getenv("RATE_LIMIT_PAUSE", "10"))
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+
+def _llm_cache_key(llm_client, messages) -> str:
+    """Cache key covering the model, its sampling parameters and the prompt"""
+    return LLMCache.make_key(
+        llm_client.model,
+        [{"type": m.type, "content": m.content} for m in messages],
+        {"temperature": llm_client.temperature, "max_tokens": llm_client.max_tokens}
+    )
+
+
+def cached_invoke(llm_client, messages, config: dict = None, bypass_cache: bool = False) -> str:
+    """
+    Invoke a shared LLM client (see services.llm_clients) through the
+    response cache and return the response text.
+
+    With bypass_cache the cache is not read, but the fresh response still
+    replaces the cached one.
+    """
+    key = _llm_cache_key(llm_client, messages)
+    if not bypass_cache:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            print("    💾 LLM cache hit")
+            llm_client.record_cache_hit()
+            return cached
+    chat_limiter.acquire()
+    try:
+        response = llm_client.invoke(messages, config=config)
+    except Exception as e:
+        if _is_rate_limit_error(e):
+            chat_limiter.pause(RATE_LIMIT_PAUSE)
+        raise
+    llm_cache.set(key, response.content)
+    return response.content
+
+
+async def cached_ainvoke(llm_client, messages, config: dict = None, bypass_cache: bool = False) -> str:
+    """Async variant of cached_invoke"""
+    key = _llm_cache_key(llm_client, messages)
+    if not bypass_cache:
+        # SQLite lookups and writes stay off the event loop
+        cached = await run_blocking(llm_cache.get, key)
+        if cached is not None:
+            print("    💾 LLM cache hit")
+            llm_client.record_cache_hit()
+            return cached
+    await chat_limiter.acquire_async()
+    try:
+        response = await llm_client.ainvoke(messages, config=config)
+    except Exception as e:
+        if _is_rate_limit_error(e):
+            chat_limiter.pause(RATE_LIMIT_PAUSE)
+        raise
+    await run_blocking(llm_cache.set, key, response.content)
+    return response.content
+
+
+async def cached_astream(
+    llm_client,
+    messages,
+    on_delta,
+    config: dict = None,
+    bypass_cache: bool = False
+) -> str:
+    """
+    Stream an LLM response through the response cache.
+
+    on_delta is awaited with each text chunk as it arrives (a cache hit is
+    delivered as a single chunk). Returns the full response text.
+    """
+    key = _llm_cache_key(llm_client, messages)
+    if not bypass_cache:
+        # SQLite lookups and writes stay off the event loop
+        cached = await run_blocking(llm_cache.get, key)
+        if cached is not None:
+            print("    💾 LLM cache hit")
+            llm_client.record_cache_hit()
+            await on_delta(cached)
+            return cached
+    await chat_limiter.acquire_async()
+    parts = []
+    try:
+        async for chunk in llm_client.astream(messages, config=config):
+            if chunk.content:
+                parts.append(chunk.content)
+                await on_delta(chunk.content)
+    except Exception as e:
+        if _is_rate_limit_error(e):
+            chat_limiter.pause(RATE_LIMIT_PAUSE)
+        raise
+    content = "".join(parts)
+    await run_blocking(llm_cache.set, key, content)
+    return content
 
 
 # ============================================================================
@@ -114,128 +455,234 @@ class ResearchState(TypedDict, total=False):
 # SEARCH TOOLS
 # ============================================================================
 
-if AGENTS_AVAILABLE:
-    @tool
-    def web_search(query: str, max_results: int = 5) -> List[dict]:
-        """Search the web using DuckDuckGo"""
-        try:
-            print(f"    🌐 DuckDuckGo search: '{query}'")
-            
-            # Add timeout to avoid hanging
-            import signal
-            
-            def timeout_handler(signum, frame):
-                raise TimeoutError("Search timeout")
-            
-            # Set 10 second timeout
-            signal.signal(signal.SIGALRM, timeout_handler)
-            signal.alarm(10)
-            
+WIKIPEDIA_API_URL = os.getenv("WIKIPEDIA_API_URL", "https://en.wikipedia.org/w/api.php")
+WIKIPEDIA_USER_AGENT = os.getenv(
+    "WIKIPEDIA_USER_AGENT",
+    "MultiAgentResearchAssistant/1.0 (https://github.com/M13E-LAB/AgenticSystem1)"
+)
+WIKIPEDIA_EXTRACT_CHARS = 500
+
+
+def _wikipedia_params(query: str, max_results: int) -> dict:
+    """MediaWiki API query returning search hits with their intro extracts"""
+    return {
+        "action": "query",
+        "format": "json",
+        "formatversion": 2,
+        "generator": "search",
+        "gsrsearch": query,
+        "gsrnamespace": 0,
+        # A few spare hits replace disambiguation pages, which are skipped
+        "gsrlimit": max_results + 2,
+        "prop": "extracts|info|pageprops",
+        "exintro": 1,
+        "explaintext": 1,
+        "exchars": WIKIPEDIA_EXTRACT_CHARS,
+        "exlimit": "max",
+        "inprop": "url",
+        "ppprop": "disambiguation",
+        "redirects": 1
+    }
+
+
+def _wikipedia_results(data: dict, max_results: int) -> List[dict]:
+    """Format a generator=search response in search rank order"""
+    pages = data.get("query", {}).get("pages", [])
+    pages = sorted(pages, key=lambda page: page.get("index", 0))
+    
+    formatted_results = []
+    for page in pages:
+        if "disambiguation" in page.get("pageprops", {}) or not page.get("extract"):
+            continue
+        formatted_results.append({
+            "content": page["extract"],
+            "source": page.get("fullurl", ""),
+            "title": page.get("title", ""),
+            "type": "wikipedia"
+        })
+        if len(formatted_results) >= max_results:
+            break
+    return formatted_results
+
+
+# Plain functions: defining them needs none of the lazily imported SDKs
+
+def web_search(query: str, max_results: int = 5, timeout: float = 10.0) -> List[dict]:
+    """Search the web using DuckDuckGo"""
+    try:
+        cached = search_cache.get("web", query, max_results)
+        if cached is not None:
+            print(f"    💾 DuckDuckGo cache hit: '{query}'")
+            return cached
+        
+        print(f"    🌐 DuckDuckGo search: '{query}'")
+        
+        # Thread-safe timeout: works from executor threads too
+        deadline = Deadline(timeout)
+        
+        def ddgs_text():
+            # Long-lived per-thread session: no new handshake per search
             try:
-                with DDGS() as ddgs:
-                    results = list(ddgs.text(query, max_results=max_results))
-                signal.alarm(0)  # Cancel alarm
-            except TimeoutError:
-                signal.alarm(0)
-                print(f"    ⏱️ DuckDuckGo timeout, trying Wikipedia...")
-                return []
-            
-            print(f"    ✅ Raw results: {len(results)}")
-                
-            formatted_results = []
-            for result in results:
-                formatted_results.append({
-                    "content": result.get("body", ""),
-                    "source": result.get("href", ""),
-                    "title": result.get("title", ""),
-                    "type": "web"
-                })
-            
-            print(f"    ✅ Formatted results: {len(formatted_results)}")
-            return formatted_results
-        except Exception as e:
-            print(f"    ❌ Web search error: {e}")
-            import traceback
-            traceback.print_exc()
+                return list(get_ddgs_session().text(query, max_results=max_results))
+            except RatelimitException:
+                # Start the next search on this thread with a fresh session
+                reset_ddgs_session()
+                raise
+        
+        if not ddg_limiter.acquire(timeout=deadline.remaining()):
+            print("    ⏱️ DuckDuckGo rate limit would exceed the timeout, skipping")
             return []
-
-    @tool
-    def wikipedia_search(query: str, max_results: int = 3) -> List[dict]:
-        """Search Wikipedia for information"""
         try:
-            search_results = wikipedia.search(query, results=max_results)
-            
-            formatted_results = []
-            for title in search_results:
-                try:
-                    page = wikipedia.page(title)
-                    content = page.content[:500] + "..." if len(page.content) > 500 else page.content
-                    
-                    formatted_results.append({
-                        "content": content,
-                        "source": page.url,
-                        "title": page.title,
-                        "type": "wikipedia"
-                    })
-                except Exception as e:
-                    continue
-                    
-            return formatted_results
-        except Exception as e:
-            print(f"Wikipedia search error: {e}")
+            results = deadline.call(ddgs_text)
+        except DeadlineExceeded:
+            print("    ⏱️ DuckDuckGo timeout, trying Wikipedia...")
             return []
-
-    @tool
-    def rag_search(query: str, max_results: int = 3) -> List[dict]:
-        """Search internal vector database (RAG) for relevant documents"""
-        if not RAG_AVAILABLE or vector_db is None:
-            print("    ⚠️ RAG not available")
+        except RatelimitException:
+            ddg_limiter.pause(RATE_LIMIT_PAUSE)
             return []
         
-        try:
-            print(f"    📚 RAG search: '{query}'")
+        print(f"    ✅ Raw results: {len(results)}")
             
-            # Similarity search in vector database
-            docs_with_scores = vector_db.similarity_search_with_relevance_scores(
-                query, 
-                k=max_results
+        formatted_results = []
+        for result in results:
+            formatted_results.append({
+                "content": result.get("body", ""),
+                "source": result.get("href", ""),
+                "title": result.get("title", ""),
+                "type": "web"
+            })
+        
+        print(f"    ✅ Formatted results: {len(formatted_results)}")
+        if formatted_results:
+            search_cache.set("web", query, max_results, formatted_results)
+        return formatted_results
+    except Exception as e:
+        print(f"    ❌ Web search error: {e}")
+        import traceback
+        traceback.print_exc()
+        return []
+
+
+def wikipedia_search(query: str, max_results: int = 3, timeout: float = 10.0) -> List[dict]:
+    """Search Wikipedia for information"""
+    cached = search_cache.get("wikipedia", query, max_results)
+    if cached is not None:
+        return cached
+    
+    deadline = Deadline(timeout)
+    try:
+        # Waiting for the rate limit counts against the deadline too
+        if not wikipedia_limiter.acquire(timeout=deadline.remaining()):
+            raise DeadlineExceeded("Wikipedia rate limit wait exceeds the deadline")
+        
+        # Search and hydration in one round trip: the search results are
+        # the generator, and their intro extracts, URLs and disambiguation
+        # flags come back in the same response
+        response = deadline.call(
+            get_http_client().get,
+            WIKIPEDIA_API_URL,
+            params=_wikipedia_params(query, max_results),
+            headers={"User-Agent": WIKIPEDIA_USER_AGENT},
+            timeout=timeout
+        )
+        response.raise_for_status()
+        formatted_results = _wikipedia_results(response.json(), max_results)
+        
+        if formatted_results:
+            search_cache.set("wikipedia", query, max_results, formatted_results)
+        return formatted_results
+    except DeadlineExceeded:
+        print(f"    ⏱️ Wikipedia timeout after {timeout:g}s")
+        return []
+    except Exception as e:
+        print(f"Wikipedia search error: {e}")
+        return []
+
+
+def rag_search(query: str, max_results: int = 3, timeout: float = 10.0, mode: str = "") -> List[dict]:
+    """Search internal documents (RAG) by meaning and keywords"""
+    mode = (mode or RAG_SEARCH_MODE).lower()
+    use_vector = mode in ("hybrid", "vector") and RAG_AVAILABLE and vector_db is not None
+    use_keyword = mode in ("hybrid", "keyword") and KEYWORD_INDEX_AVAILABLE
+    if not use_vector and not use_keyword:
+        print("    ⚠️ RAG not available")
+        return []
+    
+    cache_query = f"{mode}:{query}"
+    cached = search_cache.get("rag", cache_query, max_results)
+    if cached is not None:
+        print(f"    💾 RAG cache hit: '{query}'")
+        return cached
+    
+    print(f"    📚 RAG search ({mode}): '{query}'")
+    deadline = Deadline(timeout)
+    candidates = max_results * RAG_FUSION_CANDIDATES if use_vector and use_keyword else max_results
+    complete = True
+    
+    # Keyword ranking first: local and fast, and the fallback if the
+    # embeddings provider fails
+    keyword_hits = []
+    if use_keyword:
+        try:
+            keyword_hits = deadline.call(keyword_index.search, query, candidates)
+        except Exception as e:
+            complete = False
+            print(f"    ❌ RAG keyword search error: {e}")
+    
+    vector_hits = []
+    if use_vector:
+        try:
+            vector_hits = deadline.call(
+                vector_db.similarity_search_with_relevance_scores,
+                query,
+                k=candidates
             )
-            
-            formatted_results = []
-            for doc, score in docs_with_scores:
-                formatted_results.append({
-                    "content": doc.page_content,
-                    "source": doc.metadata.get("source", "Internal KB"),
-                    "title": f"{doc.metadata.get('topic', 'Document')} (Score: {score:.2f})",
-                    "type": "rag",
-                    "relevance_score": score
-                })
-            
-            print(f"    ✅ RAG results: {len(formatted_results)} documents")
-            return formatted_results
-            
+        except DeadlineExceeded:
+            complete = False
+            print(f"    ⏱️ RAG vector search timeout after {timeout:g}s, using keyword results")
         except Exception as e:
-            print(f"    ❌ RAG search error: {e}")
-            return []
-
-    # Initialize LLM with Langfuse callback if available
-    callbacks = [langfuse_handler] if LANGFUSE_AVAILABLE and langfuse_handler else []
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.1, callbacks=callbacks)
+            complete = False
+            print(f"    ❌ RAG vector search error: {e}, using keyword results")
+    
+    # Reciprocal rank fusion, matching chunks across rankings by content
+    fused: Dict[str, dict] = {}
+    for rank, (doc, score) in enumerate(vector_hits):
+        entry = fused.setdefault(doc.page_content, {"metadata": doc.metadata, "rrf": 0.0})
+        entry["rrf"] += 1.0 / (RAG_RRF_K + rank + 1)
+        entry["vector_score"] = score
+    for rank, hit in enumerate(keyword_hits):
+        entry = fused.setdefault(hit["content"], {"metadata": hit["metadata"], "rrf": 0.0})
+        entry["rrf"] += 1.0 / (RAG_RRF_K + rank + 1)
+        entry["keyword_score"] = hit["score"]
+    ranked = sorted(fused.items(), key=lambda item: item[1]["rrf"], reverse=True)[:max_results]
+    
+    formatted_results = []
+    for content, entry in ranked:
+        score = entry.get("vector_score")
+        label = f"Score: {score:.2f}" if score is not None else "Keyword match"
+        formatted_results.append({
+            "content": content,
+            "source": entry["metadata"].get("source", "Internal KB"),
+            "title": f"{entry['metadata'].get('topic', 'Document')} ({label})",
+            "type": "rag",
+            "relevance_score": score if score is not None else round(entry["rrf"], 4)
+        })
+    
+    print(f"    ✅ RAG results: {len(formatted_results)} documents "
+          f"({len(vector_hits)} vector, {len(keyword_hits)} keyword candidates)")
+    # Degraded (keyword-only fallback) results are not cached
+    if formatted_results and complete:
+        search_cache.set("rag", cache_query, max_results, formatted_results)
+    return formatted_results
 
 
 # ============================================================================
 # AGENTS
 # ============================================================================
 
-def planner_agent_real(user_request: str) -> dict:
-    """Real Planner Agent using GPT"""
-    if not AGENTS_AVAILABLE:
-        return {
-            "topic": user_request,
-            "search_queries": [user_request]
-        }
-    
-    planning_prompt = f"""
+def _planning_prompt(user_request: str) -> str:
+    """Build the Planner Agent prompt"""
+    return f"""
     You are a research planner. Analyze this request and create a detailed research plan.
     
     User Request: {user_request}
@@ -248,132 +695,239 @@ def planner_agent_real(user_request: str) -> dict:
     
     Respond ONLY with valid JSON.
     """
+
+
+def _fallback_plan(user_request: str) -> dict:
+    """Plan used when the LLM is unavailable or returns invalid JSON"""
+    return {
+        "topic": user_request,
+        "scope": "Research analysis",
+        "search_queries": [user_request, f"{user_request} trends", f"{user_request} analysis"],
+        "structure": ["Overview", "Analysis", "Conclusions"]
+    }
+
+
+def _parse_plan(content: str) -> dict:
+    """Parse the planner's JSON, tolerating a ```json fence around it"""
+    import json
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.split("\n", 1)[1] if "\n" in content else ""
+        content = content.rsplit("```", 1)[0]
+    plan = json.loads(content)
+    if not isinstance(plan, dict):
+        raise ValueError("Plan is not a JSON object")
+    return plan
+
+
+def _plan_queries(plan: dict) -> List[str]:
+    """The plan's usable search queries: non-empty strings, at most MAX_PLAN_QUERIES"""
+    queries = plan.get("search_queries")
+    if not isinstance(queries, list):
+        return []
+    return [q.strip() for q in queries if isinstance(q, str) and q.strip()][:MAX_PLAN_QUERIES]
+
+
+def planner_agent_real(user_request: str, bypass_cache: bool = False) -> dict:
+    """Real Planner Agent using GPT"""
+    if not ensure_agents():
+        return {
+            "topic": user_request,
+            "search_queries": [user_request]
+        }
     
     try:
-        # Add Langfuse tracing
-        callbacks = [langfuse_handler] if LANGFUSE_AVAILABLE and langfuse_handler else []
-        response = llm.invoke([SystemMessage(content=planning_prompt)], config={"callbacks": callbacks})
-        import json
-        plan = json.loads(response.content)
+        # Traced by Langfuse through the client's callbacks
+        content = cached_invoke(
+            get_llm_client("planner"),
+            [SystemMessage(content=_planning_prompt(user_request))],
+            config={"metadata": {"step": "planner"}},
+            bypass_cache=bypass_cache
+        )
+        plan = _parse_plan(content)
         return plan
     except:
         # Fallback
-        return {
-            "topic": user_request,
-            "scope": "Research analysis",
-            "search_queries": [user_request, f"{user_request} trends", f"{user_request} analysis"],
-            "structure": ["Overview", "Analysis", "Conclusions"]
-        }
+        return _fallback_plan(user_request)
 
 
-def retrieval_agent_real(search_queries: List[str]) -> List[dict]:
-    """Real Retrieval Agent using RAG + DuckDuckGo + Wikipedia"""
-    if not AGENTS_AVAILABLE:
-        return []
-    
-    # Limit to first 2 queries for speed
-    queries_to_search = search_queries[:2]
-    print(f"📊 Searching {len(queries_to_search)} queries")
-    print(f"🔍 Using RAG (Vector DB) + DuckDuckGo + Wikipedia")
-    
-    all_rag_results = []
-    all_web_results = []
-    all_wiki_results = []
-    
-    for i, query in enumerate(queries_to_search):
-        print(f"  🔎 Query {i+1}/{len(queries_to_search)}: {query}")
-        
-        # 1. Search RAG (Vector Database) FIRST - Internal knowledge
-        if RAG_AVAILABLE:
-            try:
-                print(f"    📚 Searching Vector DB (RAG)...")
-                rag_results = rag_search.invoke({"query": query, "max_results": 2})
-                if rag_results:
-                    all_rag_results.extend(rag_results)
-                    print(f"    ✅ RAG: {len(rag_results)} documents")
-            except Exception as e:
-                print(f"    ❌ RAG error: {e}")
-        
-        # 2. Search DuckDuckGo - External web sources
-        try:
-            print(f"    🌐 Searching DuckDuckGo...")
-            web_results = web_search.invoke({"query": query, "max_results": 2})
-            if web_results:
-                all_web_results.extend(web_results)
-                print(f"    ✅ Web: {len(web_results)} results")
-            else:
-                print(f"    ⚠️ DuckDuckGo: No results")
-        except Exception as e:
-            print(f"    ❌ DuckDuckGo error: {e}")
-        
-        # 3. Search Wikipedia - External knowledge base
-        try:
-            print(f"    📖 Searching Wikipedia...")
-            wiki_results = wikipedia_search.invoke({"query": query, "max_results": 2})
-            if wiki_results:
-                all_wiki_results.extend(wiki_results)
-                print(f"    ✅ Wikipedia: {len(wiki_results)} results")
-        except Exception as e:
-            print(f"    ❌ Wikipedia error: {e}")
-        
-        # Small delay between queries
-        if i < len(queries_to_search) - 1:
-            time.sleep(0.5)
+async def planner_agent_streaming(user_request: str, on_query, bypass_cache: bool = False) -> dict:
+    """
+    Planner Agent streaming its JSON plan.
+
+    on_query is awaited with each search query as soon as it has been
+    generated, long before the rest of the plan is complete.
+    """
+    if not await ensure_agents_async():
+        return planner_agent_real(user_request)
     
-    # Combine all sources (RAG first for priority)
-    all_results = all_rag_results + all_web_results + all_wiki_results
-    print(f"📊 Total: {len(all_rag_results)} RAG + {len(all_web_results)} web + {len(all_wiki_results)} wiki = {len(all_results)} results")
+    queries = JSONArrayItemStream("search_queries")
     
-    unique_sources = []
-    seen_content = set()
+    async def on_delta(text: str):
+        for query in queries.feed(text):
+            if isinstance(query, str):
+                await on_query(query)
     
-    for source in all_results:
-        content_hash = hash(source["content"][:100])
-        if content_hash not in seen_content:
-            unique_sources.append(source)
-            seen_content.add(content_hash)
+    try:
+        content = await cached_astream(
+            get_llm_client("planner"),
+            [SystemMessage(content=_planning_prompt(user_request))],
+            on_delta,
+            config={"metadata": {"step": "planner"}},
+            bypass_cache=bypass_cache
+        )
+        return _parse_plan(content)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        # Fallback
+        return _fallback_plan(user_request)
+
+
+def _search_backends() -> List[SearchBackend]:
+    """Search backends in priority order (RAG first - internal knowledge)"""
+    backends = []
+    if RAG_AVAILABLE or KEYWORD_INDEX_AVAILABLE:
+        backends.append(SearchBackend(
+            name="rag",
+            search=rag_search,
+            max_results=SEARCH_MAX_RESULTS,
+            max_concurrency=int(os.getenv("SEARCH_CONCURRENCY_RAG", "4")),
+            timeout=float(os.getenv("SEARCH_TIMEOUT_RAG", "10"))
+        ))
+    backends.append(SearchBackend(
+        name="web",
+        search=web_search,
+        max_results=SEARCH_MAX_RESULTS,
+        max_concurrency=int(os.getenv("SEARCH_CONCURRENCY_WEB", "3")),
+        timeout=float(os.getenv("SEARCH_TIMEOUT_WEB", "10"))
+    ))
+    backends.append(SearchBackend(
+        name="wikipedia",
+        search=wikipedia_search,
+        max_results=SEARCH_MAX_RESULTS,
+        max_concurrency=int(os.getenv("SEARCH_CONCURRENCY_WIKIPEDIA", "4")),
+        timeout=float(os.getenv("SEARCH_TIMEOUT_WIKIPEDIA", "10"))
+    ))
+    return backends
+
+
+async def _collect_sources(fanout: SearchFanout) -> List[dict]:
+    """Wait for a fan-out and return its deduplicated, capped sources"""
+    try:
+        with STAGE_SECONDS.time(stage="retrieval"):
+            all_results = await fanout.gather()
+    except asyncio.CancelledError:
+        fanout.cancel()
+        raise
+    counts = fanout.counts()
+    print(f"📊 Total: {counts} = {len(all_results)} results")
     
-    return unique_sources[:15]
+    with STAGE_SECONDS.time(stage="dedup"):
+        return dedupe_sources(all_results)[:MAX_SOURCES]
 
 
 # ============================================================================
 # PUBLIC API
 # ============================================================================
 
-async def execute_research(user_request: str) -> dict:
+async def execute_research(user_request: str, bypass_cache: bool = False, on_plan=None) -> dict:
     """
     Execute the real multi-agent research workflow
     
+    Planner and retrieval are pipelined: the user's request is searched
+    right away, and each planner query is searched as soon as it streams
+    in, so retrieval mostly overlaps with planning.
+    
+    Args:
+        user_request: The user's research query
+        bypass_cache: Skip the LLM response cache for the planner
+        on_plan: Optional coroutine function awaited with the plan once the
+            planner has finished (retrieval may still be running)
+    
     Returns:
         dict: Research results with sources
     """
     print(f"🎯 Starting REAL research for: {user_request}")
     
-    # Step 1: Planner
-    print("🎯 Planner Agent: Analyzing request...")
-    plan = planner_agent_real(user_request)
-    search_queries = plan.get("search_queries", [user_request])
-    print(f"✅ Plan created with {len(search_queries)} queries")
+    if not await ensure_agents_async():
+        plan = planner_agent_real(user_request)
+        if on_plan is not None:
+            await on_plan(plan)
+        return {"plan": plan, "sources": [], "queries": plan.get("search_queries", [user_request])}
     
-    # Step 2: Retrieval
-    print("🔍 Retrieval Agent: Searching...")
-    sources = retrieval_agent_real(search_queries)
+    fanout = SearchFanout(_search_backends(), run_blocking)
+    try:
+        if SPECULATIVE_QUERY:
+            fanout.submit(user_request)
+            print("⚡ Speculative search started for the request itself")
+        
+        planned = 0
+        
+        async def on_query(query):
+            nonlocal planned
+            if not isinstance(query, str) or not query.strip() or planned >= MAX_PLAN_QUERIES:
+                return
+            if fanout.submit(query.strip()):
+                planned += 1
+                print(f"⚡ Planner query dispatched: {query}")
+        
+        # Step 1: Planner, dispatching its queries to retrieval as they stream
+        print("🎯 Planner Agent: Analyzing request...")
+        with STAGE_SECONDS.time(stage="planner"):
+            plan = await planner_agent_streaming(user_request, on_query, bypass_cache=bypass_cache)
+        plan["search_queries"] = _plan_queries(plan) or [user_request]
+        # Fallback plans are not streamed; already dispatched queries are
+        # ignored and count once towards MAX_PLAN_QUERIES
+        for query in plan["search_queries"]:
+            await on_query(query)
+        print(f"✅ Plan created with {len(plan['search_queries'])} queries")
+        if on_plan is not None:
+            await on_plan(plan)
+    except BaseException:
+        fanout.cancel()
+        raise
+    
+    # Step 2: Retrieval (already running for every query × backend)
+    print("🔍 Retrieval Agent: Waiting for searches...")
+    sources = await _collect_sources(fanout)
     print(f"✅ Found {len(sources)} unique sources")
     
     return {
         "plan": plan,
         "sources": sources,
-        "queries": search_queries
+        "queries": fanout.queries
     }
 
 
 def is_agents_available() -> bool:
-    """Check if real agents are available"""
-    return AGENTS_AVAILABLE
+    """Check if real agents are available (loads them on first call)"""
+    return ensure_agents()
+
+
+def get_cache_stats() -> dict:
+    """Hit/miss counters and sizes of the agent caches"""
+    stats = {"search": search_cache.stats(), "llm": llm_cache.stats()}
+    if embeddings is not None:
+        stats["embeddings"] = embeddings.stats()
+    if KEYWORD_INDEX_AVAILABLE:
+        stats["keyword_index"] = {"chunks": keyword_index.count()}
+    return stats
+
+
+def get_rate_limit_stats() -> dict:
+    """Per-provider token bucket counters"""
+    return rate_limit_stats()
+
+
+def get_llm_stats() -> dict:
+    """Concurrency limits and usage counters of the shared LLM clients"""
+    return llm_client_stats()
 
 
 def get_sqlite_checkpointer():
     """Get SqliteSaver checkpointer for persistence"""
+    from langgraph.checkpoint.sqlite import SqliteSaver
     db_path = os.path.join(os.path.dirname(__file__), "..", "checkpoints.db")
     return SqliteSaver.from_conn_string(db_path)
 
@@ -0,0 +1,57 @@
+"""
+🔤 BM25 - Keyword relevance scoring
+
+Okapi BM25 over lowercased word tokens. Used to rank source passages
+against the research query without any embedding calls.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import List, Sequence
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Very common English words carry no relevance signal
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in is it its of on or that the
+their this to was were what when where which who why will with how into about
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords"""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25:
+    """In-memory BM25 index over a fixed list of tokenized documents"""
+
+    def __init__(self, documents: Sequence[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_freqs = [Counter(doc) for doc in documents]
+        self.doc_lengths = [len(doc) for doc in documents]
+        self.avg_length = (sum(self.doc_lengths) / len(documents)) if documents else 0.0
+        document_frequency: Counter = Counter()
+        for freqs in self.doc_freqs:
+            document_frequency.update(freqs.keys())
+        n = len(documents)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    def scores(self, query: List[str]) -> List[float]:
+        """BM25 score of every document for the query tokens"""
+        terms = [term for term in set(query) if term in self.idf]
+        results = []
+        for freqs, length in zip(self.doc_freqs, self.doc_lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_length) if self.avg_length else self.k1
+            score = 0.0
+            for term in terms:
+                tf = freqs.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            results.append(score)
+        return results
@@ -0,0 +1,308 @@
+"""
+🗄️ Cache - Two-tier TTL cache (in-memory LRU + optional SQLite)
+
+Used in front of the search tools so popular topics are not re-fetched from
+the network or the vector store on every research.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry TTL and an optional SQLite tier.
+
+    The memory tier is bounded by max_entries (least recently used entries are
+    evicted first). When db_path is set, entries are written through to SQLite
+    so they survive restarts; disk hits are promoted back into memory. The
+    SQLite tier is pruned at startup and every PRUNE_EVERY writes: expired
+    rows are deleted, then the rows closest to expiry until at most
+    max_disk_entries remain.
+    Values must be JSON-serializable.
+    """
+
+    PRUNE_EVERY = 64
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 1024,
+        default_ttl: float = 3600,
+        db_path: Optional[str] = None,
+        max_disk_entries: int = 10000
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._writes = 0
+        self.default_ttl = default_ttl
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # key -> (expires_at, value)
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+        if db_path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS cache_entries ("
+                    " namespace TEXT NOT NULL,"
+                    " key TEXT NOT NULL,"
+                    " expires_at REAL NOT NULL,"
+                    " value TEXT NOT NULL,"
+                    " PRIMARY KEY (namespace, key))"
+                )
+                self._db.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_cache_entries_expiry"
+                    " ON cache_entries (namespace, expires_at)"
+                )
+                self._db.commit()
+                with self._lock:
+                    self._prune_disk()
+            except Exception as e:
+                print(f"⚠️ {name} cache: SQLite tier disabled ({e})")
+                self._db = None
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires_at, value FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.name, key)
+                ).fetchone()
+                if row is not None:
+                    expires_at, raw = row
+                    if expires_at > now:
+                        value = json.loads(raw)
+                        self._store_in_memory(key, expires_at, value)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return value
+                    self._db.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                        (self.name, key)
+                    )
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value for ttl seconds (default_ttl when omitted)"""
+        expires_at = time.time() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._store_in_memory(key, expires_at, value)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO cache_entries (namespace, key, expires_at, value)"
+                        " VALUES (?, ?, ?, ?)",
+                        (self.name, key, expires_at, json.dumps(value))
+                    )
+                    self._db.commit()
+                    self._writes += 1
+                    if self._writes % self.PRUNE_EVERY == 0:
+                        self._prune_disk()
+                except Exception as e:
+                    print(f"⚠️ {self.name} cache: could not persist entry ({e})")
+
+    def _prune_disk(self) -> int:
+        """Bound the SQLite tier (caller holds the lock); returns rows removed"""
+        removed = self._db.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+            (self.name, time.time())
+        ).rowcount
+        count = self._db.execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.name,)
+        ).fetchone()[0]
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            removed += self._db.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+                " SELECT key FROM cache_entries WHERE namespace = ?"
+                " ORDER BY expires_at LIMIT ?)",
+                (self.name, self.name, overflow)
+            ).rowcount
+            self.evictions += overflow
+        self._db.commit()
+        return removed
+
+    def _store_in_memory(self, key: str, expires_at: float, value: Any):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def purge_expired(self) -> int:
+        """Drop expired entries from both tiers, returning how many were removed"""
+        now = time.time()
+        removed = 0
+        with self._lock:
+            for key in [k for k, (expires_at, _) in self._memory.items() if expires_at <= now]:
+                del self._memory[key]
+                removed += 1
+            if self._db is not None:
+                cursor = self._db.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+                    (self.name, now)
+                )
+                self._db.commit()
+                removed += cursor.rowcount
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "name": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "max_disk_entries": self.max_disk_entries,
+                "disk_enabled": self._db is not None
+            }
+            if self._db is not None:
+                stats["disk_entries"] = self._db.execute(
+                    "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.name,)
+                ).fetchone()[0]
+            return stats
+
+    def close(self):
+        """Close the SQLite tier"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a search query"""
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """Search result cache keyed by (backend, normalized query, max_results)"""
+
+    def __init__(
+        self,
+        ttls: Dict[str, float],
+        max_entries: int = 2048,
+        db_path: Optional[str] = None,
+        default_ttl: float = 3600,
+        max_disk_entries: int = 10000
+    ):
+        self.ttls = ttls
+        self._cache = TTLCache(
+            "search", max_entries=max_entries, default_ttl=default_ttl,
+            db_path=db_path, max_disk_entries=max_disk_entries
+        )
+        self._lock = threading.Lock()
+        # backend -> {"hits": n, "misses": n}
+        self._backend_counters: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(backend: str, query: str, max_results: int) -> str:
+        digest = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+        return f"{backend}:{max_results}:{digest}"
+
+    def get(self, backend: str, query: str, max_results: int) -> Optional[list]:
+        value = self._cache.get(self.make_key(backend, query, max_results))
+        with self._lock:
+            counters = self._backend_counters.setdefault(backend, {"hits": 0, "misses": 0})
+            counters["hits" if value is not None else "misses"] += 1
+        return value
+
+    def set(self, backend: str, query: str, max_results: int, results: list):
+        self._cache.set(
+            self.make_key(backend, query, max_results),
+            results,
+            ttl=self.ttls.get(backend)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        with self._lock:
+            stats["backends"] = {name: dict(c) for name, c in self._backend_counters.items()}
+        stats["ttls"] = dict(self.ttls)
+        return stats
+
+    def close(self):
+        self._cache.close()
+
+
+class LLMCache:
+    """
+    Content-addressed LLM response cache.
+
+    Keys are a hash of the model, the call parameters and the full prompt, so
+    identical deterministic prompts (same query, same approved sources) are
+    answered from the cache instead of the provider.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl: float = 86400,
+        db_path: Optional[str] = None,
+        max_disk_entries: int = 5000
+    ):
+        self._cache = TTLCache(
+            "llm", max_entries=max_entries, default_ttl=ttl,
+            db_path=db_path, max_disk_entries=max_disk_entries
+        )
+
+    @staticmethod
+    def make_key(model: str, messages: list, params: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            {"model": model, "params": params, "messages": messages},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    def set(self, key: str, content: str):
+        self._cache.set(key, content)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+    def close(self):
+        self._cache.close()
@@ -0,0 +1,185 @@
+"""
+📦 Context Packer - Token-budgeted writer context
+
+Approved sources are split into passages, ranked against the research query
+with BM25, and packed into a fixed token budget measured with the model's
+own tokenizer (tiktoken; a characters/4 estimate if it is not installed).
+
+Sentences longer than a passage (tables, code, text without punctuation)
+are cut at word boundaries, so no passage exceeds the passage size.
+
+Packing is two-pass: first the best passage of every source (most relevant
+sources first) so each approved source gets a voice, then the remaining
+passages by score until the budget is spent. Passages are emitted in their
+original order within each source.
+"""
+
+import functools
+import os
+import re
+from typing import Dict, List, Tuple
+
+from services.bm25 import BM25, tokenize
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+
+WRITER_CONTEXT_TOKENS = int(os.getenv("WRITER_CONTEXT_TOKENS", "3000"))
+PASSAGE_TOKENS = int(os.getenv("PASSAGE_TOKENS", "120"))
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+@functools.lru_cache(maxsize=8)
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def load_tokenizer(model: str = "gpt-4o-mini"):
+    """Load the model's encoding ahead of time (the first load downloads its BPE file)"""
+    if TIKTOKEN_AVAILABLE:
+        return _encoding(model)
+    return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Number of tokens the model sees for text"""
+    if not text:
+        return 0
+    if TIKTOKEN_AVAILABLE:
+        return len(_encoding(model).encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def _split_long_sentence(sentence: str, max_tokens: int, model: str) -> List[str]:
+    """Cut a sentence longer than max_tokens (tables, code, unpunctuated text) at word boundaries"""
+    pieces, current, current_tokens = [], [], 0
+    for word in sentence.split(" "):
+        tokens = count_tokens(" " + word, model)
+        if tokens > max_tokens:
+            # A single huge "word": cut it by characters (~4 per token)
+            step = max(1, max_tokens * 3)
+            parts = [word[i:i + step] for i in range(0, len(word), step)]
+        else:
+            parts = [word]
+        for part in parts:
+            part_tokens = tokens if len(parts) == 1 else count_tokens(" " + part, model)
+            if current and current_tokens + part_tokens > max_tokens:
+                pieces.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(part)
+            current_tokens += part_tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def split_passages(text: str, max_tokens: int = PASSAGE_TOKENS, model: str = "gpt-4o-mini") -> List[str]:
+    """Split text into passages of whole sentences up to max_tokens each"""
+    passages = []
+    for paragraph in _PARAGRAPH_RE.split(text.strip()):
+        current, current_tokens = [], 0
+        sentences = []
+        for sentence in _SENTENCE_RE.split(" ".join(paragraph.split())):
+            if sentence and count_tokens(sentence, model) > max_tokens:
+                sentences.extend(_split_long_sentence(sentence, max_tokens, model))
+            elif sentence:
+                sentences.append(sentence)
+        for sentence in sentences:
+            tokens = count_tokens(sentence, model)
+            if current and current_tokens + tokens > max_tokens:
+                passages.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(sentence)
+            current_tokens += tokens
+        if current:
+            passages.append(" ".join(current))
+    return passages
+
+
+def _header(number: int, source: dict) -> str:
+    return (
+        f"\n[{number}] {source.get('type', 'source').upper()}: {source.get('title', 'No title')}\n"
+        f"Source: {source.get('source', 'Unknown')}\n"
+    )
+
+
+def pack_context(
+    query: str,
+    sources: List[dict],
+    budget_tokens: int = WRITER_CONTEXT_TOKENS,
+    passage_tokens: int = PASSAGE_TOKENS,
+    model: str = "gpt-4o-mini"
+) -> Tuple[str, Dict]:
+    """
+    Build the writer's sources text within budget_tokens.
+
+    Sources without any packed passage are left out and the rest are
+    numbered consecutively, so citations [n] always match the text.
+
+    Returns:
+        (sources_text, stats)
+    """
+    # (source index, position in source, passage text, tokens)
+    passages = []
+    for source_index, source in enumerate(sources):
+        for position, passage in enumerate(split_passages(source.get("content", ""), passage_tokens, model)):
+            passages.append((source_index, position, passage, count_tokens(passage, model)))
+
+    scores = BM25([tokenize(p[2]) for p in passages]).scores(tokenize(query)) if passages else []
+    # Higher score first; ties keep source priority and reading order
+    ranked = sorted(range(len(passages)), key=lambda i: (-scores[i], passages[i][0], passages[i][1]))
+
+    header_tokens = {
+        index: count_tokens(_header(index + 1, source), model) + count_tokens("Content: ", model)
+        for index, source in enumerate(sources)
+    }
+    selected: Dict[int, List[int]] = {}
+    used = 0
+
+    def take(i: int) -> bool:
+        nonlocal used
+        source_index, _, _, tokens = passages[i]
+        cost = tokens + (0 if source_index in selected else header_tokens[source_index])
+        if used + cost > budget_tokens:
+            return False
+        selected.setdefault(source_index, []).append(i)
+        used += cost
+        return True
+
+    # Pass 1: best passage of each source; pass 2: everything else by score
+    taken = set()
+    best_per_source = {}
+    for i in ranked:
+        best_per_source.setdefault(passages[i][0], i)
+    for i in best_per_source.values():
+        if take(i):
+            taken.add(i)
+    for i in ranked:
+        if i not in taken and take(i):
+            taken.add(i)
+
+    parts = []
+    for number, source_index in enumerate(sorted(selected), start=1):
+        chosen = sorted(selected[source_index], key=lambda i: passages[i][1])
+        parts.append(_header(number, sources[source_index]))
+        parts.append("Content: " + " [...] ".join(passages[i][2] for i in chosen) + "\n")
+
+    stats = {
+        "sources": len(selected),
+        "sources_dropped": len(sources) - len(selected),
+        "passages": len(taken),
+        "passages_total": len(passages),
+        "tokens": used,
+        "budget_tokens": budget_tokens,
+        "tokenizer": "tiktoken" if TIKTOKEN_AVAILABLE else "estimate"
+    }
+    return "".join(parts), stats
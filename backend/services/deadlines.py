@@ -0,0 +1,60 @@
+"""
+⏱️ Deadlines - Thread-safe per-call timeouts for search tools
+
+Replaces SIGALRM-based timeouts, which only work on the main thread and
+clobber any other alarm handler in the process. A Deadline is a plain
+monotonic expiry time, so it can be created on one thread or task and
+checked from any other.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+# Blocking network calls guarded by a deadline run here. This pool is kept
+# separate from the agent executor so a tool waiting on a deadline never
+# waits on a slot of its own pool.
+DEADLINE_EXECUTOR_WORKERS = int(os.getenv("DEADLINE_EXECUTOR_WORKERS", "16"))
+_deadline_executor = ThreadPoolExecutor(
+    max_workers=DEADLINE_EXECUTOR_WORKERS,
+    thread_name_prefix="deadline-call"
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call does not finish before its deadline"""
+
+
+class Deadline:
+    """A point in time after which a search should stop and return what it has"""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def call(self, func, *args, **kwargs):
+        """
+        Run a blocking callable, giving up when the deadline passes.
+
+        The callable runs on a worker thread; if the deadline passes first,
+        DeadlineExceeded is raised and the caller moves on while the stray
+        call finishes in the background (threads cannot be interrupted).
+        """
+        if self.expired:
+            raise DeadlineExceeded(f"Deadline of {self.timeout:g}s already passed")
+
+        future = _deadline_executor.submit(func, *args, **kwargs)
+        try:
+            return future.result(timeout=self.remaining())
+        except FutureTimeoutError:
+            future.cancel()
+            raise DeadlineExceeded(f"Call exceeded deadline of {self.timeout:g}s")
@@ -0,0 +1,196 @@
+"""
+🧹 Dedup - Near-duplicate source detection
+
+Retrieval returns overlapping results: the same page through different
+backends or URL variants, mirrors and syndicated copies whose text differs
+only slightly. Sending them all to the writer wastes prompt tokens and
+crowds out varied sources.
+
+A source is dropped when an earlier source has
+- the same normalized URL (scheme, default port, www., fragment, tracking
+  parameters and trailing slashes ignored), or
+- an estimated Jaccard similarity of its word shingles at or above the
+  threshold (MinHash signatures, candidates found by LSH banding).
+
+Each source is hashed once and only compared with the sources sharing an
+LSH band, so deduplication stays near-linear in the number of sources.
+Earlier sources win, which keeps the retrieval priority order.
+"""
+
+import hashlib
+import os
+import re
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+
+DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.8"))
+DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", "3"))
+
+_MAX_HASH = (1 << 64) - 1
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "ref", "ref_src", "igshid", "mc_cid", "mc_eid"}
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> Optional[str]:
+    """Canonical form of an http(s) URL, or None for anything else"""
+    if not url or not url.lower().startswith(("http://", "https://")):
+        return None
+    parts = urlsplit(url.strip())
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if host.startswith("m.") and host.endswith("wikipedia.org"):
+        host = host[2:]
+    if port is not None and port != _DEFAULT_PORTS[parts.scheme.lower()]:
+        host += f":{port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    normalized = host + path
+    if query:
+        normalized += "?" + urlencode(query)
+    return normalized
+
+
+def shingles(text: str, size: int = DEDUP_SHINGLE_SIZE) -> Set[str]:
+    """Word n-grams of the lowercased text (the whole text if shorter)"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class MinHasher:
+    """
+    One-permutation MinHash: each feature is hashed once and kept as the
+    minimum of one of `num_perm` bins, so a signature costs O(features)
+    instead of O(features x num_perm). Empty bins (short texts) borrow the
+    next non-empty bin's value (rotation densification).
+    """
+
+    def __init__(self, num_perm: int = 64):
+        self.num_perm = num_perm
+
+    def signature(self, features: Set[str]) -> Tuple[int, ...]:
+        bins = [_MAX_HASH] * self.num_perm
+        for feature in features:
+            h = _hash64(feature)
+            index, value = h % self.num_perm, h // self.num_perm
+            if value < bins[index]:
+                bins[index] = value
+        if not features:
+            return tuple(bins)
+
+        # Values are below 2**58, so the distance term keeps borrowed values
+        # distinct from real ones
+        signature = list(bins)
+        for index in range(self.num_perm):
+            if bins[index] != _MAX_HASH:
+                continue
+            distance = 1
+            while bins[(index + distance) % self.num_perm] == _MAX_HASH:
+                distance += 1
+            signature[index] = bins[(index + distance) % self.num_perm] + (distance << 58)
+        return tuple(signature)
+
+    @staticmethod
+    def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of the two feature sets"""
+        return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class SourceDeduplicator:
+    """Incremental near-duplicate filter over search result dicts"""
+
+    def __init__(
+        self,
+        threshold: float = DEDUP_SIMILARITY_THRESHOLD,
+        shingle_size: int = DEDUP_SHINGLE_SIZE,
+        num_perm: int = 64,
+        bands: int = 16
+    ):
+        """
+        Args:
+            threshold: Estimated Jaccard similarity from which sources are duplicates
+            shingle_size: Words per shingle
+            num_perm: MinHash signature length
+            bands: LSH bands (num_perm / bands rows each); 16x4 makes pairs
+                above 0.8 similarity candidates with >99.9% probability
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self._urls: Set[str] = set()
+        self._exact: Set[str] = set()
+        self._signatures: List[Tuple[int, ...]] = []
+        # (band index, band values) -> indexes of kept signatures
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        self.url_duplicates = 0
+        self.near_duplicates = 0
+
+    def add(self, source: dict) -> bool:
+        """Keep the source unless it duplicates one already kept"""
+        url = normalize_url(source.get("source", ""))
+        if url is not None and url in self._urls:
+            self.url_duplicates += 1
+            return False
+
+        # Sources without text can only be duplicates by URL
+        features = shingles(source.get("content", ""), self.shingle_size)
+        exact_key = "\n".join(sorted(features))
+        if features and exact_key in self._exact:
+            self.near_duplicates += 1
+            return False
+
+        signature = None
+        band_keys = []
+        if features:
+            signature = self.hasher.signature(features)
+            band_keys = [
+                (band, signature[band * self.rows:(band + 1) * self.rows])
+                for band in range(self.bands)
+            ]
+            candidates = {index for key in band_keys for index in self._buckets.get(key, ())}
+            for index in candidates:
+                if MinHasher.similarity(signature, self._signatures[index]) >= self.threshold:
+                    self.near_duplicates += 1
+                    return False
+
+        if url is not None:
+            self._urls.add(url)
+        if signature is not None:
+            self._exact.add(exact_key)
+            index = len(self._signatures)
+            self._signatures.append(signature)
+            for key in band_keys:
+                self._buckets.setdefault(key, []).append(index)
+        return True
+
+
+def dedupe_sources(sources: List[dict], threshold: float = DEDUP_SIMILARITY_THRESHOLD) -> List[dict]:
+    """Drop URL and near-duplicate sources, keeping the first of each group"""
+    deduplicator = SourceDeduplicator(threshold=threshold)
+    unique_sources = [source for source in sources if deduplicator.add(source)]
+    removed = len(sources) - len(unique_sources)
+    if removed:
+        print(
+            f"🧹 Dedup: dropped {removed} sources "
+            f"({deduplicator.url_duplicates} same URL, {deduplicator.near_duplicates} near-duplicate)"
+        )
+    return unique_sources
@@ -0,0 +1,62 @@
+"""
+🧩 Deltas - Incremental research state updates
+
+WebSocket updates carry only what changed in a research since the previous
+update, encoded as a JSON Merge Patch (RFC 7386): nested objects are
+patched key by key, a null value removes a key, and any other value
+(including lists) replaces the previous one.
+"""
+
+import copy
+import json
+from typing import Any, Dict
+
+
+def merge_patch_diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the merge patch turning `old` into `new` (empty if equal)"""
+    patch: Dict[str, Any] = {}
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = copy.deepcopy(value)
+        elif isinstance(value, dict) and isinstance(old[key], dict):
+            nested = merge_patch_diff(old[key], value)
+            if nested:
+                patch[key] = nested
+        elif value != old[key]:
+            patch[key] = copy.deepcopy(value)
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    return patch
+
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    """Apply a merge patch, returning the patched document"""
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
+
+
+class DeltaTracker:
+    """Remembers the last state published per research to compute deltas"""
+
+    def __init__(self):
+        self._last: Dict[str, Dict[str, Any]] = {}
+
+    def diff(self, research_id: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Patch from the last published state to `state`, which becomes the new baseline"""
+        # Round-trip through JSON so the baseline is a detached copy with the
+        # same types clients will see
+        current = json.loads(json.dumps(state))
+        patch = merge_patch_diff(self._last.get(research_id, {}), current)
+        self._last[research_id] = current
+        return patch
+
+    def forget(self, research_id: str):
+        self._last.pop(research_id, None)
@@ -0,0 +1,243 @@
+"""
+🧮 Embedding Cache - Persistent query/document embeddings
+
+Wraps an embeddings model (OpenAIEmbeddings) with a SQLite store of float32
+vectors keyed by (model, text hash). Lookups are batched, and every miss in
+a call is embedded in a single request to the provider. Texts already being
+embedded by another thread are awaited instead of embedded twice.
+
+Queries (embed_query, e.g. from concurrent rag_search calls) that miss the
+store are held for a short window and embedded together, so the queries
+a streaming planner emits in quick succession cost one provider request
+instead of one each.
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _to_blob(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _from_blob(blob: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+class EmbeddingStore:
+    """SQLite table of float32 embeddings keyed by (model, text hash)"""
+
+    # SQLite limits the number of bound parameters per statement
+    _BATCH = 500
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " text_hash TEXT NOT NULL,"
+            " dim INTEGER NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, text_hash))"
+        )
+        self._db.commit()
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Return the stored vectors for the hashes that are present"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(hashes), self._BATCH):
+                chunk = hashes[start:start + self._BATCH]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *chunk]
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = _from_blob(blob)
+        return found
+
+    def put_many(self, model: str, items: Dict[str, List[float]]):
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector) VALUES (?, ?, ?, ?)",
+                [(model, h, len(v), _to_blob(v)) for h, v in items.items()]
+            )
+            self._db.commit()
+
+    def count(self, model: Optional[str] = None) -> int:
+        with self._lock:
+            if model is None:
+                return self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return self._db.execute(
+                "SELECT COUNT(*) FROM embeddings WHERE model = ?", (model,)
+            ).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class CachedEmbeddings:
+    """
+    Embeddings wrapper serving vectors from an EmbeddingStore when possible.
+
+    Implements the langchain Embeddings interface without importing
+    langchain (it is registered as a virtual subclass once langchain is
+    loaded, see register_with_langchain).
+    """
+
+    def __init__(
+        self,
+        underlying,
+        store: EmbeddingStore,
+        model_name: Optional[str] = None,
+        limiter=None,
+        query_batch_window: float = 0.0
+    ):
+        """
+        Args:
+            limiter: Optional TokenBucket taken from before each provider call
+            query_batch_window: Seconds to collect query misses into one
+                provider call (0 embeds each query right away)
+        """
+        self.underlying = underlying
+        self.store = store
+        self.limiter = limiter
+        self.query_batch_window = query_batch_window
+        # text -> Future of the query batch being collected (None if none is)
+        self._query_batch: Optional[Dict[str, Future]] = None
+        self.model_name = model_name or getattr(underlying, "model", type(underlying).__name__)
+        self._lock = threading.Lock()
+        # text hash -> Future resolved by the thread embedding that text
+        self._inflight: Dict[str, Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.provider_calls = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        hashes = [_text_hash(t) for t in texts]
+        vectors: Dict[str, List[float]] = self.store.get_many(self.model_name, list(set(hashes)))
+
+        to_embed: Dict[str, str] = {}
+        to_wait: Dict[str, Future] = {}
+        with self._lock:
+            for text, text_hash in zip(texts, hashes):
+                if text_hash in vectors or text_hash in to_embed or text_hash in to_wait:
+                    continue
+                if text_hash in self._inflight:
+                    to_wait[text_hash] = self._inflight[text_hash]
+                else:
+                    to_embed[text_hash] = text
+                    self._inflight[text_hash] = Future()
+            self.hits += sum(1 for h in hashes if h in vectors)
+            self.misses += len(to_embed)
+
+        if to_embed:
+            self._embed_misses(to_embed, vectors)
+
+        for text_hash, future in to_wait.items():
+            vectors[text_hash] = future.result()
+
+        return [vectors[h] for h in hashes]
+
+    def _embed_misses(self, to_embed: Dict[str, str], vectors: Dict[str, List[float]]):
+        """Embed all misses in one provider call and publish them to waiting threads"""
+        try:
+            with self._lock:
+                self.provider_calls += 1
+            if self.limiter is not None:
+                self.limiter.acquire()
+            embedded = self.underlying.embed_documents(list(to_embed.values()))
+            new_vectors = dict(zip(to_embed.keys(), embedded))
+            self.store.put_many(self.model_name, new_vectors)
+            vectors.update(new_vectors)
+        except BaseException as e:
+            with self._lock:
+                for text_hash in to_embed:
+                    self._inflight.pop(text_hash).set_exception(e)
+            raise
+
+        with self._lock:
+            for text_hash, vector in new_vectors.items():
+                self._inflight.pop(text_hash).set_result(vector)
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.query_batch_window <= 0:
+            return self.embed_documents([text])[0]
+
+        # Stored vectors are returned right away, without waiting for a batch
+        text_hash = _text_hash(text)
+        stored = self.store.get_many(self.model_name, [text_hash])
+        if text_hash in stored:
+            with self._lock:
+                self.hits += 1
+            return stored[text_hash]
+
+        with self._lock:
+            batch = self._query_batch
+            leader = batch is None
+            if leader:
+                batch = self._query_batch = {}
+            future = batch.setdefault(text, Future())
+        if leader:
+            self._flush_query_batch(batch)
+        return future.result()
+
+    def _flush_query_batch(self, batch: Dict[str, Future]):
+        """Wait for the window, then embed every query collected meanwhile in one call"""
+        time.sleep(self.query_batch_window)
+        with self._lock:
+            self._query_batch = None
+        texts = list(batch)
+        try:
+            vectors = self.embed_documents(texts)
+        except BaseException as e:
+            for future in batch.values():
+                future.set_exception(e)
+            return
+        for text, vector in zip(texts, vectors):
+            batch[text].set_result(vector)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.embed_query, text)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model": self.model_name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "provider_calls": self.provider_calls,
+                "stored_vectors": self.store.count(self.model_name)
+            }
+
+
+def register_with_langchain():
+    """Make CachedEmbeddings an instance of langchain's Embeddings ABC"""
+    from langchain_core.embeddings import Embeddings
+    Embeddings.register(CachedEmbeddings)
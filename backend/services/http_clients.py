@@ -0,0 +1,124 @@
+"""
+🌐 HTTP Clients - Shared, pooled connections for the search backends
+
+Search tools used to open a new connection (TCP + TLS handshake) on every
+call. They now share long-lived clients that keep connections alive:
+
+- one httpx.Client (HTTP/2 when `h2` is installed) for plain API calls
+  such as the MediaWiki API; it is thread-safe and pools connections per
+  host
+- one DDGS session per worker thread (DDGS sessions are not thread-safe),
+  reused across searches instead of a fresh session per query
+
+ResearchService.initialize() opens them and cleanup() closes them. Tools
+called outside the API (e.g. from scripts) get them lazily on first use.
+"""
+
+import os
+import threading
+from typing import List, Optional
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_HTTP2 = os.getenv("HTTP_HTTP2", "true").lower() == "true"
+HTTP_USER_AGENT = os.getenv(
+    "HTTP_USER_AGENT",
+    "MultiAgentResearchAssistant/1.0 (https://github.com/M13E-LAB/AgenticSystem1)"
+)
+
+_lock = threading.Lock()
+_http_client: Optional["httpx.Client"] = None
+_ddgs_local = threading.local()
+_ddgs_sessions: List = []
+
+
+def open_http_clients():
+    """Create the shared HTTP client (no-op if already open)"""
+    global _http_client
+    if not HTTPX_AVAILABLE:
+        print("⚠️  httpx not installed - search tools cannot use pooled connections")
+        return
+    with _lock:
+        if _http_client is not None:
+            return
+        http2 = HTTP_HTTP2 and HTTP2_AVAILABLE
+        _http_client = httpx.Client(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=HTTP_TIMEOUT,
+            headers={"User-Agent": HTTP_USER_AGENT},
+            follow_redirects=True
+        )
+    print(f"✅ Shared HTTP client ready ({'HTTP/2' if http2 else 'HTTP/1.1'}, "
+          f"{HTTP_MAX_KEEPALIVE} keep-alive connections)")
+
+
+def get_http_client() -> "httpx.Client":
+    """The shared HTTP client, opened on first use"""
+    if _http_client is None:
+        open_http_clients()
+    return _http_client
+
+
+def get_ddgs_session():
+    """This thread's long-lived DuckDuckGo session"""
+    session = getattr(_ddgs_local, "session", None)
+    if session is None:
+        from duckduckgo_search import DDGS
+        session = DDGS(timeout=HTTP_TIMEOUT)
+        _ddgs_local.session = session
+        with _lock:
+            _ddgs_sessions.append(session)
+    return session
+
+
+def reset_ddgs_session():
+    """Drop this thread's DuckDuckGo session (e.g. after it was rate limited)"""
+    session = getattr(_ddgs_local, "session", None)
+    _ddgs_local.session = None
+    if session is not None:
+        with _lock:
+            if session in _ddgs_sessions:
+                _ddgs_sessions.remove(session)
+        _close_ddgs(session)
+
+
+def _close_ddgs(session):
+    try:
+        session.__exit__(None, None, None)
+    except Exception:
+        pass
+
+
+def close_http_clients():
+    """Close the shared client and every DuckDuckGo session"""
+    global _http_client, _ddgs_local
+    with _lock:
+        client, _http_client = _http_client, None
+        sessions = list(_ddgs_sessions)
+        _ddgs_sessions.clear()
+        # Threads still holding a closed session will create a new one
+        _ddgs_local = threading.local()
+    if client is not None:
+        client.close()
+    for session in sessions:
+        _close_ddgs(session)
@@ -0,0 +1,383 @@
+"""
+📥 Ingest - Bulk document loading into the RAG store
+
+Loads every PDF, text/Markdown and HTML file under a directory into the
+Chroma `research_documents` collection and the local keyword index:
+
+    cd backend
+    python -m services.ingest path/to/documents [--topic annual_report]
+
+- Files are parsed and chunked (with overlap) in a process pool while
+  earlier chunks are being embedded
+- Chunks are embedded in large batches straight through the provider
+  (under the shared embeddings rate limit, not the query embeddings
+  cache), with retries and exponential backoff on provider errors
+- Chunk ids are content hashes, so re-ingesting is an idempotent upsert and
+  chunks already in the collection are never embedded again
+- Finished files are recorded in a progress database; an interrupted run
+  resumes with the files it had not completed
+
+PDF support needs the optional `pypdf` package.
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import Dict, Iterator, List, Tuple
+
+try:
+    from pypdf import PdfReader
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+
+
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "1000"))
+INGEST_CHUNK_OVERLAP = int(os.getenv("INGEST_CHUNK_OVERLAP", "200"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "5"))
+
+TEXT_EXTENSIONS = {".txt", ".md"}
+HTML_EXTENSIONS = {".html", ".htm"}
+PDF_EXTENSIONS = {".pdf"}
+
+
+# ============================================================================
+# PARSING & CHUNKING (runs in worker processes)
+# ============================================================================
+
+class _HTMLTextExtractor(HTMLParser):
+    """Visible text of an HTML document, one block element per line"""
+
+    SKIP = {"script", "style", "noscript", "template", "head"}
+    BLOCKS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skipping += 1
+        elif tag in self.BLOCKS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP and self._skipping:
+            self._skipping -= 1
+        elif tag in self.BLOCKS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+
+def read_pages(path: str) -> List[Tuple[int, str]]:
+    """Text of a file as (page number, text); non-PDF files are a single page 1"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in PDF_EXTENSIONS:
+        reader = PdfReader(path)
+        return [(number, page.extract_text() or "") for number, page in enumerate(reader.pages, start=1)]
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    if extension in HTML_EXTENSIONS:
+        extractor = _HTMLTextExtractor()
+        extractor.feed(text)
+        text = "".join(extractor.parts)
+    return [(1, text)]
+
+
+def chunk_text(text: str, chunk_size: int = INGEST_CHUNK_SIZE, overlap: int = INGEST_CHUNK_OVERLAP) -> List[str]:
+    """Split text into chunks of about chunk_size characters overlapping by `overlap`"""
+    text = " ".join(text.split())
+    if len(text) <= chunk_size:
+        return [text] if text else []
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            # Cut at the last space so words are not split
+            space = text.rfind(" ", start + chunk_size // 2, end)
+            if space != -1:
+                end = space
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        next_start = max(end - overlap, start + 1)
+        # Start the overlap on a word boundary too
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 else next_start
+    return [c for c in chunks if c]
+
+
+def chunk_id(content: str) -> str:
+    """Content-addressed chunk id: identical text always maps to the same id"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+
+
+def parse_file(path: str, root: str, topic: str, chunk_size: int, overlap: int) -> Tuple[str, List[Dict]]:
+    """Parse and chunk one file (process pool entry point)"""
+    relative = os.path.relpath(path, root)
+    chunks = []
+    for page, text in read_pages(path):
+        for index, content in enumerate(chunk_text(text, chunk_size, overlap)):
+            metadata = {
+                "source": relative,
+                "topic": topic or os.path.splitext(os.path.basename(path))[0],
+                "chunk": index
+            }
+            if path.lower().endswith(".pdf"):
+                metadata["page"] = page
+            chunks.append({"id": chunk_id(content), "content": content, "metadata": metadata})
+    return path, chunks
+
+
+def discover(directory: str) -> Iterator[str]:
+    """Supported files under directory, in a stable order"""
+    extensions = TEXT_EXTENSIONS | HTML_EXTENSIONS | (PDF_EXTENSIONS if PDF_AVAILABLE else set())
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames.sort()
+        for name in sorted(filenames):
+            extension = os.path.splitext(name)[1].lower()
+            if extension in extensions:
+                yield os.path.join(dirpath, name)
+            elif extension in PDF_EXTENSIONS:
+                print(f"⚠️  Skipping {name}: install pypdf to ingest PDFs")
+
+
+# ============================================================================
+# PROGRESS
+# ============================================================================
+
+class IngestProgress:
+    """Files already ingested, keyed by path and invalidated when they change"""
+
+    def __init__(self, db_path: str):
+        self._db = sqlite3.connect(db_path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS ingested_files ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime REAL NOT NULL,"
+            " chunks INTEGER NOT NULL,"
+            " ingested_at TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+    def is_done(self, path: str) -> bool:
+        row = self._db.execute(
+            "SELECT size, mtime FROM ingested_files WHERE path = ?", (os.path.abspath(path),)
+        ).fetchone()
+        if row is None:
+            return False
+        stat = os.stat(path)
+        return row[0] == stat.st_size and row[1] == stat.st_mtime
+
+    def mark_done(self, files: Dict[str, int]):
+        """Record files (path -> chunk count) as fully ingested"""
+        now = datetime.now().isoformat()
+        rows = []
+        for path, chunks in files.items():
+            stat = os.stat(path)
+            rows.append((os.path.abspath(path), stat.st_size, stat.st_mtime, chunks, now))
+        self._db.executemany(
+            "INSERT OR REPLACE INTO ingested_files (path, size, mtime, chunks, ingested_at)"
+            " VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+# ============================================================================
+# EMBEDDING & UPSERT
+# ============================================================================
+
+class Ingester:
+    """Embeds chunk batches and upserts them into Chroma and the keyword index"""
+
+    def __init__(self, collection, embeddings, keyword_index=None, batch_size: int = INGEST_BATCH_SIZE, limiter=None):
+        """
+        Args:
+            limiter: Optional TokenBucket taken from before each embedding call
+        """
+        self.collection = collection
+        self.embeddings = embeddings
+        self.limiter = limiter
+        self.keyword_index = keyword_index
+        self.batch_size = batch_size
+        self.embedded = 0
+        self.skipped = 0
+
+    def _embed_with_retry(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(INGEST_MAX_RETRIES):
+            try:
+                if self.limiter is not None:
+                    self.limiter.acquire()
+                return self.embeddings.embed_documents(texts)
+            except Exception as e:
+                if attempt == INGEST_MAX_RETRIES - 1:
+                    raise
+                delay = min(2 ** attempt, 30)
+                print(f"⚠️  Embedding batch failed ({e}), retrying in {delay}s...")
+                time.sleep(delay)
+
+    def upsert(self, chunks: List[Dict]):
+        """Embed and store chunks, skipping those already in the collection"""
+        # Identical chunks (e.g. repeated boilerplate) share an id
+        unique = list({chunk["id"]: chunk for chunk in chunks}.values())
+        for start in range(0, len(unique), self.batch_size):
+            batch = unique[start:start + self.batch_size]
+            existing = set(self.collection.get(ids=[c["id"] for c in batch], include=[])["ids"])
+            new = [c for c in batch if c["id"] not in existing]
+            self.skipped += len(batch) - len(new)
+            if new:
+                vectors = self._embed_with_retry([c["content"] for c in new])
+                self.collection.upsert(
+                    ids=[c["id"] for c in new],
+                    embeddings=vectors,
+                    documents=[c["content"] for c in new],
+                    metadatas=[c["metadata"] for c in new]
+                )
+                self.embedded += len(new)
+            if self.keyword_index is not None:
+                self.keyword_index.upsert((c["id"], c["content"], c["metadata"]) for c in batch)
+
+
+def ingest_directory(
+    directory: str,
+    ingester: Ingester,
+    progress: IngestProgress,
+    topic: str = "",
+    chunk_size: int = INGEST_CHUNK_SIZE,
+    overlap: int = INGEST_CHUNK_OVERLAP,
+    workers: int = None,
+    force: bool = False
+) -> Dict[str, int]:
+    """Ingest every supported file under directory; returns counters"""
+    files = [path for path in discover(directory) if force or not progress.is_done(path)]
+    print(f"📂 {len(files)} files to ingest from {directory}")
+    started = time.monotonic()
+    counters = {"files": 0, "failed": 0, "chunks": 0}
+
+    buffer: List[Dict] = []
+    # Files whose chunks are all in the buffer, marked done once it is flushed
+    buffered_files: Dict[str, int] = {}
+
+    def flush():
+        ingester.upsert(buffer)
+        progress.mark_done(buffered_files)
+        buffer.clear()
+        buffered_files.clear()
+        elapsed = time.monotonic() - started
+        print(
+            f"  ✅ {counters['files']}/{len(files)} files, {counters['chunks']} chunks "
+            f"({ingester.embedded} embedded, {ingester.skipped} already stored) in {elapsed:.0f}s"
+        )
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(parse_file, path, directory, topic, chunk_size, overlap)
+            for path in files
+        ]
+        # Embed batches as soon as enough chunks are parsed
+        for future in as_completed(futures):
+            try:
+                path, chunks = future.result()
+            except Exception as e:
+                counters["failed"] += 1
+                print(f"  ❌ Failed to parse a file: {e}")
+                continue
+            counters["files"] += 1
+            counters["chunks"] += len(chunks)
+            buffer.extend(chunks)
+            buffered_files[path] = len(chunks)
+            if len(buffer) >= ingester.batch_size:
+                flush()
+    if buffered_files:
+        flush()
+
+    counters["embedded"] = ingester.embedded
+    counters["skipped"] = ingester.skipped
+    return counters
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Ingest documents into the RAG store")
+    parser.add_argument("directory", help="Directory with .pdf, .txt, .md and .html files")
+    parser.add_argument("--topic", default="", help="Topic metadata for every chunk (default: file name)")
+    parser.add_argument("--chunk-size", type=int, default=INGEST_CHUNK_SIZE, help="Characters per chunk")
+    parser.add_argument("--overlap", type=int, default=INGEST_CHUNK_OVERLAP, help="Characters shared by consecutive chunks")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Chunks per embedding request")
+    parser.add_argument("--workers", type=int, default=None, help="Parsing processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Re-ingest files already recorded as done")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"Not a directory: {args.directory}")
+    if args.overlap >= args.chunk_size:
+        parser.error("--overlap must be smaller than --chunk-size")
+
+    # The same vector store, embeddings model and keyword index the API uses
+    from services import agents_integration
+    from services.rate_limit import get_limiter
+    agents_integration.ensure_agents()
+    vector_db = agents_integration.vector_db
+    keyword_index = agents_integration.keyword_index
+    if not agents_integration.RAG_AVAILABLE or vector_db is None:
+        print("❌ Vector DB not available (check OPENAI_API_KEY and the langchain/chroma install)")
+        return 1
+    # Document vectors go to Chroma only: the embeddings cache is for
+    # queries and would keep a second, never evicted copy of every chunk
+    embeddings = agents_integration.embeddings.underlying
+    # The startup sync removes index entries missing from its snapshot of
+    # the collection, which would include chunks ingested while it runs
+    if agents_integration.keyword_index_sync is not None:
+        print("🔑 Waiting for the keyword index sync...")
+        agents_integration.keyword_index_sync.result()
+
+    progress = IngestProgress(os.getenv(
+        "INGEST_PROGRESS_DB",
+        os.path.join(os.path.dirname(__file__), "..", "ingest_progress.db")
+    ))
+    ingester = Ingester(
+        vector_db._collection, embeddings, keyword_index,
+        batch_size=args.batch_size,
+        limiter=get_limiter("openai_embeddings")
+    )
+    try:
+        counters = ingest_directory(
+            args.directory, ingester, progress,
+            topic=args.topic,
+            chunk_size=args.chunk_size,
+            overlap=args.overlap,
+            workers=args.workers,
+            force=args.force
+        )
+    except KeyboardInterrupt:
+        print("⏸️  Interrupted - run the same command again to resume")
+        return 130
+    finally:
+        progress.close()
+
+    print(
+        f"🎉 Ingested {counters['files']} files ({counters['failed']} failed): "
+        f"{counters['chunks']} chunks, {counters['embedded']} newly embedded, "
+        f"{counters['skipped']} already stored. Collection now has {vector_db._collection.count()} chunks"
+    )
+    return 0 if counters["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+🔑 Keyword Index - On-disk BM25 index of the RAG documents
+
+A SQLite FTS5 inverted index (porter-stemmed, BM25-ranked) over the same
+chunks as the Chroma `research_documents` collection, keyed by the Chroma
+ids. Keyword lookups are answered locally in milliseconds without an
+embedding call, which lets rag_search fuse keyword and vector rankings and
+keep working when the embeddings provider is unavailable.
+
+The index is kept in sync by upserting whatever is added to Chroma (see
+services.ingest) and by sync_from_chroma(), which reconciles the two id
+sets at startup.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from services.bm25 import tokenize
+
+
+class KeywordIndex:
+    """FTS5-backed BM25 index of (doc_id, content, metadata) chunks"""
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                doc_id TEXT NOT NULL UNIQUE,
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+                content,
+                content='documents',
+                content_rowid='id',
+                tokenize='porter unicode61'
+            );
+            -- External-content FTS: triggers keep the inverted index in step
+            CREATE TRIGGER IF NOT EXISTS trg_documents_insert AFTER INSERT ON documents
+            BEGIN
+                INSERT INTO documents_fts (rowid, content) VALUES (NEW.id, NEW.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_documents_delete AFTER DELETE ON documents
+            BEGIN
+                INSERT INTO documents_fts (documents_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_documents_update AFTER UPDATE OF content ON documents
+            BEGIN
+                INSERT INTO documents_fts (documents_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+                INSERT INTO documents_fts (rowid, content) VALUES (NEW.id, NEW.content);
+            END;
+        """)
+        self._db.commit()
+
+    def upsert(self, items: Iterable[Tuple[str, str, Optional[Dict]]]):
+        """Insert or replace chunks given as (doc_id, content, metadata)"""
+        rows = [(doc_id, content or "", json.dumps(metadata or {})) for doc_id, content, metadata in items]
+        if not rows:
+            return
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO documents (doc_id, content, metadata) VALUES (?, ?, ?)"
+                " ON CONFLICT(doc_id) DO UPDATE SET content = excluded.content, metadata = excluded.metadata",
+                rows
+            )
+            self._db.commit()
+
+    def delete(self, doc_ids: Iterable[str]):
+        rows = [(doc_id,) for doc_id in doc_ids]
+        if not rows:
+            return
+        with self._lock:
+            self._db.executemany("DELETE FROM documents WHERE doc_id = ?", rows)
+            self._db.commit()
+
+    def ids(self) -> Set[str]:
+        with self._lock:
+            return {row[0] for row in self._db.execute("SELECT doc_id FROM documents")}
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def search(self, query: str, k: int = 5) -> List[Dict]:
+        """
+        Top-k chunks by BM25 for the query's keywords (any of them).
+
+        Returns dicts with doc_id, content, metadata and score (higher is
+        more relevant).
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # Quote every term so user text can't be read as FTS5 syntax
+        match = " OR ".join('"' + term.replace('"', '""') + '"' for term in dict.fromkeys(terms))
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT d.doc_id, d.content, d.metadata, bm25(documents_fts) AS rank"
+                " FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid"
+                " WHERE documents_fts MATCH ? ORDER BY rank LIMIT ?",
+                (match, k)
+            ).fetchall()
+        return [
+            {"doc_id": doc_id, "content": content, "metadata": json.loads(metadata), "score": -rank}
+            for doc_id, content, metadata, rank in rows
+        ]
+
+    def sync_from_chroma(self, collection, batch_size: int = 500) -> Tuple[int, int]:
+        """
+        Reconcile the index with a Chroma collection by id.
+
+        Chunks missing from the index are fetched and added, chunks no
+        longer in the collection are removed. Returns (added, removed).
+        """
+        chroma_ids: Set[str] = set()
+        offset = 0
+        while True:
+            page = collection.get(include=[], limit=batch_size, offset=offset)
+            chroma_ids.update(page["ids"])
+            if len(page["ids"]) < batch_size:
+                break
+            offset += batch_size
+
+        indexed = self.ids()
+        to_add = sorted(chroma_ids - indexed)
+        to_remove = indexed - chroma_ids
+        for start in range(0, len(to_add), batch_size):
+            batch = collection.get(ids=to_add[start:start + batch_size], include=["documents", "metadatas"])
+            self.upsert(zip(batch["ids"], batch["documents"], batch["metadatas"]))
+        self.delete(to_remove)
+        return len(to_add), len(to_remove)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,243 @@
+"""
+🤖 LLM Clients - Shared chat model clients for every agent role
+
+The planner, writer and critic used to get their own ChatOpenAI instances
+(each with its own connection pool) from two different modules. They now ask
+this registry for the client of their role:
+
+- clients are keyed by model and sampling parameters, so roles configured
+  the same way share one client
+- every client sends its requests through one pooled async HTTP client,
+  so connections to the provider are kept alive and reused
+- each client has its own concurrency limit and usage counters (requests,
+  cache hits, errors, tokens), reported by llm_client_stats()
+
+Configuration: LLM_MODEL, LLM_TEMPERATURE and LLM_MAX_TOKENS are the
+defaults, overridden per role with LLM_MODEL_<ROLE>, LLM_TEMPERATURE_<ROLE>
+and LLM_MAX_TOKENS_<ROLE>, e.g. LLM_MODEL_PLANNER=gpt-4.1-nano.
+LLM_MAX_CONCURRENCY caps the requests in flight per client.
+"""
+
+import asyncio
+import contextlib
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from services.http_clients import HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_KEEPALIVE_EXPIRY
+from services.metrics import LLM_SECONDS
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+
+LLM_ROLES = ("planner", "writer", "critic")
+
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.1"))
+LLM_MAX_TOKENS = os.getenv("LLM_MAX_TOKENS", "")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+
+
+def role_config(role: str) -> Dict:
+    """Model and sampling parameters configured for an agent role"""
+    prefix = role.upper()
+    max_tokens = os.getenv(f"LLM_MAX_TOKENS_{prefix}", LLM_MAX_TOKENS)
+    return {
+        "model": os.getenv(f"LLM_MODEL_{prefix}", LLM_MODEL),
+        "temperature": float(os.getenv(f"LLM_TEMPERATURE_{prefix}", LLM_TEMPERATURE)),
+        "max_tokens": int(max_tokens) if max_tokens else None
+    }
+
+
+class LLMClient:
+    """A shared chat model with a concurrency limit and usage counters"""
+
+    def __init__(self, chat_model, model: str, temperature: float, max_tokens: Optional[int], max_concurrency: int):
+        self.chat_model = chat_model
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.max_concurrency = max_concurrency
+        # Async calls (the API) and sync calls (executor threads) each get
+        # max_concurrency slots
+        self._async_slots = asyncio.Semaphore(max_concurrency)
+        self._sync_slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.roles: List[str] = []
+        self.requests = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    @property
+    def name(self) -> str:
+        params = f"t={self.temperature:g}"
+        if self.max_tokens:
+            params += f",max_tokens={self.max_tokens}"
+        return f"{self.model}({params})"
+
+    def _count(self, **deltas):
+        with self._lock:
+            for field, delta in deltas.items():
+                setattr(self, field, getattr(self, field) + delta)
+
+    def _record_usage(self, usage: Optional[Dict]):
+        if usage:
+            self._count(
+                input_tokens=usage.get("input_tokens", 0),
+                output_tokens=usage.get("output_tokens", 0)
+            )
+
+    def record_cache_hit(self):
+        self._count(cache_hits=1)
+
+    @contextlib.contextmanager
+    def _slot(self):
+        self._count(waiting=1)
+        self._sync_slots.acquire()
+        self._count(waiting=-1, in_flight=1, requests=1)
+        try:
+            yield
+        except Exception:
+            self._count(errors=1)
+            raise
+        finally:
+            self._count(in_flight=-1)
+            self._sync_slots.release()
+
+    @contextlib.asynccontextmanager
+    async def _slot_async(self):
+        self._count(waiting=1)
+        try:
+            await self._async_slots.acquire()
+        finally:
+            self._count(waiting=-1)
+        self._count(in_flight=1, requests=1)
+        try:
+            yield
+        except Exception:
+            self._count(errors=1)
+            raise
+        finally:
+            self._count(in_flight=-1)
+            self._async_slots.release()
+
+    def invoke(self, messages, config: dict = None):
+        with self._slot(), LLM_SECONDS.time(model=self.model, kind="invoke"):
+            response = self.chat_model.invoke(messages, config=config or {})
+        self._record_usage(getattr(response, "usage_metadata", None))
+        return response
+
+    async def ainvoke(self, messages, config: dict = None):
+        async with self._slot_async():
+            with LLM_SECONDS.time(model=self.model, kind="invoke"):
+                response = await self.chat_model.ainvoke(messages, config=config or {})
+        self._record_usage(getattr(response, "usage_metadata", None))
+        return response
+
+    async def astream(self, messages, config: dict = None):
+        """Stream response chunks, holding a slot until the stream ends"""
+        async with self._slot_async():
+            started = time.perf_counter()
+            first_token = None
+            async for chunk in self.chat_model.astream(messages, config=config or {}):
+                if first_token is None and chunk.content:
+                    first_token = time.perf_counter() - started
+                    LLM_SECONDS.observe(first_token, model=self.model, kind="first_token")
+                # Token usage arrives on the last chunk (stream_usage=True)
+                self._record_usage(getattr(chunk, "usage_metadata", None))
+                yield chunk
+            LLM_SECONDS.observe(time.perf_counter() - started, model=self.model, kind="stream")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "model": self.model,
+                "temperature": self.temperature,
+                "max_tokens": self.max_tokens,
+                "roles": list(self.roles),
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "requests": self.requests,
+                "cache_hits": self.cache_hits,
+                "errors": self.errors,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens
+            }
+
+
+_clients: Dict[Tuple[str, float, Optional[int]], LLMClient] = {}
+_clients_lock = threading.Lock()
+_callbacks: List = []
+_http_async_client = None
+
+
+def set_llm_callbacks(callbacks: List):
+    """Callbacks (e.g. Langfuse) attached to clients created from now on"""
+    _callbacks[:] = [callback for callback in callbacks if callback is not None]
+
+
+def _shared_http_async_client():
+    """One connection pool for every chat model (same provider host)"""
+    global _http_async_client
+    if _http_async_client is None and HTTPX_AVAILABLE:
+        _http_async_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=LLM_TIMEOUT
+        )
+    return _http_async_client
+
+
+def get_llm_client(role: str) -> LLMClient:
+    """The shared client for an agent role, created on first use"""
+    config = role_config(role)
+    key = (config["model"], config["temperature"], config["max_tokens"])
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            from langchain_openai import ChatOpenAI
+            chat_model = ChatOpenAI(
+                model=config["model"],
+                temperature=config["temperature"],
+                max_tokens=config["max_tokens"],
+                timeout=LLM_TIMEOUT,
+                stream_usage=True,
+                callbacks=list(_callbacks),
+                http_async_client=_shared_http_async_client()
+            )
+            client = LLMClient(chat_model, max_concurrency=LLM_MAX_CONCURRENCY, **config)
+            _clients[key] = client
+            print(f"🤖 LLM client ready: {client.name}")
+        if role not in client.roles:
+            client.roles.append(role)
+    return client
+
+
+def llm_client_stats() -> Dict[str, Dict]:
+    """Concurrency and usage counters of every shared client"""
+    with _clients_lock:
+        return {client.name: client.stats() for client in _clients.values()}
+
+
+async def close_llm_clients():
+    """Close the shared connection pool (clients are rebuilt on next use)"""
+    global _http_async_client
+    with _clients_lock:
+        _clients.clear()
+        http_client, _http_async_client = _http_async_client, None
+    if http_client is not None:
+        await http_client.aclose()
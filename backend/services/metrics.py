@@ -0,0 +1,162 @@
+"""
+📈 Metrics - In-process latency histograms and scrape-time collectors
+
+Timing spans around the hot path (planner, each search backend call,
+dedup, context packing, writer, critic, WebSocket fan-out) feed
+fixed-bucket latency histograms. A span costs two clock reads and a few
+integer increments.
+
+Counters that other services already keep (cache hits, LLM tokens, queue
+depth, WebSocket queues, ...) are not duplicated here: collectors read them
+only when /metrics is scraped.
+
+render() produces the Prometheus text exposition format (version 0.0.4).
+"""
+
+import bisect
+import contextlib
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Seconds; covers cache hits (ms) up to slow LLM generations (minutes)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# (labels, value) pairs of one metric, as returned by collectors
+Samples = Iterable[Tuple[Dict[str, str], float]]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{name}="' + str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') + '"'
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Thread-safe latency histogram with fixed buckets"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block (also when it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for key, counts, total, count in sorted(series):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+def _render_family(name: str, kind: str, help: str, samples: Samples) -> List[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return lines
+
+
+_metrics: Dict[str, Histogram] = {}
+_collectors: List[Callable[[], Iterable[Tuple[str, str, str, Samples]]]] = []
+_registry_lock = threading.Lock()
+
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    """The histogram registered under name, created on first use"""
+    with _registry_lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = Histogram(name, help, labelnames, buckets)
+        return metric
+
+
+def register_collector(collector: Callable[[], Iterable[Tuple[str, str, str, Samples]]]):
+    """
+    Add a scrape-time collector.
+
+    The collector returns (name, type, help, samples) families, type being
+    "counter" or "gauge", and is only called when /metrics is scraped.
+    """
+    with _registry_lock:
+        _collectors.append(collector)
+
+
+def render() -> str:
+    """Every metric in the Prometheus text format"""
+    with _registry_lock:
+        metrics = [_metrics[name] for name in sorted(_metrics)]
+        collectors = list(_collectors)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    for collector in collectors:
+        try:
+            for name, kind, help, samples in collector():
+                lines.extend(_render_family(name, kind, help, samples))
+        except Exception as e:
+            print(f"⚠️  Metrics collector failed: {e}")
+    return "\n".join(lines) + "\n"
+
+
+# Hot-path spans shared by the services
+STAGE_SECONDS = histogram(
+    "research_stage_seconds",
+    "Duration of research pipeline stages",
+    ["stage"]
+)
+SEARCH_SECONDS = histogram(
+    "search_backend_seconds",
+    "Duration of one search call per backend and outcome",
+    ["backend", "outcome"]
+)
+LLM_SECONDS = histogram(
+    "llm_request_seconds",
+    "Duration of LLM requests (full stream for streamed calls)",
+    ["model", "kind"]
+)
+WEBSOCKET_FANOUT_SECONDS = histogram(
+    "websocket_fanout_seconds",
+    "Time to queue one update for every local WebSocket client",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
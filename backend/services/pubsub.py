@@ -0,0 +1,181 @@
+"""
+📣 Pub/Sub - Fan out WebSocket updates across uvicorn workers
+
+A client connected to worker A must see updates for a research running on
+worker B. WebSocketManager publishes every update through a PubSubBackend
+and delivers what it receives to its own local connections.
+
+Backends:
+- InProcessPubSub (default): single worker, delivers directly
+- UnixSocketPubSub: every worker binds a Unix datagram socket in a shared
+  directory and sends each update to all the others (no broker process)
+"""
+
+import asyncio
+import os
+import socket
+import time
+from typing import Awaitable, Callable, Optional
+
+
+# handler(research_id, seq, text); research_id is None for broadcasts
+Handler = Callable[[Optional[str], int, str], Awaitable[None]]
+
+
+class PubSubBackend:
+    """Interface for update fan-out backends"""
+
+    def __init__(self):
+        self.handler: Optional[Handler] = None
+
+    async def start(self, handler: Handler):
+        """Begin delivering published and received updates to handler"""
+        self.handler = handler
+
+    async def publish(self, research_id: Optional[str], seq: int, text: str):
+        """Deliver an update to this worker and to every other worker"""
+        raise NotImplementedError
+
+    async def stop(self):
+        pass
+
+
+class InProcessPubSub(PubSubBackend):
+    """Single-process backend: publishing is direct delivery"""
+
+    async def publish(self, research_id: Optional[str], seq: int, text: str):
+        if self.handler is not None:
+            await self.handler(research_id, seq, text)
+
+
+def _encode(research_id: Optional[str], seq: int, text: str) -> bytes:
+    return f"{research_id or ''}\n{seq}\n{text}".encode("utf-8")
+
+
+def _decode(data: bytes):
+    research_id, seq, text = data.decode("utf-8").split("\n", 2)
+    return research_id or None, int(seq), text
+
+
+class UnixSocketPubSub(PubSubBackend):
+    """
+    Multi-worker backend over Unix datagram sockets.
+
+    Each worker binds <directory>/<pid>.sock and sends every update to the
+    other sockets found in the directory. Datagrams are never blocked on:
+    if a peer's receive buffer is full the update is dropped for that peer,
+    and its clients recover through the usual seq gap → resync path.
+    """
+
+    # Linux default socket buffers keep datagrams up to ~200 KB deliverable
+    MAX_DATAGRAM = 200_000
+
+    def __init__(self, directory: str, peer_refresh_interval: float = 2.0):
+        super().__init__()
+        self.directory = directory
+        self.peer_refresh_interval = peer_refresh_interval
+        self.path = os.path.join(directory, f"{os.getpid()}.sock")
+        self._sock: Optional[socket.socket] = None
+        self._peers = []
+        self._peers_refreshed = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Deliveries of received updates still running (the loop only keeps
+        # weak references to tasks)
+        self._deliveries = set()
+
+    async def start(self, handler: Handler):
+        await super().start(handler)
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.path)
+        self._sock.setblocking(False)
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self._sock.fileno(), self._on_readable)
+        print(f"✅ WebSocket pub/sub listening on {self.path}")
+
+    def _on_readable(self):
+        while True:
+            try:
+                data = self._sock.recv(self.MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                print(f"⚠️ Pub/sub receive error: {e}")
+                return
+            try:
+                research_id, seq, text = _decode(data)
+            except ValueError:
+                continue
+            task = self._loop.create_task(self.handler(research_id, seq, text))
+            self._deliveries.add(task)
+            task.add_done_callback(self._delivered)
+
+    def _delivered(self, task: asyncio.Task):
+        self._deliveries.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"⚠️ Pub/sub delivery failed: {task.exception()}")
+
+    def _refresh_peers(self):
+        now = time.monotonic()
+        if now - self._peers_refreshed < self.peer_refresh_interval:
+            return
+        self._peers_refreshed = now
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            names = []
+        self._peers = [
+            os.path.join(self.directory, name)
+            for name in names
+            if name.endswith(".sock") and os.path.join(self.directory, name) != self.path
+        ]
+
+    async def publish(self, research_id: Optional[str], seq: int, text: str):
+        # Local clients first: they do not depend on the socket round trip
+        if self.handler is not None:
+            await self.handler(research_id, seq, text)
+        if self._sock is None:
+            return
+
+        data = _encode(research_id, seq, text)
+        if len(data) > self.MAX_DATAGRAM:
+            print(f"⚠️ Pub/sub update too large to forward ({len(data)} bytes), other workers will resync")
+            return
+
+        self._refresh_peers()
+        for peer in self._peers[:]:
+            try:
+                self._sock.sendto(data, peer)
+            except (BlockingIOError, InterruptedError):
+                pass  # Peer is backed up; its clients resync on the seq gap
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker is gone: remove its stale socket
+                self._peers.remove(peer)
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+            except OSError as e:
+                print(f"⚠️ Pub/sub send error to {peer}: {e}")
+
+    async def stop(self):
+        if self._sock is not None:
+            self._loop.remove_reader(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+def create_pubsub() -> PubSubBackend:
+    """Build the backend selected by WS_PUBSUB (inprocess or unix)"""
+    backend = os.getenv("WS_PUBSUB", "inprocess").lower()
+    if backend == "inprocess":
+        return InProcessPubSub()
+    if backend == "unix":
+        return UnixSocketPubSub(os.getenv("WS_PUBSUB_DIR", "/tmp/research-ws-pubsub"))
+    raise ValueError(f"Unknown WS_PUBSUB backend: {backend}")
@@ -0,0 +1,148 @@
+"""
+🪣 Rate Limits - Token buckets for outbound providers
+
+Every call to an external provider (OpenAI chat, OpenAI embeddings,
+DuckDuckGo, Wikipedia) takes a token from that provider's bucket first.
+Buckets refill continuously at `rate` tokens per second up to `burst`, so
+callers run at full speed while under quota and are spaced out evenly once
+they reach it, instead of sleeping a fixed amount or hitting 429s.
+
+Waits are reservations: a caller takes its token immediately (the bucket
+may go negative) and sleeps until it would have been available, so
+concurrent callers are served in arrival order from both threads and
+coroutines.
+
+Configuration per provider: RATE_LIMIT_<PROVIDER>=rate[:burst], e.g.
+RATE_LIMIT_DUCKDUCKGO=1:2. A rate of 0 disables the limit.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+# provider -> (requests per second, burst)
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    "openai_chat": (8.0, 8.0),
+    "openai_embeddings": (50.0, 50.0),
+    "duckduckgo": (1.0, 2.0),
+    "wikipedia": (10.0, 10.0)
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket usable from sync and async code"""
+
+    def __init__(self, name: str, rate: float, burst: Optional[float] = None):
+        """
+        Args:
+            name: Provider name (for stats and logs)
+            rate: Tokens added per second; 0 means unlimited
+            burst: Bucket capacity (defaults to max(rate, 1))
+        """
+        self.name = name
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+
+    def _reserve(self, tokens: float, timeout: Optional[float]) -> Optional[float]:
+        """Take tokens and return how long to wait for them, or None if over timeout"""
+        if self.rate <= 0:
+            with self._lock:
+                self.acquired += 1
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (tokens - self._tokens) / self.rate)
+            if timeout is not None and wait > timeout:
+                self.rejected += 1
+                return None
+            self._tokens -= tokens
+            self.acquired += 1
+            if wait > 0:
+                self.throttled += 1
+                self.total_wait += wait
+            return wait
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Block until tokens are available.
+
+        Returns False (without taking anything) if that would take longer
+        than timeout seconds.
+        """
+        wait = self._reserve(tokens, timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def acquire_async(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Async variant of acquire: sleeps without blocking the event loop"""
+        wait = self._reserve(tokens, timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def pause(self, seconds: float):
+        """Empty the bucket for `seconds` (e.g. after the provider answered 429)"""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._tokens = min(self._tokens, -seconds * self.rate)
+            self._updated = time.monotonic()
+        print(f"⚠️ Rate limited by {self.name}, pausing for {seconds:g}s")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "acquired": self.acquired,
+                "throttled": self.throttled,
+                "rejected": self.rejected,
+                "total_wait_seconds": round(self.total_wait, 3)
+            }
+
+
+def _parse_limit(value: str) -> Tuple[float, float]:
+    rate, _, burst = value.partition(":")
+    rate = float(rate)
+    return rate, float(burst) if burst else max(rate, 1.0)
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str) -> TokenBucket:
+    """Shared bucket for a provider, configured from RATE_LIMIT_<PROVIDER>"""
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            env_value = os.getenv(f"RATE_LIMIT_{provider.upper()}")
+            if env_value:
+                rate, burst = _parse_limit(env_value)
+            else:
+                rate, burst = DEFAULT_LIMITS.get(provider, (0.0, 1.0))
+            limiter = TokenBucket(provider, rate, burst)
+            _limiters[provider] = limiter
+        return limiter
+
+
+def rate_limit_stats() -> Dict[str, Dict]:
+    with _limiters_lock:
+        return {name: limiter.stats() for name, limiter in _limiters.items()}
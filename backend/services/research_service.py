@@ -6,8 +6,11 @@ async methods for the API to use.
 """
 
 import asyncio
+import copy
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
 from datetime import datetime
+import functools
 import sys
 import os
 
@@ -15,33 +18,53 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 # Import real agents
-from services.agents_integration import execute_research, is_agents_available, get_langfuse_handler, is_langfuse_available
+from services.agents_integration import execute_research, cached_ainvoke, cached_astream, ensure_agents_async, run_blocking
+from services.llm_clients import get_llm_client, close_llm_clients
+from services.streaming import DeltaCoalescer
+from services.research_store import ResearchStore, create_research_store
+from services.deltas import DeltaTracker
+from services.scheduler import ResearchScheduler
+from services.context_packer import pack_context, WRITER_CONTEXT_TOKENS
+from services.http_clients import open_http_clients, close_http_clients
+from services.metrics import STAGE_SECONDS
 
-# Import for Writer and Critic agents
-try:
-    from langchain_openai import ChatOpenAI
-    from langchain_core.messages import SystemMessage
-    
-    # Initialize LLM with Langfuse if available
-    langfuse_handler = get_langfuse_handler()
-    callbacks = [langfuse_handler] if langfuse_handler else []
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.1, callbacks=callbacks)
-    LLM_AVAILABLE = True
-    
-    if is_langfuse_available():
-        print("✅ Writer/Critic agents with Langfuse monitoring enabled")
-    else:
-        print("⚠️ Writer/Critic agents without Langfuse monitoring")
-except Exception as e:
-    LLM_AVAILABLE = False
-    print(f"⚠️ LLM not available for Writer/Critic agents: {e}")
+
+# Streamed briefing tokens are sent in batches of this many characters, or
+# after this many seconds, whichever comes first
+STREAM_MIN_CHARS = int(os.getenv("STREAM_MIN_CHARS", "80"))
+STREAM_MAX_INTERVAL = float(os.getenv("STREAM_MAX_INTERVAL", "0.15"))
+
+# Admission control: research jobs running at once, jobs allowed to wait, and
+# the priority given to post-approval (writer/critic) jobs so researches the
+# user already invested in are not starved by new ones
+RESEARCH_MAX_CONCURRENT = int(os.getenv("RESEARCH_MAX_CONCURRENT", "4"))
+RESEARCH_MAX_QUEUE = int(os.getenv("RESEARCH_MAX_QUEUE", "50"))
+APPROVAL_PRIORITY = int(os.getenv("APPROVAL_PRIORITY", "10"))
+
+# Store I/O runs on one dedicated thread: the event loop never waits on the
+# SQLite write lock, and writes reach the store in the order they were made
+store_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="research-store")
 
 
 class ResearchService:
     """Service for managing research workflows"""
     
-    def __init__(self):
+    def __init__(self, store: Optional[ResearchStore] = None):
+        # In-flight researches only; every change is written through to the
+        # store, and researches waiting for approval or finished are evicted
+        # from memory
         self.active_researches: Dict[str, Dict[str, Any]] = {}
+        self.store: Optional[ResearchStore] = store or create_research_store()
+        # Last state sent to WebSocket clients, to send only what changed
+        self.deltas = DeltaTracker()
+        # Bounded execution of research jobs (see services.scheduler)
+        self.scheduler = ResearchScheduler(
+            max_concurrent=RESEARCH_MAX_CONCURRENT,
+            max_queue=RESEARCH_MAX_QUEUE,
+            on_queue_change=self._on_queue_change
+        )
+        self._websocket_manager = None
+        self._background_tasks = set()
         self.initialized = False
         
     async def initialize(self):
@@ -50,6 +73,12 @@ class ResearchService:
             return
             
         try:
+            if self.store is None:
+                self.store = create_research_store()
+            
+            # Pooled keep-alive connections shared by the search tools
+            open_http_clients()
+
             # TODO: Import and initialize the multi-agent system from notebook
             # For now, we'll use mock data
             print("📊 Initializing multi-agent system...")
@@ -59,17 +88,53 @@ class ResearchService:
             print(f"❌ Error initializing: {e}")
             raise
     
-    async def start_research(
+    async def submit_research(
         self,
         research_id: str,
         query: str,
         max_sources: int,
-        websocket_manager
-    ):
-        """Start a new research workflow"""
+        websocket_manager,
+        bypass_cache: bool = False,
+        priority: int = 0
+    ) -> int:
+        """
+        Schedule a new research workflow
+        
+        Returns:
+            0 if it started right away, otherwise its position in the queue
+        
+        Raises:
+            QueueFullError: if the research queue is at capacity
+        """
+        self._websocket_manager = websocket_manager
+        position = self.scheduler.submit(
+            research_id,
+            lambda: self.start_research(research_id, query, max_sources, websocket_manager, bypass_cache),
+            priority=priority
+        )
         
-        # Initialize research state
-        self.active_researches[research_id] = {
+        # The job cannot run before we yield, so the record exists before it starts
+        self.active_researches[research_id] = self._new_research(research_id, query, bypass_cache)
+        if position > 0:
+            research = self.active_researches[research_id]
+            research["status"] = "queued"
+            research["current_step"] = "queued"
+            research["progress"]["planner"]["status"] = "pending"
+            research["queue_position"] = position
+        await self._save(research_id)
+        
+        if position > 0:
+            await websocket_manager.send_update(research_id, {
+                "type": "queued",
+                "step": "queued",
+                "message": f"⏳ Waiting for a free slot (position {position} in queue)...",
+                "changes": await self._changes(research_id)
+            })
+        return position
+    
+    def _new_research(self, research_id: str, query: str, bypass_cache: bool) -> Dict[str, Any]:
+        """Initial state of a research"""
+        return {
             "id": research_id,
             "query": query,
             "status": "running",
@@ -83,38 +148,75 @@ class ResearchService:
                 "critic": {"status": "pending", "progress": 0}
             },
             "sources": [],
-            "briefing": None
+            "briefing": None,
+            "bypass_cache": bypass_cache
         }
+    
+    async def start_research(
+        self,
+        research_id: str,
+        query: str,
+        max_sources: int,
+        websocket_manager,
+        bypass_cache: bool = False
+    ):
+        """Start a new research workflow"""
+        try:
+            await self._run_research(research_id, query, max_sources, websocket_manager, bypass_cache)
+        except asyncio.CancelledError:
+            await self._mark_cancelled(research_id, websocket_manager)
+            raise
+    
+    async def _run_research(
+        self,
+        research_id: str,
+        query: str,
+        max_sources: int,
+        websocket_manager,
+        bypass_cache: bool
+    ):
+        """Planner and retrieval steps, up to the human approval interrupt"""
+        
+        # Initialize research state (keeping started_at if it was queued)
+        research = self._new_research(research_id, query, bypass_cache)
+        if research_id in self.active_researches:
+            research["started_at"] = self.active_researches[research_id]["started_at"]
+        self.active_researches[research_id] = research
+        await self._save(research_id)
         
         # Send initial status
         await websocket_manager.send_update(research_id, {
             "type": "status_update",
             "step": "planner",
             "message": "🎯 Planner Agent: Analyzing your request...",
-            "progress": self.active_researches[research_id]
+            "changes": await self._changes(research_id)
         })
         
-        # Simulate workflow (replace with actual multi-agent calls)
-        await asyncio.sleep(2)
-        
-        # Planner complete
-        self.active_researches[research_id]["progress"]["planner"] = {
-            "status": "completed",
-            "progress": 100
-        }
-        self.active_researches[research_id]["current_step"] = "retrieval"
-        
-        await websocket_manager.send_update(research_id, {
-            "type": "status_update",
-            "step": "retrieval",
-            "message": "🔍 Retrieval Agent: Searching for sources...",
-            "progress": self.active_researches[research_id]
-        })
+        # Retrieval starts during planning; the planner step completes as
+        # soon as the plan is ready
+        async def on_plan(plan: dict):
+            self.active_researches[research_id]["progress"]["planner"] = {
+                "status": "completed",
+                "progress": 100
+            }
+            self.active_researches[research_id]["progress"]["retrieval"] = {
+                "status": "running",
+                "progress": 0
+            }
+            self.active_researches[research_id]["current_step"] = "retrieval"
+            await self._save(research_id)
+            
+            await websocket_manager.send_update(research_id, {
+                "type": "status_update",
+                "step": "retrieval",
+                "message": "🔍 Retrieval Agent: Searching for sources...",
+                "changes": await self._changes(research_id)
+            })
         
         # Use REAL agents to search
         try:
             print("🤖 Using REAL multi-agent system...")
-            research_results = await execute_research(query)
+            research_results = await execute_research(query, bypass_cache=bypass_cache, on_plan=on_plan)
             
             # Format sources with IDs
             real_sources = []
@@ -138,12 +240,17 @@ class ResearchService:
                 }
             ]
             self.active_researches[research_id]["sources"] = mock_sources
+        self.active_researches[research_id]["progress"]["planner"] = {
+            "status": "completed",
+            "progress": 100
+        }
         self.active_researches[research_id]["progress"]["retrieval"] = {
             "status": "completed",
             "progress": 100
         }
         self.active_researches[research_id]["current_step"] = "human_approval"
         self.active_researches[research_id]["status"] = "waiting_approval"
+        await self._save(research_id)
         
         # Get the actual sources that were found
         found_sources = self.active_researches[research_id]["sources"]
@@ -152,9 +259,52 @@ class ResearchService:
             "type": "sources_ready",
             "step": "human_approval",
             "message": f"👤 Found {len(found_sources)} sources! Waiting for your approval...",
-            "sources": found_sources,  # Send the REAL sources, not mock_sources
-            "progress": self.active_researches[research_id]
+            "changes": await self._changes(research_id)
         })
+        # Nothing happens until the user approves (possibly much later, or
+        # never): the research lives in the store only until then
+        self.active_researches.pop(research_id, None)
+        self.deltas.forget(research_id)
+    
+    async def submit_approval(
+        self,
+        research_id: str,
+        approved_ids: List[int],
+        websocket_manager
+    ) -> int:
+        """
+        Schedule the writer and critic steps after source approval
+        
+        Returns:
+            0 if they started right away, otherwise the position in the queue
+        
+        Raises:
+            ValueError: if the research is unknown or not waiting for approval
+            QueueFullError: if the research queue is at capacity
+        """
+        research = await self._load(research_id)
+        if research is None:
+            raise ValueError("Research not found")
+        if research["status"] != "waiting_approval" or self.scheduler.is_scheduled(research_id):
+            raise ValueError(f"Research is not waiting for approval (status: {research['status']})")
+        
+        self._websocket_manager = websocket_manager
+        position = self.scheduler.submit(
+            research_id,
+            lambda: self.approve_sources(research_id, approved_ids, websocket_manager),
+            priority=APPROVAL_PRIORITY
+        )
+        if position > 0:
+            self.active_researches[research_id] = research
+            research["queue_position"] = position
+            await self._save(research_id)
+            await websocket_manager.send_update(research_id, {
+                "type": "queued",
+                "step": "human_approval",
+                "message": f"⏳ Sources approved, waiting for a free slot (position {position} in queue)...",
+                "changes": await self._changes(research_id)
+            })
+        return position
     
     async def approve_sources(
         self,
@@ -163,11 +313,26 @@ class ResearchService:
         websocket_manager
     ):
         """Continue research after source approval"""
+        try:
+            return await self._run_approval(research_id, approved_ids, websocket_manager)
+        except asyncio.CancelledError:
+            await self._mark_cancelled(research_id, websocket_manager)
+            raise
+    
+    async def _run_approval(
+        self,
+        research_id: str,
+        approved_ids: List[int],
+        websocket_manager
+    ):
+        """Writer and critic steps"""
         
-        if research_id not in self.active_researches:
+        # The research may have been started by another worker or before a restart
+        research = await self._load(research_id)
+        if research is None:
             raise ValueError("Research not found")
-        
-        research = self.active_researches[research_id]
+        self.active_researches[research_id] = research
+        research.pop("queue_position", None)
         
         # Filter approved sources
         approved_sources = [
@@ -179,31 +344,60 @@ class ResearchService:
         research["status"] = "running"
         research["current_step"] = "writer"
         research["progress"]["human_approval"] = {"status": "completed", "progress": 100}
+        await self._save(research_id)
         
         await websocket_manager.send_update(research_id, {
             "type": "status_update",
             "step": "writer",
             "message": f"✍️ Writer Agent: Creating briefing from {len(approved_sources)} sources...",
-            "progress": research
+            "changes": await self._changes(research_id)
         })
         
         # REAL Writer Agent - Generate briefing with GPT
         print(f"✍️ Writer Agent: Generating briefing from {len(approved_sources)} sources...")
-        draft_briefing = await self._generate_briefing(research["query"], approved_sources)
+        bypass_cache = research.get("bypass_cache", False)
+        writer_stream = self._briefing_stream(research_id, "writer", websocket_manager)
+        llm = await self._llm_client("writer")
+        # Most relevant passages of the approved sources within the token
+        # budget; tokenizing every passage is CPU work, kept off the event loop
+        with STAGE_SECONDS.time(stage="context_pack"):
+            sources_text, context_stats = await run_blocking(
+                pack_context,
+                research["query"], approved_sources,
+                budget_tokens=WRITER_CONTEXT_TOKENS,
+                model=getattr(llm, "model", "gpt-4o-mini")
+            )
+        print(
+            f"📦 Writer context: {context_stats['passages']}/{context_stats['passages_total']} passages "
+            f"from {context_stats['sources']} sources, {context_stats['tokens']}/{context_stats['budget_tokens']} tokens"
+        )
+        with STAGE_SECONDS.time(stage="writer"):
+            draft_briefing = await self._generate_briefing(
+                research["query"], sources_text,
+                bypass_cache=bypass_cache, on_delta=writer_stream.push
+            )
+            await writer_stream.flush()
         
         research["progress"]["writer"] = {"status": "completed", "progress": 100}
         research["current_step"] = "critic"
+        await self._save(research_id)
         
         await websocket_manager.send_update(research_id, {
             "type": "status_update",
             "step": "critic",
             "message": "🔍 Critic Agent: Reviewing and improving briefing...",
-            "progress": research
+            "changes": await self._changes(research_id)
         })
         
         # REAL Critic Agent - Improve the briefing
         print("🔍 Critic Agent: Reviewing and improving...")
-        final_briefing = await self._improve_briefing(research["query"], draft_briefing)
+        critic_stream = self._briefing_stream(research_id, "critic", websocket_manager)
+        with STAGE_SECONDS.time(stage="critic"):
+            final_briefing = await self._improve_briefing(
+                research["query"], draft_briefing,
+                bypass_cache=bypass_cache, on_delta=critic_stream.push
+            )
+            await critic_stream.flush()
         
         research["progress"]["critic"] = {"status": "completed", "progress": 100}
         research["status"] = "completed"
@@ -211,60 +405,196 @@ class ResearchService:
         research["briefing"] = {
             "content": final_briefing,
             "metadata": {
-                "sources_used": len(approved_sources),
+                "sources_used": context_stats["sources"],
                 "generated_at": datetime.now().isoformat(),
                 "word_count": len(final_briefing.split()),
-                "citations": len(approved_sources)
+                "citations": context_stats["sources"],
+                "context": context_stats
             }
         }
         research["completed_at"] = datetime.now().isoformat()
+        await self._save(research_id)
+        # Sources and briefing now live in the store only
+        self.active_researches.pop(research_id, None)
         
         await websocket_manager.send_update(research_id, {
             "type": "completed",
             "step": "completed",
             "message": "✅ Research completed successfully!",
-            "briefing": research["briefing"],
-            "progress": research
+            "changes": await self._changes(research_id)
         })
+        self.deltas.forget(research_id)
         
         return research["briefing"]
     
-    def get_status(self, research_id: str) -> Optional[Dict]:
+    async def _changes(self, research_id: str) -> Dict:
+        """Merge patch of the research state since the previous WebSocket update"""
+        return self.deltas.diff(research_id, await self._load(research_id))
+    
+    def _briefing_stream(self, research_id: str, step: str, websocket_manager) -> DeltaCoalescer:
+        """Forward streamed briefing tokens as batched briefing_delta messages"""
+        async def send(text: str, offset: int):
+            await websocket_manager.send_update(research_id, {
+                "type": "briefing_delta",
+                "step": step,
+                "delta": text,
+                "offset": offset  # 0 marks the start of a new draft for this step
+            })
+        
+        return DeltaCoalescer(
+            send,
+            min_chars=STREAM_MIN_CHARS,
+            max_interval=STREAM_MAX_INTERVAL
+        )
+    
+    async def cancel_research(self, research_id: str, websocket_manager) -> Optional[str]:
+        """
+        Cancel a queued or running research
+        
+        Returns:
+            What was cancelled ("queued", "running" or "waiting_approval"),
+            or None if the research is unknown or already finished
+        
+        Raises:
+            ValueError: if the research is queued or running on another worker
+        """
+        cancelled = self.scheduler.cancel(research_id)
+        if cancelled == "queued":
+            await self._mark_cancelled(research_id, websocket_manager)
+        elif cancelled is None:
+            # Not scheduled here: only a research waiting for approval can still be cancelled
+            research = await self._load(research_id)
+            if research is None or research["status"] not in ("queued", "running", "waiting_approval"):
+                return None
+            if research["status"] != "waiting_approval":
+                # Only the worker whose scheduler holds the job can cancel it
+                raise ValueError(f"Research is {research['status']} on another worker")
+            self.active_researches[research_id] = research
+            await self._mark_cancelled(research_id, websocket_manager)
+            cancelled = "waiting_approval"
+        # A running job is marked cancelled by its own CancelledError handler
+        return cancelled
+    
+    async def _mark_cancelled(self, research_id: str, websocket_manager):
+        """Record a research as cancelled and notify its clients"""
+        research = await self._load(research_id)
+        if research is None:
+            return
+        self.active_researches[research_id] = research
+        research["status"] = "cancelled"
+        research["current_step"] = "cancelled"
+        research["cancelled_at"] = datetime.now().isoformat()
+        research.pop("queue_position", None)
+        await self._save(research_id)
+        self.active_researches.pop(research_id, None)
+        
+        await websocket_manager.send_update(research_id, {
+            "type": "cancelled",
+            "step": "cancelled",
+            "message": "🛑 Research cancelled",
+            "changes": await self._changes(research_id)
+        })
+        self.deltas.forget(research_id)
+    
+    def _on_queue_change(self):
+        """Tell queued researches about their new queue position"""
+        if self._websocket_manager is None:
+            return
+        for position, research_id in enumerate(self.scheduler.queued_ids(), start=1):
+            research = self.active_researches.get(research_id)
+            if research is None or research.get("queue_position") == position:
+                continue
+            research["queue_position"] = position
+            task = asyncio.get_running_loop().create_task(
+                self._send_queue_position(research_id, research["current_step"], position)
+            )
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+    
+    async def _send_queue_position(self, research_id: str, step: str, position: int):
+        await self._save(research_id)
+        await self._websocket_manager.send_update(research_id, {
+            "type": "queued",
+            "step": step,
+            "message": f"⏳ Waiting for a free slot (position {position} in queue)...",
+            "changes": await self._changes(research_id)
+        })
+    
+    async def _store_call(self, func, *args, **kwargs):
+        """Run a blocking store method on the store thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(store_executor, functools.partial(func, *args, **kwargs))
+    
+    async def _save(self, research_id: str):
+        """Write the in-memory state of a research through to the store"""
+        research = self.active_researches.get(research_id)
+        if research is None:
+            return  # Evicted (finished) while the save was pending
+        # Detached copy: the research keeps changing while the write is pending
+        await self._store_call(self.store.save, copy.deepcopy(research))
+    
+    async def _load(self, research_id: str) -> Optional[Dict]:
+        """Return a research from memory if in flight, otherwise from the store"""
+        research = self.active_researches.get(research_id)
+        if research is not None:
+            return research
+        return await self._store_call(self.store.get, research_id)
+    
+    async def get_status(self, research_id: str) -> Optional[Dict]:
         """Get current status of a research"""
-        return self.active_researches.get(research_id)
+        return await self._load(research_id)
+    
+    async def get_snapshot(self, research_id: str) -> Optional[Dict]:
+        """Full research state sent to a WebSocket client on connect or resync"""
+        return await self._load(research_id)
     
-    def get_briefing(self, research_id: str) -> Optional[Dict]:
+    async def get_briefing(self, research_id: str) -> Optional[Dict]:
         """Get final briefing"""
-        research = self.active_researches.get(research_id)
+        research = await self._load(research_id)
         if research and research.get("briefing"):
             return research["briefing"]
         return None
     
-    def list_all(self) -> List[Dict]:
-        """List all researches"""
-        return [
-            {
-                "id": r["id"],
-                "query": r["query"],
-                "status": r["status"],
-                "started_at": r["started_at"],
-                "completed_at": r.get("completed_at")
-            }
-            for r in self.active_researches.values()
-        ]
+    async def list_all(
+        self,
+        statuses: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        order: str = "desc",
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Dict:
+        """List researches one page at a time, with per-status totals"""
+        page = await self._store_call(
+            self.store.list_page,
+            statuses=statuses,
+            since=since,
+            until=until,
+            order=order,
+            cursor=cursor,
+            limit=limit
+        )
+        page["counts"] = await self._store_call(self.store.count_by_status)
+        return page
     
-    async def _generate_briefing(self, query: str, sources: List[dict]) -> str:
-        """Generate briefing using Writer Agent (GPT)"""
-        if not LLM_AVAILABLE:
+    async def _llm_client(self, role: str):
+        """Shared LLM client for an agent role, or None if the LLM is not available"""
+        if not await ensure_agents_async():
+            return None
+        return get_llm_client(role)
+    
+    async def _generate_briefing(
+        self,
+        query: str,
+        sources_text: str,
+        bypass_cache: bool = False,
+        on_delta=None
+    ) -> str:
+        """Generate briefing using Writer Agent (GPT) from packed sources text"""
+        llm = await self._llm_client("writer")
+        if llm is None:
             return "LLM not available. Cannot generate briefing."
         
-        # Prepare sources text
-        sources_text = ""
-        for i, source in enumerate(sources):
-            sources_text += f"\n[{i+1}] {source['type'].upper()}: {source.get('title', 'No title')}\n"
-            sources_text += f"Source: {source.get('source', 'Unknown')}\n"
-            sources_text += f"Content: {source['content'][:500]}...\n"
-        
         # Writer prompt
         prompt = f"""You are a professional research writer. Create a comprehensive briefing based on the provided sources.
 
@@ -296,21 +626,28 @@ STRUCTURE:
 Write the complete briefing now:"""
         
         try:
-            # Add Langfuse metadata
-            config = {}
-            if is_langfuse_available():
-                config["callbacks"] = [get_langfuse_handler()]
-                config["metadata"] = {"step": "writer", "query": query}
+            # Langfuse metadata (the client carries the Langfuse callback)
+            config = {"metadata": {"step": "writer", "query": query}}
             
-            response = llm.invoke([SystemMessage(content=prompt)], config=config)
-            return response.content
+            from langchain_core.messages import SystemMessage
+            messages = [SystemMessage(content=prompt)]
+            if on_delta is not None:
+                return await cached_astream(llm, messages, on_delta, config=config, bypass_cache=bypass_cache)
+            return await cached_ainvoke(llm, messages, config=config, bypass_cache=bypass_cache)
         except Exception as e:
             print(f"❌ Error generating briefing: {e}")
             return f"Error generating briefing: {str(e)}"
     
-    async def _improve_briefing(self, query: str, draft: str) -> str:
+    async def _improve_briefing(
+        self,
+        query: str,
+        draft: str,
+        bypass_cache: bool = False,
+        on_delta=None
+    ) -> str:
         """Improve briefing using Critic Agent (GPT)"""
-        if not LLM_AVAILABLE:
+        llm = await self._llm_client("critic")
+        if llm is None:
             return draft
         
         prompt = f"""You are a senior editor reviewing a research briefing. Analyze the draft and improve it.
@@ -330,20 +667,28 @@ REVIEW CRITERIA:
 Provide the IMPROVED VERSION of the briefing (not just comments):"""
         
         try:
-            # Add Langfuse metadata
-            config = {}
-            if is_langfuse_available():
-                config["callbacks"] = [get_langfuse_handler()]
-                config["metadata"] = {"step": "critic", "query": query}
+            # Langfuse metadata (the client carries the Langfuse callback)
+            config = {"metadata": {"step": "critic", "query": query}}
             
-            response = llm.invoke([SystemMessage(content=prompt)], config=config)
-            return response.content
+            from langchain_core.messages import SystemMessage
+            messages = [SystemMessage(content=prompt)]
+            if on_delta is not None:
+                return await cached_astream(llm, messages, on_delta, config=config, bypass_cache=bypass_cache)
+            return await cached_ainvoke(llm, messages, config=config, bypass_cache=bypass_cache)
         except Exception as e:
             print(f"❌ Error improving briefing: {e}")
             return draft  # Return draft if improvement fails
     
     async def cleanup(self):
         """Cleanup resources"""
+        # Persist whatever is still in flight before dropping it from memory
+        for research_id in list(self.active_researches):
+            await self._save(research_id)
         self.active_researches.clear()
+        if self.store is not None:
+            await self._store_call(self.store.close)
+            self.store = None
+        close_http_clients()
+        await close_llm_clients()
         self.initialized = False
 
@@ -0,0 +1,314 @@
+"""
+💾 Research Store - Durable storage for research state
+
+ResearchService keeps only in-flight researches in memory and writes every
+state change through to a ResearchStore. Researches waiting for source
+approval and finished ones (sources and briefings included) live in the
+store only, so memory stays flat over long uptimes and several uvicorn
+workers can share the same history.
+
+Backends:
+- SQLiteResearchStore (default): indexed SQLite database in WAL mode
+- InMemoryResearchStore: process-local dict, for development and tests
+"""
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def encode_cursor(started_at: str, research_id: str) -> str:
+    """Opaque pagination cursor pointing at the last item of a page"""
+    raw = json.dumps([started_at, research_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        started_at, research_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(started_at), str(research_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class ResearchStore:
+    """Interface for research storage backends"""
+
+    def save(self, research: Dict):
+        """Insert or update a research (keyed by research["id"])"""
+        raise NotImplementedError
+
+    def get(self, research_id: str) -> Optional[Dict]:
+        """Return the full research dict, or None if unknown"""
+        raise NotImplementedError
+
+    def list_page(
+        self,
+        statuses: Optional[Sequence[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        order: str = "desc",
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Dict:
+        """
+        Return one page of research summaries.
+
+        Args:
+            statuses: Only include researches in one of these statuses
+            since: Only include researches started at or after this ISO timestamp
+            until: Only include researches started before this ISO timestamp
+            order: "desc" (newest first) or "asc" by started_at
+            cursor: next_cursor of the previous page
+            limit: Maximum number of items
+
+        Returns:
+            {"items": [...], "next_cursor": str or None}
+        """
+        raise NotImplementedError
+
+    def count_by_status(self) -> Dict[str, int]:
+        """Number of researches per status"""
+        raise NotImplementedError
+
+    def delete(self, research_id: str):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def _summary(research: Dict) -> Dict:
+    """Fields returned by list endpoints"""
+    return {
+        "id": research["id"],
+        "query": research["query"],
+        "status": research["status"],
+        "started_at": research["started_at"],
+        "completed_at": research.get("completed_at")
+    }
+
+
+class InMemoryResearchStore(ResearchStore):
+    """Process-local store (data is lost on restart)"""
+
+    def __init__(self):
+        self._researches: Dict[str, Dict] = {}
+
+    def save(self, research: Dict):
+        # Store a copy so later in-place edits are only visible after save()
+        self._researches[research["id"]] = json.loads(json.dumps(research))
+
+    def get(self, research_id: str) -> Optional[Dict]:
+        research = self._researches.get(research_id)
+        return json.loads(json.dumps(research)) if research else None
+
+    def list_page(
+        self,
+        statuses: Optional[Sequence[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        order: str = "desc",
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Dict:
+        descending = order == "desc"
+        after = decode_cursor(cursor) if cursor else None
+        researches = []
+        for r in self._researches.values():
+            key = (r["started_at"], r["id"])
+            if statuses and r["status"] not in statuses:
+                continue
+            if since is not None and r["started_at"] < since:
+                continue
+            if until is not None and r["started_at"] >= until:
+                continue
+            if after is not None and (key >= after if descending else key <= after):
+                continue
+            researches.append(r)
+        researches.sort(key=lambda r: (r["started_at"], r["id"]), reverse=descending)
+
+        page = researches[:limit]
+        next_cursor = None
+        if len(researches) > limit:
+            next_cursor = encode_cursor(page[-1]["started_at"], page[-1]["id"])
+        return {"items": [_summary(r) for r in page], "next_cursor": next_cursor}
+
+    def count_by_status(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for r in self._researches.values():
+            counts[r["status"]] = counts.get(r["status"], 0) + 1
+        return counts
+
+    def delete(self, research_id: str):
+        self._researches.pop(research_id, None)
+
+
+class SQLiteResearchStore(ResearchStore):
+    """
+    SQLite-backed store in WAL mode.
+
+    Summary columns are indexed (id, status, started_at) so lookups and
+    listings never deserialize the full research documents.
+    """
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS researches ("
+            " id TEXT PRIMARY KEY,"
+            " query TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " started_at TEXT NOT NULL,"
+            " completed_at TEXT,"
+            " data TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_researches_started_at ON researches (started_at, id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_researches_status ON researches (status, started_at, id)")
+
+        # Per-status counters maintained by triggers, so dashboard totals are
+        # O(1) no matter how large the history grows
+        counts_exist = self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'research_status_counts'"
+        ).fetchone()
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS research_status_counts ("
+            " status TEXT PRIMARY KEY,"
+            " count INTEGER NOT NULL)"
+        )
+        if not counts_exist:
+            self._db.execute(
+                "INSERT INTO research_status_counts (status, count)"
+                " SELECT status, COUNT(*) FROM researches GROUP BY status"
+            )
+        self._db.executescript("""
+            CREATE TRIGGER IF NOT EXISTS trg_researches_insert AFTER INSERT ON researches
+            BEGIN
+                INSERT INTO research_status_counts (status, count) VALUES (NEW.status, 1)
+                ON CONFLICT(status) DO UPDATE SET count = count + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_researches_update AFTER UPDATE OF status ON researches
+            WHEN OLD.status != NEW.status
+            BEGIN
+                UPDATE research_status_counts SET count = count - 1 WHERE status = OLD.status;
+                INSERT INTO research_status_counts (status, count) VALUES (NEW.status, 1)
+                ON CONFLICT(status) DO UPDATE SET count = count + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_researches_delete AFTER DELETE ON researches
+            BEGIN
+                UPDATE research_status_counts SET count = count - 1 WHERE status = OLD.status;
+            END;
+        """)
+        self._db.commit()
+
+    def save(self, research: Dict):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO researches (id, query, status, started_at, completed_at, data)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET"
+                " query = excluded.query, status = excluded.status,"
+                " started_at = excluded.started_at, completed_at = excluded.completed_at,"
+                " data = excluded.data",
+                (
+                    research["id"],
+                    research["query"],
+                    research["status"],
+                    research["started_at"],
+                    research.get("completed_at"),
+                    json.dumps(research)
+                )
+            )
+            self._db.commit()
+
+    def get(self, research_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM researches WHERE id = ?", (research_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_page(
+        self,
+        statuses: Optional[Sequence[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        order: str = "desc",
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Dict:
+        # Keyset pagination on (started_at, id): every page is an index range
+        # scan, independent of how deep into the history it is
+        descending = order == "desc"
+        where = []
+        params: List = []
+        if statuses:
+            where.append(f"status IN ({','.join('?' * len(statuses))})")
+            params.extend(statuses)
+        if since is not None:
+            where.append("started_at >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("started_at < ?")
+            params.append(until)
+        if cursor:
+            started_at, research_id = decode_cursor(cursor)
+            where.append(f"(started_at, id) {'<' if descending else '>'} (?, ?)")
+            params.extend([started_at, research_id])
+
+        sql = "SELECT id, query, status, started_at, completed_at FROM researches"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        direction = "DESC" if descending else "ASC"
+        sql += f" ORDER BY started_at {direction}, id {direction} LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        items = [
+            {"id": r[0], "query": r[1], "status": r[2], "started_at": r[3], "completed_at": r[4]}
+            for r in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor(items[-1]["started_at"], items[-1]["id"])
+        return {"items": items, "next_cursor": next_cursor}
+
+    def count_by_status(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT status, count FROM research_status_counts WHERE count > 0"
+            ).fetchall()
+        return {status: count for status, count in rows}
+
+    def delete(self, research_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM researches WHERE id = ?", (research_id,))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def create_research_store() -> ResearchStore:
+    """Build the store selected by RESEARCH_STORE (sqlite or memory)"""
+    backend = os.getenv("RESEARCH_STORE", "sqlite").lower()
+    if backend == "memory":
+        return InMemoryResearchStore()
+    if backend == "sqlite":
+        db_path = os.getenv(
+            "RESEARCH_DB_PATH",
+            os.path.join(os.path.dirname(__file__), "..", "researches.db")
+        )
+        return SQLiteResearchStore(db_path)
+    raise ValueError(f"Unknown RESEARCH_STORE backend: {backend}")
@@ -0,0 +1,156 @@
+"""
+🚦 Scheduler - Bounded research job execution with admission control
+
+Research jobs (planner + retrieval, then writer + critic after approval)
+are LLM- and search-heavy. The scheduler runs at most `max_concurrent` of
+them at once, queues the rest by priority (FIFO within a priority), and
+rejects new jobs once `max_queue` are waiting so bursts turn into 429s
+instead of provider rate-limit storms.
+"""
+
+import asyncio
+import heapq
+import itertools
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+class ResearchScheduler:
+    """Priority FIFO queue in front of a fixed number of concurrent jobs"""
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_queue: int = 50,
+        on_queue_change: Optional[Callable[[], None]] = None
+    ):
+        """
+        Args:
+            max_concurrent: Jobs allowed to run at the same time
+            max_queue: Jobs allowed to wait; further submissions raise QueueFullError
+            on_queue_change: Called after the waiting queue changes (positions moved)
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.on_queue_change = on_queue_change
+        self._counter = itertools.count()
+        # Heap of (-priority, submission order, job_id); entries whose order no
+        # longer matches _queued (cancelled, maybe resubmitted) are skipped lazily
+        self._heap: List[tuple] = []
+        self._queued: Dict[str, Tuple[int, Callable[[], Awaitable]]] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self.completed = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    def submit(self, job_id: str, job: Callable[[], Awaitable], priority: int = 0) -> int:
+        """
+        Run a job now if a slot is free, otherwise queue it.
+
+        Args:
+            job_id: Identifier used for cancellation and position lookups
+            job: Coroutine function started when the job gets a slot
+            priority: Higher runs first; equal priorities run in submission order
+
+        Returns:
+            0 if the job started immediately, else its 1-based queue position
+        """
+        if job_id in self._queued or job_id in self._running:
+            raise ValueError(f"Job already scheduled: {job_id}")
+
+        if len(self._running) < self.max_concurrent and not self._queued:
+            self._start(job_id, job)
+            return 0
+
+        if len(self._queued) >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(f"Research queue is full ({self.max_queue} waiting)")
+
+        order = next(self._counter)
+        self._queued[job_id] = (order, job)
+        heapq.heappush(self._heap, (-priority, order, job_id))
+        self._notify()
+        return self.position(job_id)
+
+    def _start(self, job_id: str, job: Callable[[], Awaitable]):
+        task = asyncio.create_task(job())
+        self._running[job_id] = task
+        task.add_done_callback(lambda t, job_id=job_id: self._finished(job_id, t))
+
+    def _finished(self, job_id: str, task: asyncio.Task):
+        self._running.pop(job_id, None)
+        if task.cancelled():
+            self.cancelled += 1
+        else:
+            self.completed += 1
+            if task.exception() is not None:
+                print(f"❌ Research job {job_id} failed: {task.exception()}")
+        self._dispatch()
+
+    def _dispatch(self):
+        """Start queued jobs while slots are free"""
+        started = False
+        while self._heap and len(self._running) < self.max_concurrent:
+            _, order, job_id = heapq.heappop(self._heap)
+            if not self._is_current(job_id, order):
+                continue  # Cancelled while queued
+            _, job = self._queued.pop(job_id)
+            self._start(job_id, job)
+            started = True
+        if started:
+            self._notify()
+
+    def _notify(self):
+        if self.on_queue_change is not None:
+            self.on_queue_change()
+
+    def _is_current(self, job_id: str, order: int) -> bool:
+        queued = self._queued.get(job_id)
+        return queued is not None and queued[0] == order
+
+    def queued_ids(self) -> List[str]:
+        """Waiting job ids in the order they will run"""
+        return [job_id for _, order, job_id in sorted(self._heap) if self._is_current(job_id, order)]
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based queue position, 0 if running, None if unknown"""
+        if job_id in self._running:
+            return 0
+        if job_id not in self._queued:
+            return None
+        return self.queued_ids().index(job_id) + 1
+
+    def is_scheduled(self, job_id: str) -> bool:
+        return job_id in self._queued or job_id in self._running
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancel a queued or running job.
+
+        Returns "queued" or "running" depending on what was cancelled, or
+        None if the job is not known to this scheduler.
+        """
+        if job_id in self._queued:
+            del self._queued[job_id]
+            self.cancelled += 1
+            self._notify()
+            return "queued"
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+            return "running"
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "running": len(self._running),
+            "queued": len(self._queued),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected
+        }
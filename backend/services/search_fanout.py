@@ -0,0 +1,142 @@
+"""
+🔀 Search Fan-out - Concurrent (query × backend) retrieval
+
+Runs every search query against every backend in parallel, with a
+concurrency limit per backend and a deadline per call. Results are merged
+as calls complete, so a research costs roughly the slowest single search
+instead of the sum of all of them.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+from services.cache import normalize_query
+from services.metrics import SEARCH_SECONDS
+
+
+@dataclass
+class SearchBackend:
+    """A search backend taking part in the fan-out"""
+    name: str
+    search: Callable[[str, int, float], List[dict]]  # blocking (query, max_results, timeout) -> results
+    max_results: int = 2
+    max_concurrency: int = 4
+    timeout: float = 10.0
+
+
+# Extra time given to a tool to return its partial results after its deadline
+DEADLINE_GRACE = 1.0
+
+# Concurrency limits are shared by every research in the process so that a
+# burst of researches cannot open unbounded connections to one provider
+_backend_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def _get_semaphore(backend: SearchBackend) -> asyncio.Semaphore:
+    if backend.name not in _backend_semaphores:
+        _backend_semaphores[backend.name] = asyncio.Semaphore(backend.max_concurrency)
+    return _backend_semaphores[backend.name]
+
+
+class SearchFanout:
+    """Dispatches queries to all backends concurrently and merges the results"""
+
+    def __init__(self, backends: List[SearchBackend], run_blocking: Callable):
+        """
+        Args:
+            backends: Backends in priority order (earlier backends rank first)
+            run_blocking: Coroutine function running a blocking callable off the event loop
+        """
+        self.backends = backends
+        self.run_blocking = run_blocking
+        self._queries: List[str] = []
+        self._seen_queries = set()
+        self._pending: set = set()
+        # backend name -> list of (query index, results)
+        self._buckets: Dict[str, List[Tuple[int, List[dict]]]] = {b.name: [] for b in backends}
+
+    @property
+    def queries(self) -> List[str]:
+        """Queries submitted so far (deduplicated, in submission order)"""
+        return list(self._queries)
+
+    def submit(self, query: str) -> bool:
+        """
+        Start searching a query on every backend.
+
+        Can be called at any time before gather() returns. Returns False if
+        the query was already submitted.
+        """
+        key = normalize_query(query)
+        if not key or key in self._seen_queries:
+            return False
+        self._seen_queries.add(key)
+        index = len(self._queries)
+        self._queries.append(query)
+
+        for backend in self.backends:
+            task = asyncio.create_task(self._search(backend, query, index))
+            self._pending.add(task)
+        return True
+
+    async def _search(self, backend: SearchBackend, query: str, index: int) -> Tuple[str, int, List[dict]]:
+        """Run one (query, backend) call under the backend's limit and deadline"""
+        async with _get_semaphore(backend):
+            started = time.monotonic()
+            outcome = "ok"
+            try:
+                # The tools enforce the deadline themselves (rag_search
+                # returns what it has by then); wait_for is only a backstop
+                # for a stuck tool
+                results = await asyncio.wait_for(
+                    self.run_blocking(backend.search, query, backend.max_results, backend.timeout),
+                    timeout=backend.timeout + DEADLINE_GRACE
+                )
+            except asyncio.TimeoutError:
+                print(f"    ⏱️ {backend.name} timeout after {backend.timeout:g}s: '{query}'")
+                results = []
+                outcome = "timeout"
+            except Exception as e:
+                print(f"    ❌ {backend.name} error: {e}")
+                results = []
+                outcome = "error"
+            elapsed = time.monotonic() - started
+            SEARCH_SECONDS.observe(elapsed, backend=backend.name, outcome=outcome)
+        print(f"    ✅ {backend.name}: {len(results or [])} results for '{query}' ({elapsed:.2f}s)")
+        return backend.name, index, results or []
+
+    async def gather(self) -> List[dict]:
+        """
+        Wait for every submitted search and return the merged results.
+
+        Results are ordered by backend priority, then by query order, so the
+        output does not depend on which call finished first.
+        """
+        while self._pending:
+            # Snapshot the set: submit() may add tasks while we are waiting
+            done, _ = await asyncio.wait(set(self._pending), return_when=asyncio.FIRST_COMPLETED)
+            self._pending -= done
+            for task in done:
+                name, index, results = task.result()
+                self._buckets[name].append((index, results))
+
+        merged = []
+        for backend in self.backends:
+            for _, results in sorted(self._buckets[backend.name], key=lambda item: item[0]):
+                merged.extend(results)
+        return merged
+
+    def counts(self) -> Dict[str, int]:
+        """Number of results collected so far per backend"""
+        return {
+            name: sum(len(results) for _, results in bucket)
+            for name, bucket in self._buckets.items()
+        }
+
+    def cancel(self):
+        """Cancel all searches still in flight"""
+        for task in self._pending:
+            task.cancel()
+        self._pending = set()
@@ -0,0 +1,116 @@
+"""
+📡 Streaming - Incremental handling of streamed LLM output
+
+LLM streams emit one chunk per token or so. Forwarding each one as its own
+WebSocket message floods the sockets, so chunks are buffered and sent in
+small batches (by size or by age, whichever comes first).
+
+Streamed JSON can also be consumed before it is complete: the items of one
+array (e.g. the planner's search_queries) are yielded as soon as each one
+has been fully received.
+"""
+
+import json
+import re
+import time
+from typing import Any, Awaitable, Callable, List
+
+
+class DeltaCoalescer:
+    """Buffers streamed text and forwards it in small batches"""
+
+    def __init__(
+        self,
+        send: Callable[[str, int], Awaitable[None]],
+        min_chars: int = 80,
+        max_interval: float = 0.15
+    ):
+        """
+        Args:
+            send: Coroutine called with (text, offset) for each batch, where
+                offset is the position of the batch in the full stream
+            min_chars: Flush once this many characters are buffered
+            max_interval: Flush once the oldest buffered chunk is this old (seconds)
+        """
+        self.send = send
+        self.min_chars = min_chars
+        self.max_interval = max_interval
+        self._buffer = []
+        self._buffered_chars = 0
+        self._buffer_started = 0.0
+        self.offset = 0
+
+    async def push(self, text: str):
+        """Add a streamed chunk, flushing if the batch is big or old enough"""
+        if not text:
+            return
+        if not self._buffer:
+            self._buffer_started = time.monotonic()
+        self._buffer.append(text)
+        self._buffered_chars += len(text)
+
+        if (self._buffered_chars >= self.min_chars
+                or time.monotonic() - self._buffer_started >= self.max_interval):
+            await self.flush()
+
+    async def flush(self):
+        """Send whatever is buffered"""
+        if not self._buffer:
+            return
+        text = "".join(self._buffer)
+        self._buffer = []
+        self._buffered_chars = 0
+        offset = self.offset
+        self.offset += len(text)
+        await self.send(text, offset)
+
+
+class JSONArrayItemStream:
+    """
+    Yields the items of a JSON array under `key` while the document streams.
+
+    Only the first occurrence of the key is followed, and nothing else in
+    the document is validated: the complete text should still be parsed
+    with json.loads once the stream ends.
+    """
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, key: str):
+        self._key_re = re.compile(r'"' + re.escape(key) + r'"\s*:\s*\[')
+        self._text = ""
+        self._position = None  # Index of the next array item once the key is found
+        self.done = False
+        self.items: List[Any] = []
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Add streamed text; returns the array items completed by it"""
+        if self.done:
+            return []
+        self._text += chunk
+        if self._position is None:
+            match = self._key_re.search(self._text)
+            if match is None:
+                return []
+            self._position = match.end()
+
+        new_items = []
+        while True:
+            # Skip whitespace and separators up to the next item
+            while self._position < len(self._text) and self._text[self._position] in " \t\r\n,":
+                self._position += 1
+            if self._position >= len(self._text):
+                break
+            if self._text[self._position] == "]":
+                self.done = True
+                break
+            try:
+                item, end = self._decoder.raw_decode(self._text, self._position)
+            except json.JSONDecodeError:
+                break  # Item not complete yet
+            if end >= len(self._text) and not isinstance(item, (str, list, dict)):
+                break  # A number or literal may continue in the next chunk
+            self._position = end
+            self.items.append(item)
+            new_items.append(item)
+        return new_items
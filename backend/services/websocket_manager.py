@@ -2,71 +2,339 @@
 🔌 WebSocket Manager - Real-time communication with frontend
 
 Manages WebSocket connections and broadcasts updates to connected clients.
+
+Each connection has its own bounded send queue drained by a dedicated
+writer task, so one slow or stalled client never delays the others.
+Messages are serialized once and the same text is queued for every
+recipient. When a client's queue is full the slow-consumer policy applies:
+- "drop": discard its queued messages and ask it to resync
+- "close": close the connection
+
+Recent updates are kept in a bounded ring buffer per research. A client
+reconnecting with ?last_seq=N gets the updates it missed replayed instead
+of a full snapshot (or a snapshot when they are no longer buffered).
+
+Updates are published through a pub/sub backend (see services.pubsub) and
+delivered to local clients on receipt, so with several uvicorn workers a
+client sees updates from researches running on any of them.
 """
 
 from fastapi import WebSocket
-from typing import Dict, List
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
 import json
+import os
+
+from services.pubsub import PubSubBackend, create_pubsub
+from services.metrics import WEBSOCKET_FANOUT_SECONDS
+
+
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "10"))
+WS_SLOW_CLIENT_POLICY = os.getenv("WS_SLOW_CLIENT_POLICY", "drop").lower()
+WS_REPLAY_BUFFER_SIZE = int(os.getenv("WS_REPLAY_BUFFER_SIZE", "256"))
+WS_REPLAY_MAX_RESEARCHES = int(os.getenv("WS_REPLAY_MAX_RESEARCHES", "1000"))
+
+# Sent in place of dropped messages; the client answers with a resync request
+RESYNC_REQUIRED = json.dumps({"type": "resync_required"})
+
+
+class ClientConnection:
+    """A WebSocket client with its own send queue and writer task"""
+
+    def __init__(self, websocket: WebSocket, research_id: str, manager: "WebSocketManager"):
+        self.websocket = websocket
+        self.research_id = research_id
+        self.manager = manager
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=manager.queue_size)
+        self.dropped = 0
+        self.closed = False
+        self.writer = asyncio.create_task(self._write_loop())
+
+    def offer(self, text: str) -> bool:
+        """Queue a serialized message without waiting; applies the slow-client policy when full"""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        if self.manager.slow_client_policy == "close":
+            print(f"⚠️ Closing slow WebSocket client for research: {self.research_id}")
+            asyncio.create_task(self.close(code=1013))
+            return False
+
+        # Drop everything queued: the client recovers with a snapshot
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.dropped += 1
+        self.queue.put_nowait(RESYNC_REQUIRED)
+        return False
+
+    async def _write_loop(self):
+        try:
+            while True:
+                text = await self.queue.get()
+                await asyncio.wait_for(self.websocket.send_text(text), timeout=self.manager.send_timeout)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Error sending message: {e}")
+            # Close rather than just forget the socket: the client notices,
+            # reconnects with its last_seq and gets the missed updates replayed
+            await self.close(code=1011)
+
+    def stop(self):
+        """Stop the writer task (the socket itself is owned by the endpoint)"""
+        self.closed = True
+        if not self.writer.done() and self.writer is not asyncio.current_task():
+            self.writer.cancel()
+
+    async def close(self, code: int = 1000):
+        """Stop writing and close the socket"""
+        self.manager.disconnect(self.websocket, self.research_id)
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass  # Already closed
 
 
 class WebSocketManager:
     """Manager for WebSocket connections"""
-    
-    def __init__(self):
+
+    def __init__(
+        self,
+        queue_size: int = WS_SEND_QUEUE_SIZE,
+        send_timeout: float = WS_SEND_TIMEOUT,
+        slow_client_policy: str = WS_SLOW_CLIENT_POLICY,
+        replay_buffer_size: int = WS_REPLAY_BUFFER_SIZE,
+        replay_max_researches: int = WS_REPLAY_MAX_RESEARCHES,
+        pubsub: Optional[PubSubBackend] = None
+    ):
+        if slow_client_policy not in ("drop", "close"):
+            raise ValueError(f"Unknown slow client policy: {slow_client_policy}")
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.slow_client_policy = slow_client_policy
         # Store active connections by research_id
-        self.active_connections: Dict[str, List[WebSocket]] = {}
-    
-    async def connect(self, websocket: WebSocket, research_id: str):
-        """Accept and store a new WebSocket connection"""
+        self.active_connections: Dict[str, List[ClientConnection]] = {}
+        # Last sequence number sent per research (clients use it to detect gaps)
+        self.sequences: Dict[str, int] = {}
+        # research_id -> recent (seq, serialized message), least recently updated first
+        self.replay_size = replay_buffer_size
+        self.replay_max_researches = replay_max_researches
+        self.replay_buffers: "OrderedDict[str, deque]" = OrderedDict()
+        # Cross-worker fan-out of updates
+        self.pubsub = pubsub or create_pubsub()
+        self.started = False
+
+    async def start(self):
+        """Start receiving updates published by this and other workers"""
+        if self.started:
+            return
+        self.started = True
+        await self.pubsub.start(self._deliver)
+
+    async def stop(self):
+        if self.started:
+            await self.pubsub.stop()
+            self.started = False
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        research_id: str,
+        last_seq: Optional[int] = None,
+        snapshot: Optional[Callable[[], Awaitable[Optional[dict]]]] = None
+    ):
+        """
+        Accept and store a new WebSocket connection
+
+        Args:
+            last_seq: Last sequence number the client saw (when reconnecting)
+            snapshot: Coroutine function returning the full research state;
+                sent when the missed updates cannot be replayed
+        """
         await websocket.accept()
-        
+
+        missed = self._missed_updates(research_id, last_seq) if last_seq is not None else None
+        snapshot_messages = []
+        if missed is None and snapshot is not None:
+            snapshot_messages = await self._snapshot_messages(research_id, snapshot)
+
         if research_id not in self.active_connections:
             self.active_connections[research_id] = []
-        
-        self.active_connections[research_id].append(websocket)
-        print(f"✅ WebSocket connected for research: {research_id}")
-    
+
+        # No await from here on: the replay (or snapshot) is queued before any
+        # live update can reach the new connection
+        connection = ClientConnection(websocket, research_id, self)
+        self.active_connections[research_id].append(connection)
+
+        if missed is not None:
+            for text in missed:
+                connection.offer(text)
+            connection.offer(json.dumps({
+                "type": "resumed",
+                "replayed": len(missed),
+                "to_seq": self.current_seq(research_id)
+            }))
+            print(f"✅ WebSocket resumed for research: {research_id} ({len(missed)} updates replayed)")
+        else:
+            for text in snapshot_messages:
+                connection.offer(text)
+            print(f"✅ WebSocket connected for research: {research_id}")
+
+    def _missed_updates(self, research_id: str, last_seq: int) -> Optional[List[str]]:
+        """Buffered updates after last_seq, or None if they can't all be replayed"""
+        current = self.current_seq(research_id)
+        if last_seq > current:
+            return None  # Numbering restarted (e.g. buffer evicted): needs a snapshot
+        if last_seq == current:
+            return []
+        buffer = self.replay_buffers.get(research_id)
+        if not buffer or buffer[0][0] > last_seq + 1:
+            return None  # Oldest missed update already fell out of the ring buffer
+        missed = [text for seq, text in buffer if seq > last_seq]
+        # The replay is followed by a "resumed" marker, which needs a slot too
+        if len(missed) >= self.queue_size:
+            return None  # Cheaper to send one snapshot than overflow the queue
+        return missed
+
+    def _record(self, research_id: str, seq: int, text: str):
+        """Keep an update in its research's ring buffer"""
+        buffer = self.replay_buffers.get(research_id)
+        if buffer is None:
+            buffer = deque(maxlen=self.replay_size)
+            self.replay_buffers[research_id] = buffer
+        buffer.append((seq, text))
+        self.replay_buffers.move_to_end(research_id)
+
+        # Forget the least recently updated researches nobody is watching
+        if len(self.replay_buffers) > self.replay_max_researches:
+            for stale_id in list(self.replay_buffers):
+                if len(self.replay_buffers) <= self.replay_max_researches:
+                    break
+                if stale_id in self.active_connections:
+                    continue
+                del self.replay_buffers[stale_id]
+                self.sequences.pop(stale_id, None)
+
+    def _find(self, websocket: WebSocket, research_id: str) -> Optional[ClientConnection]:
+        for connection in self.active_connections.get(research_id, []):
+            if connection.websocket is websocket:
+                return connection
+        return None
+
     def disconnect(self, websocket: WebSocket, research_id: str):
         """Remove a WebSocket connection"""
-        if research_id in self.active_connections:
-            try:
-                self.active_connections[research_id].remove(websocket)
-            except ValueError:
-                # Already removed, ignore
-                pass
-            
-            # Clean up empty lists
-            if not self.active_connections[research_id]:
-                del self.active_connections[research_id]
-        
+        connection = self._find(websocket, research_id)
+        if connection is None:
+            return  # Already removed
+
+        connection.stop()
+        self.active_connections[research_id].remove(connection)
+
+        # Clean up empty lists
+        if not self.active_connections[research_id]:
+            del self.active_connections[research_id]
+
         print(f"❌ WebSocket disconnected for research: {research_id}")
-    
-    async def send_update(self, research_id: str, message: dict):
-        """Send update to all connected clients for a research"""
-        if research_id in self.active_connections:
-            # Send to all connected clients (make a copy to avoid modification during iteration)
-            failed_connections = []
-            
-            for connection in self.active_connections[research_id][:]:  # Copy the list
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    print(f"⚠️ Error sending message: {e}")
-                    failed_connections.append(connection)
-            
-            # Remove failed connections after iteration
-            for connection in failed_connections:
-                try:
-                    self.disconnect(connection, research_id)
-                except:
-                    pass  # Already removed
-    
+
+    def current_seq(self, research_id: str) -> int:
+        """Sequence number of the last update sent for a research (0 if none)"""
+        return self.sequences.get(research_id, 0)
+
+    async def send_snapshot(
+        self,
+        websocket: WebSocket,
+        research_id: str,
+        snapshot: Callable[[], Awaitable[Optional[dict]]]
+    ):
+        """Send the full research state to one client (on resync)"""
+        messages = await self._snapshot_messages(research_id, snapshot)
+        connection = self._find(websocket, research_id)
+        if connection is None:
+            return
+        # Queued behind earlier updates so the client sees them in order
+        for text in messages:
+            connection.offer(text)
+
+    async def _snapshot_messages(
+        self,
+        research_id: str,
+        snapshot: Callable[[], Awaitable[Optional[dict]]]
+    ) -> List[str]:
+        """
+        A snapshot message followed by the updates sent while it was loading.
+
+        The snapshot (possibly read from the store) reflects at least every
+        update up to the sequence number it is sent with; replaying a merge
+        patch it already reflects changes nothing.
+        """
+        seq = self.current_seq(research_id)
+        research = await snapshot()
+        messages = [json.dumps({"type": "snapshot", "seq": seq, "research": research})]
+        # A gap (updates no longer buffered) makes the client ask for a resync
+        messages.extend(self._missed_updates(research_id, seq) or [])
+        return messages
+
+    async def send_update(self, research_id: str, message: dict) -> int:
+        """
+        Send update to all connected clients for a research
+
+        Every update gets the next sequence number of its research, so a
+        client that sees a gap can ask for a resync. The message is
+        serialized once and queued for each client without waiting on any
+        of them.
+        """
+        await self.start()
+        seq = self.sequences.get(research_id, 0) + 1
+        self.sequences[research_id] = seq
+        text = json.dumps({**message, "seq": seq})
+        await self.pubsub.publish(research_id, seq, text)
+        return seq
+
     async def broadcast(self, message: dict):
         """Broadcast message to all connected clients"""
-        for research_id, connections in self.active_connections.items():
-            for connection in connections:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    print(f"Error broadcasting: {e}")
+        await self.start()
+        await self.pubsub.publish(None, 0, json.dumps(message))
+
+    async def _deliver(self, research_id: Optional[str], seq: int, text: str):
+        """Hand a published update (from any worker) to the local clients"""
+        with WEBSOCKET_FANOUT_SECONDS.time():
+            self._fan_out(research_id, seq, text)
+
+    def _fan_out(self, research_id: Optional[str], seq: int, text: str):
+        if research_id is None:
+            for connections in list(self.active_connections.values()):
+                for connection in connections[:]:
+                    connection.offer(text)
+            return
+
+        # Updates from other workers advance our numbering too, so snapshots
+        # and replays stay consistent whichever worker a client is on
+        if seq > self.sequences.get(research_id, 0):
+            self.sequences[research_id] = seq
+        self._record(research_id, seq, text)
+
+        # Copy the list: a full queue may disconnect a client while iterating
+        for connection in self.active_connections.get(research_id, [])[:]:
+            connection.offer(text)
 
+    def stats(self) -> dict:
+        """Connection and queue counters"""
+        connections = [c for conns in self.active_connections.values() for c in conns]
+        return {
+            "researches": len(self.active_connections),
+            "connections": len(connections),
+            "queued_messages": sum(c.queue.qsize() for c in connections),
+            "dropped_messages": sum(c.dropped for c in connections),
+            "replay_buffers": len(self.replay_buffers),
+            "replay_buffered_messages": sum(len(b) for b in self.replay_buffers.values()),
+            "slow_client_policy": self.slow_client_policy,
+            "pubsub": type(self.pubsub).__name__
+        }
@@ -0,0 +1,115 @@
+import asyncio
+
+from services.cache import LLMCache, SearchCache, TTLCache
+
+
+def test_entries_expire_after_their_ttl():
+    cache = TTLCache("t", default_ttl=60)
+    cache.set("fresh", 1)
+    cache.set("stale", 2, ttl=-1)
+    assert cache.get("fresh") == 1
+    assert cache.get("stale") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache("t", max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_tier_survives_restarts_and_is_promoted(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    cache = TTLCache("t", db_path=db_path)
+    cache.set("k", {"v": [1, 2]})
+    cache.set("gone", 1, ttl=-1)
+    cache.close()
+
+    reopened = TTLCache("t", db_path=db_path)
+    assert reopened.get("k") == {"v": [1, 2]}
+    assert reopened.get("k") == {"v": [1, 2]}
+    assert reopened.get("gone") is None
+    stats = reopened.stats()
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+    # Namespaces sharing a database do not see each other's entries
+    assert TTLCache("other", db_path=db_path).get("k") is None
+    reopened.close()
+
+
+def test_search_cache_normalizes_queries_and_uses_backend_ttls():
+    cache = SearchCache(ttls={"web": 60, "rag": -1})
+    cache.set("web", "  Climate   CHANGE ", 2, [{"title": "x"}])
+    cache.set("rag", "climate change", 2, [{"title": "y"}])
+    assert cache.get("web", "climate change", 2) == [{"title": "x"}]
+    assert cache.get("web", "climate change", 3) is None
+    assert cache.get("rag", "climate change", 2) is None
+    assert cache.stats()["backends"] == {"web": {"hits": 1, "misses": 1}, "rag": {"hits": 0, "misses": 1}}
+
+
+def test_llm_cache_keys_cover_model_parameters_and_prompt():
+    messages = [{"type": "system", "content": "Summarize X"}]
+    key = LLMCache.make_key("gpt-4o-mini", messages, {"temperature": 0.1})
+    assert key == LLMCache.make_key("gpt-4o-mini", [dict(m) for m in messages], {"temperature": 0.1})
+    assert key != LLMCache.make_key("gpt-4o", messages, {"temperature": 0.1})
+    assert key != LLMCache.make_key("gpt-4o-mini", messages, {"temperature": 0.7})
+    assert key != LLMCache.make_key("gpt-4o-mini", [{"type": "system", "content": "Summarize Y"}], {"temperature": 0.1})
+
+
+def test_disk_tier_is_pruned_to_max_disk_entries(tmp_path):
+    cache = TTLCache("t", db_path=str(tmp_path / "cache.db"), max_disk_entries=10)
+    for i in range(TTLCache.PRUNE_EVERY):
+        cache.set(f"k{i}", i, ttl=1000 + i)
+    assert cache.stats()["disk_entries"] == 10
+    cache.close()
+    # Entries closest to expiry went first
+    reopened = TTLCache("t", db_path=str(tmp_path / "cache.db"), max_entries=1)
+    assert reopened.get(f"k{TTLCache.PRUNE_EVERY - 1}") == TTLCache.PRUNE_EVERY - 1
+    assert reopened.get("k0") is None
+    reopened.close()
+
+
+class FakeMessage:
+    type = "system"
+
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeLLMClient:
+    model = "fake-model"
+    temperature = 0.1
+    max_tokens = None
+
+    def __init__(self):
+        self.calls = 0
+        self.cache_hits = 0
+
+    def record_cache_hit(self):
+        self.cache_hits += 1
+
+    async def ainvoke(self, messages, config=None):
+        self.calls += 1
+        return FakeMessage(f"answer {self.calls}")
+
+
+def test_cached_ainvoke_answers_repeated_prompts_from_the_cache(monkeypatch):
+    from services import agents_integration
+
+    monkeypatch.setattr(agents_integration, "llm_cache", LLMCache())
+    client = FakeLLMClient()
+    messages = [FakeMessage("Write about X")]
+
+    async def scenario():
+        first = await agents_integration.cached_ainvoke(client, messages)
+        second = await agents_integration.cached_ainvoke(client, messages)
+        bypassed = await agents_integration.cached_ainvoke(client, messages, bypass_cache=True)
+        refreshed = await agents_integration.cached_ainvoke(client, messages)
+        return first, second, bypassed, refreshed
+
+    assert asyncio.run(scenario()) == ("answer 1", "answer 1", "answer 2", "answer 2")
+    assert (client.calls, client.cache_hits) == (2, 2)
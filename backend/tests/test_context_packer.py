@@ -0,0 +1,22 @@
+from services.context_packer import count_tokens, pack_context, split_passages
+
+
+def test_unpunctuated_text_is_split_into_bounded_passages():
+    text = " ".join(f"cell{i} value{i % 7}" for i in range(1000))
+    passages = split_passages(text, max_tokens=120)
+    assert len(passages) > 1
+    assert max(count_tokens(p) for p in passages) <= 120
+    assert " ".join(passages) == text
+
+
+def test_long_unpunctuated_source_still_gets_packed():
+    source = {
+        "content": " ".join(f"word{i}" for i in range(2000)),
+        "title": "Table",
+        "source": "internal",
+        "type": "rag"
+    }
+    text, stats = pack_context("word42", [source], budget_tokens=500)
+    assert stats["sources"] == 1
+    assert "word42" in text
+    assert stats["tokens"] <= 500
@@ -0,0 +1,35 @@
+from services.dedup import dedupe_sources, normalize_url
+
+
+def test_normalize_url_ignores_cosmetic_differences():
+    assert normalize_url("https://www.example.com/a/?utm_source=x&b=2#top") == "example.com/a?b=2"
+    assert normalize_url("http://example.com:80/a") == normalize_url("https://example.com:443/a")
+    assert normalize_url("ftp://example.com/a") is None
+
+
+def test_normalize_url_keeps_non_default_port():
+    assert normalize_url("http://host:8080/x") == "host:8080/x"
+    assert normalize_url("http://host:8080/x") != normalize_url("http://host/x")
+    assert normalize_url("http://host:bad/x") is None
+
+
+def test_dedupe_sources_drops_url_and_near_duplicates():
+    text = " ".join(f"word{i}" for i in range(200))
+    sources = [
+        {"source": "https://example.com/a", "content": text},
+        {"source": "https://www.example.com/a/", "content": "different text entirely"},
+        {"source": "https://mirror.org/a", "content": text + " extra"},
+        {"source": "http://example.com:8080/a", "content": "another page on another port"},
+    ]
+    kept = dedupe_sources(sources)
+    assert [source["source"] for source in kept] == ["https://example.com/a", "http://example.com:8080/a"]
+
+
+def test_sources_without_content_are_compared_by_url_only():
+    sources = [
+        {"source": "https://a.org/1", "content": ""},
+        {"source": "https://b.org/2", "content": "  ...  "},
+        {"source": "https://a.org/1/", "content": ""},
+    ]
+    kept = dedupe_sources(sources)
+    assert [source["source"] for source in kept] == ["https://a.org/1", "https://b.org/2"]
@@ -0,0 +1,30 @@
+from services.deltas import DeltaTracker, apply_merge_patch, merge_patch_diff
+
+
+def test_diff_and_apply_round_trip():
+    old = {"status": "running", "progress": {"planner": {"status": "running"}, "writer": {"status": "pending"}},
+           "queue_position": 2, "sources": [1, 2]}
+    new = {"status": "running", "progress": {"planner": {"status": "completed"}, "writer": {"status": "pending"}},
+           "sources": [1, 2, 3], "briefing": None}
+    patch = merge_patch_diff(old, new)
+    assert patch == {"progress": {"planner": {"status": "completed"}}, "queue_position": None,
+                     "sources": [1, 2, 3], "briefing": None}
+    # A null value in the new state reads as a removal, like RFC 7386 says
+    assert apply_merge_patch(old, patch) == {k: v for k, v in new.items() if v is not None}
+    assert merge_patch_diff(new, new) == {}
+
+
+def test_tracker_sends_full_state_first_then_changes_only():
+    tracker = DeltaTracker()
+    state = {"status": "running", "progress": {"planner": 0}}
+    assert tracker.diff("r1", state) == state
+
+    state["progress"]["planner"] = 100
+    assert tracker.diff("r1", state) == {"progress": {"planner": 100}}
+    assert tracker.diff("r1", state) == {}
+    # The baseline is a copy: later in-place edits are not mistaken for sent
+    state["status"] = "completed"
+    assert tracker.diff("r1", state) == {"status": "completed"}
+
+    tracker.forget("r1")
+    assert tracker.diff("r1", state) == state
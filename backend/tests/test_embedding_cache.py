@@ -0,0 +1,87 @@
+import threading
+import time
+
+from services.embedding_cache import CachedEmbeddings, EmbeddingStore, _from_blob, _to_blob
+
+
+class FakeEmbeddings:
+    model = "fake-embedding"
+
+    def __init__(self, delay: threading.Event = None):
+        self.calls = []
+        self.delay = delay
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        if self.delay is not None:
+            self.delay.wait(5)
+        return [[float(len(text)), 0.5, -1.25] for text in texts]
+
+
+def test_blob_round_trip_keeps_float32_values():
+    vector = [0.1, -2.5, 3.0, 1e-3]
+    restored = _from_blob(_to_blob(vector))
+    assert len(restored) == 4
+    assert all(abs(a - b) < 1e-6 for a, b in zip(vector, restored))
+    assert len(_to_blob(vector)) == 4 * 4
+
+
+def test_misses_are_embedded_in_one_call_and_stored(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "embeddings.db"))
+    provider = FakeEmbeddings()
+    embeddings = CachedEmbeddings(provider, store)
+
+    vectors = embeddings.embed_documents(["ab", "abc", "ab"])
+    assert vectors == [[2.0, 0.5, -1.25], [3.0, 0.5, -1.25], [2.0, 0.5, -1.25]]
+    assert provider.calls == [["ab", "abc"]]
+
+    assert embeddings.embed_documents(["abc", "abcd"])[1] == [4.0, 0.5, -1.25]
+    assert provider.calls[1] == ["abcd"]
+    assert embeddings.embed_query("ab") == [2.0, 0.5, -1.25]
+    assert len(provider.calls) == 2
+    stats = embeddings.stats()
+    assert (stats["hits"], stats["misses"], stats["stored_vectors"]) == (2, 3, 3)
+    store.close()
+
+
+def test_texts_in_flight_on_another_thread_are_awaited(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "embeddings.db"))
+    release = threading.Event()
+    provider = FakeEmbeddings(delay=release)
+    embeddings = CachedEmbeddings(provider, store)
+
+    results = {}
+    first = threading.Thread(target=lambda: results.update(first=embeddings.embed_documents(["same text"])))
+    first.start()
+    while not provider.calls:
+        time.sleep(0.001)
+    second = threading.Thread(target=lambda: results.update(second=embeddings.embed_documents(["same text"])))
+    second.start()
+    release.set()
+    first.join()
+    second.join()
+
+    assert results["first"] == results["second"]
+    assert len(provider.calls) == 1
+    store.close()
+
+
+def test_concurrent_query_misses_share_one_provider_call(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "embeddings.db"))
+    provider = FakeEmbeddings()
+    embeddings = CachedEmbeddings(provider, store, query_batch_window=0.1)
+
+    queries = ["a", "bb", "ccc"]
+    results = {}
+    threads = [
+        threading.Thread(target=lambda q=q: results.update({q: embeddings.embed_query(q)}))
+        for q in queries
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert {q: v[0] for q, v in results.items()} == {"a": 1.0, "bb": 2.0, "ccc": 3.0}
+    assert len(provider.calls) == 1 and sorted(provider.calls[0]) == queries
+    store.close()
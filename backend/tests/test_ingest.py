@@ -0,0 +1,73 @@
+import os
+
+from services.ingest import IngestProgress, Ingester, chunk_text, ingest_directory, read_pages
+
+
+def test_chunks_are_bounded_overlapping_and_cut_between_words():
+    text = " ".join(f"word{i:03d}" for i in range(300))
+    chunks = chunk_text(text, chunk_size=100, overlap=30)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    words = set(text.split())
+    assert all(word in words for chunk in chunks for word in chunk.split())
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.split()[0] in previous.split()
+    assert chunks[-1].endswith("word299")
+    assert chunk_text("  short \n text ", chunk_size=100, overlap=30) == ["short text"]
+    assert chunk_text("   ", chunk_size=100, overlap=30) == []
+
+
+def test_html_pages_keep_visible_text_only(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_text("<html><head><title>T</title></head><body><script>var x;</script>"
+                    "<p>First paragraph.</p><p>Second.</p></body></html>")
+    [(page, text)] = read_pages(str(path))
+    assert page == 1
+    assert text.split() == ["First", "paragraph.", "Second."]
+
+
+class FakeCollection:
+    def __init__(self):
+        self.documents = {}
+
+    def get(self, ids, include=None):
+        return {"ids": [i for i in ids if i in self.documents]}
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.documents.update(zip(ids, documents))
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.embedded = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [[0.0] for _ in texts]
+
+
+def test_rerun_resumes_with_new_or_changed_files_only(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.txt").write_text("Alpha document about solar power.")
+    (docs / "b.md").write_text("Beta document about wind power.")
+    (docs / "c.txt").write_text("Alpha document about solar power.")  # same chunk as a.txt
+    (docs / "ignored.csv").write_text("x,y")
+
+    collection, embeddings = FakeCollection(), FakeEmbeddings()
+    progress = IngestProgress(str(tmp_path / "progress.db"))
+
+    def run():
+        ingester = Ingester(collection, embeddings, batch_size=2)
+        return ingest_directory(str(docs), ingester, progress, workers=1)
+
+    counters = run()
+    assert (counters["files"], counters["chunks"], counters["embedded"]) == (3, 3, 2)
+    assert run()["files"] == 0
+
+    (docs / "b.md").write_text("Beta document about offshore wind power.")
+    os.utime(docs / "b.md", (1, 1))
+    counters = run()
+    assert (counters["files"], counters["embedded"]) == (1, 1)
+    assert embeddings.embedded == 3
+    progress.close()
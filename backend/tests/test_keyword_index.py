@@ -0,0 +1,107 @@
+from services import agents_integration
+from services.cache import SearchCache
+from services.keyword_index import KeywordIndex
+
+
+def _index(tmp_path):
+    index = KeywordIndex(str(tmp_path / "keywords.db"))
+    index.upsert([
+        ("d1", "Solar panels convert sunlight into electricity.", {"topic": "Solar"}),
+        ("d2", "Wind turbines generate electricity from wind.", {"topic": "Wind"}),
+        ("d3", "Batteries store energy for later use.", {"topic": "Storage"}),
+    ])
+    return index
+
+
+def test_search_ranks_by_bm25_and_follows_updates(tmp_path):
+    index = _index(tmp_path)
+    hits = index.search("wind electricity", k=5)
+    assert [hit["doc_id"] for hit in hits] == ["d2", "d1"]
+    assert hits[0]["metadata"] == {"topic": "Wind"}
+    # Stemming, and user text is never parsed as FTS5 syntax
+    assert [hit["doc_id"] for hit in index.search('battery" OR NOT (', k=5)] == ["d3"]
+
+    index.upsert([("d3", "Hydro dams store water.", {"topic": "Hydro"})])
+    index.delete(["d2"])
+    assert index.search("batteries wind", k=5) == []
+    assert [hit["doc_id"] for hit in index.search("dams", k=5)] == ["d3"]
+    assert index.count() == 2
+    index.close()
+
+
+class FakeCollection:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def get(self, ids=None, include=None, limit=None, offset=0):
+        if ids is None:
+            ids = sorted(self.documents)[offset:offset + limit]
+        return {
+            "ids": ids,
+            "documents": [self.documents[i][0] for i in ids],
+            "metadatas": [self.documents[i][1] for i in ids]
+        }
+
+
+def test_sync_from_chroma_reconciles_ids(tmp_path):
+    index = _index(tmp_path)
+    collection = FakeCollection({
+        "d1": ("Solar panels convert sunlight into electricity.", {"topic": "Solar"}),
+        "d4": ("Geothermal plants tap heat from the earth.", {"topic": "Geothermal"}),
+    })
+    assert index.sync_from_chroma(collection, batch_size=1) == (1, 2)
+    assert index.ids() == {"d1", "d4"}
+    assert [hit["doc_id"] for hit in index.search("geothermal")] == ["d4"]
+    index.close()
+
+
+class FakeDocument:
+    def __init__(self, page_content, metadata):
+        self.page_content = page_content
+        self.metadata = metadata
+
+
+class FakeVectorDB:
+    def __init__(self, hits=None, error=None):
+        self.hits = hits or []
+        self.error = error
+
+    def similarity_search_with_relevance_scores(self, query, k=4):
+        if self.error is not None:
+            raise self.error
+        return self.hits[:k]
+
+
+def _use_rag(monkeypatch, index, vector_db):
+    monkeypatch.setattr(agents_integration, "keyword_index", index)
+    monkeypatch.setattr(agents_integration, "KEYWORD_INDEX_AVAILABLE", True)
+    monkeypatch.setattr(agents_integration, "vector_db", vector_db)
+    monkeypatch.setattr(agents_integration, "RAG_AVAILABLE", True)
+    monkeypatch.setattr(agents_integration, "search_cache", SearchCache(ttls={}))
+
+
+def test_hybrid_search_fuses_rankings_with_rrf(monkeypatch, tmp_path):
+    index = _index(tmp_path)
+    # The vector ranking prefers d3, then d1; keywords only match d1 and d2
+    vector_db = FakeVectorDB([
+        (FakeDocument("Batteries store energy for later use.", {"topic": "Storage"}), 0.9),
+        (FakeDocument("Solar panels convert sunlight into electricity.", {"topic": "Solar"}), 0.8),
+    ])
+    _use_rag(monkeypatch, index, vector_db)
+
+    results = agents_integration.rag_search("solar electricity", max_results=3, mode="hybrid")
+    # d1 is in both rankings, so it beats each list's other candidate
+    assert [r["title"] for r in results] == ["Solar (Score: 0.80)", "Storage (Score: 0.90)", "Wind (Keyword match)"]
+    assert results[2]["relevance_score"] == round(1 / (agents_integration.RAG_RRF_K + 2), 4)
+    index.close()
+
+
+def test_keyword_results_are_used_when_vector_search_fails(monkeypatch, tmp_path):
+    index = _index(tmp_path)
+    _use_rag(monkeypatch, index, FakeVectorDB(error=RuntimeError("provider down")))
+
+    results = agents_integration.rag_search("wind", max_results=2, mode="hybrid")
+    assert [r["title"] for r in results] == ["Wind (Keyword match)"]
+    # Degraded results are not cached
+    assert agents_integration.search_cache.get("rag", "hybrid:wind", 2) is None
+    index.close()
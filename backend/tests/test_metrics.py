@@ -0,0 +1,47 @@
+import pytest
+
+from services import metrics
+from services.metrics import Histogram
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "Test durations", ["stage"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    histogram.observe(5.0, stage="a")
+    histogram.observe(0.1, stage='b"\n')
+    assert histogram.render() == [
+        "# HELP test_seconds Test durations",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{stage="a",le="0.1"} 1',
+        'test_seconds_bucket{stage="a",le="1.0"} 2',
+        'test_seconds_bucket{stage="a",le="+Inf"} 3',
+        'test_seconds_sum{stage="a"} 5.55',
+        'test_seconds_count{stage="a"} 3',
+        'test_seconds_bucket{stage="b\\"\\n",le="0.1"} 1',
+        'test_seconds_bucket{stage="b\\"\\n",le="1.0"} 1',
+        'test_seconds_bucket{stage="b\\"\\n",le="+Inf"} 1',
+        'test_seconds_sum{stage="b\\"\\n"} 0.1',
+        'test_seconds_count{stage="b\\"\\n"} 1',
+    ]
+
+
+def test_time_observes_even_when_the_block_raises():
+    histogram = Histogram("test_seconds", "Test durations")
+    with pytest.raises(ValueError):
+        with histogram.time():
+            raise ValueError
+    assert histogram.render()[-1] == "test_seconds_count 1"
+
+
+def test_render_includes_collectors_and_survives_failing_ones(monkeypatch):
+    monkeypatch.setattr(metrics, "_collectors", [])
+    metrics.register_collector(lambda: [
+        ("test_queue_depth", "gauge", "Jobs waiting", [({"queue": "main"}, 3), ({}, 1.5)])
+    ])
+    metrics.register_collector(lambda: 1 / 0)
+    text = metrics.render()
+    assert '# TYPE test_queue_depth gauge\ntest_queue_depth{queue="main"} 3\ntest_queue_depth 1.5\n' in text
+    assert "# TYPE research_stage_seconds histogram" in text
+    assert text.endswith("\n")
+    assert metrics.histogram("research_stage_seconds", "ignored") is metrics.STAGE_SECONDS
@@ -0,0 +1,48 @@
+import asyncio
+import os
+
+from services.pubsub import UnixSocketPubSub, _decode, _encode
+
+
+def test_encoding_round_trip():
+    assert _decode(_encode("r1", 7, '{"a":\n1}')) == ("r1", 7, '{"a":\n1}')
+    assert _decode(_encode(None, 0, "broadcast")) == (None, 0, "broadcast")
+
+
+def _worker(directory, name, received):
+    # Both "workers" live in this process, so give them distinct sockets
+    pubsub = UnixSocketPubSub(directory, peer_refresh_interval=0)
+    pubsub.path = os.path.join(directory, f"{name}.sock")
+
+    async def handler(research_id, seq, text):
+        received.append((research_id, seq, text))
+
+    return pubsub, handler
+
+
+def test_updates_reach_local_and_remote_handlers(tmp_path):
+    async def scenario():
+        local, remote = [], []
+        a, a_handler = _worker(str(tmp_path), "a", local)
+        b, b_handler = _worker(str(tmp_path), "b", remote)
+        await a.start(a_handler)
+        await b.start(b_handler)
+
+        await a.publish("r1", 1, "update")
+        too_large = "x" * (UnixSocketPubSub.MAX_DATAGRAM + 1)
+        await a.publish("r1", 2, too_large)
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if remote:
+                break
+        await asyncio.sleep(0.05)
+
+        await a.stop()
+        await b.stop()
+        return local, remote
+
+    local, remote = asyncio.run(scenario())
+    assert [seq for _, seq, _ in local] == [1, 2]
+    # Oversized updates stay local; the other worker's clients resync on the gap
+    assert remote == [("r1", 1, "update")]
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from services.rate_limit import TokenBucket, _parse_limit
+
+
+def test_reservations_are_spaced_once_the_burst_is_spent():
+    bucket = TokenBucket("test", rate=10, burst=2)
+    waits = [bucket._reserve(1, None) for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.1, abs=0.02)
+    assert waits[3] == pytest.approx(0.2, abs=0.02)
+    assert bucket.stats()["throttled"] == 2
+
+
+def test_timeout_rejects_without_taking_tokens():
+    bucket = TokenBucket("test", rate=1, burst=1)
+    assert bucket.acquire()
+    assert not bucket.acquire(timeout=0.1)
+    # The rejected call reserved nothing, so the next wait is still ~1s
+    assert bucket._reserve(1, None) == pytest.approx(1.0, abs=0.05)
+    assert bucket.stats()["rejected"] == 1
+
+
+def test_pause_empties_the_bucket():
+    bucket = TokenBucket("test", rate=10, burst=10)
+    bucket.pause(2)
+    assert bucket._reserve(1, None) == pytest.approx(2.1, abs=0.05)
+
+
+def test_zero_rate_is_unlimited():
+    bucket = TokenBucket("test", rate=0)
+    assert all(bucket._reserve(1, None) == 0.0 for _ in range(100))
+    bucket.pause(10)
+    assert asyncio.run(bucket.acquire_async(timeout=0))
+
+
+def test_limit_parsing():
+    assert _parse_limit("1:2") == (1.0, 2.0)
+    assert _parse_limit("0.5") == (0.5, 1.0)
+    assert _parse_limit("8") == (8.0, 8.0)
@@ -0,0 +1,49 @@
+import pytest
+
+from services.research_store import InMemoryResearchStore, SQLiteResearchStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = InMemoryResearchStore()
+    else:
+        store = SQLiteResearchStore(str(tmp_path / "researches.db"))
+    for i in range(5):
+        store.save({
+            "id": f"r{i}",
+            "query": f"query {i}",
+            "status": "completed" if i % 2 else "awaiting_approval",
+            # r3 and r4 share a timestamp so the id breaks the tie
+            "started_at": f"2026-01-0{min(i, 3) + 1}T00:00:00"
+        })
+    yield store
+    store.close()
+
+
+def _all_pages(store, **filters):
+    ids, cursor = [], None
+    while True:
+        page = store.list_page(cursor=cursor, limit=2, **filters)
+        ids.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def test_pages_cover_every_research_once(store):
+    assert _all_pages(store) == ["r4", "r3", "r2", "r1", "r0"]
+    assert _all_pages(store, order="asc") == ["r0", "r1", "r2", "r3", "r4"]
+
+
+def test_filters_and_counts(store):
+    assert _all_pages(store, statuses=["completed"]) == ["r3", "r1"]
+    assert _all_pages(store, since="2026-01-02", until="2026-01-04") == ["r2", "r1"]
+    assert store.count_by_status() == {"completed": 2, "awaiting_approval": 3}
+    store.delete("r1")
+    assert store.count_by_status() == {"completed": 1, "awaiting_approval": 3}
+
+
+def test_invalid_cursor_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.list_page(cursor="not-a-cursor")
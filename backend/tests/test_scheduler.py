@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from services.scheduler import QueueFullError, ResearchScheduler
+
+
+def _job(started, job_id, release):
+    async def run():
+        started.append(job_id)
+        await release.wait()
+    return run
+
+
+def test_queue_runs_by_priority_then_submission_order():
+    async def scenario():
+        started, release = [], asyncio.Event()
+        scheduler = ResearchScheduler(max_concurrent=1)
+        assert scheduler.submit("a", _job(started, "a", release)) == 0
+        assert scheduler.submit("b", _job(started, "b", release)) == 1
+        assert scheduler.submit("c", _job(started, "c", release), priority=1) == 1
+        assert scheduler.queued_ids() == ["c", "b"]
+        release.set()
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert started == ["a", "c", "b"]
+        assert scheduler.stats()["completed"] == 3
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_then_resubmitted_job_is_queued_once():
+    async def scenario():
+        started, release = [], asyncio.Event()
+        scheduler = ResearchScheduler(max_concurrent=1)
+        scheduler.submit("a", _job(started, "a", release))
+        scheduler.submit("c", _job(started, "c", release), priority=5)
+        scheduler.submit("b", _job(started, "b", release))
+        assert scheduler.cancel("c") == "queued"
+        assert scheduler.submit("c", _job(started, "c", release)) == 2
+        assert scheduler.queued_ids() == ["b", "c"]
+        assert scheduler.position("c") == 2
+        release.set()
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert started == ["a", "b", "c"]
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects_submissions():
+    async def scenario():
+        release = asyncio.Event()
+        scheduler = ResearchScheduler(max_concurrent=1, max_queue=1)
+        scheduler.submit("a", _job([], "a", release))
+        scheduler.submit("b", _job([], "b", release))
+        with pytest.raises(QueueFullError):
+            scheduler.submit("c", _job([], "c", release))
+        assert scheduler.stats()["rejected"] == 1
+        release.set()
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
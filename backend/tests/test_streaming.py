@@ -0,0 +1,39 @@
+import asyncio
+import json
+
+from services.streaming import DeltaCoalescer, JSONArrayItemStream
+
+
+def test_items_are_yielded_as_soon_as_they_complete():
+    document = json.dumps({"reasoning": "x", "search_queries": ["a b", {"q": "c]"}, 42], "other": [1]})
+    stream = JSONArrayItemStream("search_queries")
+    yielded = []
+    for i in range(len(document)):
+        yielded.extend(stream.feed(document[i]))
+    assert yielded == ["a b", {"q": "c]"}, 42]
+    assert stream.done
+
+
+def test_number_split_across_chunks_is_not_truncated():
+    stream = JSONArrayItemStream("values")
+    assert stream.feed('{"values": [12') == []
+    assert stream.feed('34, 5') == [1234]
+    assert stream.feed(']}') == [5]
+    assert stream.items == [1234, 5]
+
+
+def test_delta_coalescer_batches_chunks_with_offsets():
+    sent = []
+
+    async def send(text, offset):
+        sent.append((text, offset))
+
+    async def scenario():
+        coalescer = DeltaCoalescer(send, min_chars=5, max_interval=60)
+        for chunk in ["ab", "cd", "ef", "g", ""]:
+            await coalescer.push(chunk)
+        await coalescer.flush()
+        await coalescer.flush()
+
+    asyncio.run(scenario())
+    assert sent == [("abcdef", 0), ("g", 6)]
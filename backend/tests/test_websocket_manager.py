@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+from services.websocket_manager import WebSocketManager
+
+
+class FakeWebSocket:
+    """Accepts and never finishes a send, so queued messages stay queued"""
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await asyncio.Event().wait()
+
+    async def close(self, code=1000):
+        pass
+
+
+def _queued(manager, research_id):
+    connection = manager.active_connections[research_id][0]
+    items = []
+    while not connection.queue.empty():
+        items.append(json.loads(connection.queue.get_nowait()))
+    connection.stop()
+    return items
+
+
+async def _snapshot():
+    return {"id": "r1"}
+
+
+def _reconnect_after(missed: int, queue_size: int):
+    async def run():
+        manager = WebSocketManager(queue_size=queue_size)
+        await manager.start()
+        for step in range(missed):
+            await manager.send_update("r1", {"type": "status_update", "step": step})
+        await manager.connect(FakeWebSocket(), "r1", last_seq=0, snapshot=_snapshot)
+        items = _queued(manager, "r1")
+        await manager.stop()
+        return items
+    return asyncio.run(run())
+
+
+def test_replay_fits_queue_with_resumed_marker():
+    items = _reconnect_after(missed=3, queue_size=4)
+    assert [item.get("seq") for item in items[:3]] == [1, 2, 3]
+    assert items[-1] == {"type": "resumed", "replayed": 3, "to_seq": 3}
+
+
+def test_replay_filling_the_queue_falls_back_to_snapshot():
+    # queue_size missed updates leave no room for the resumed marker
+    items = _reconnect_after(missed=4, queue_size=4)
+    assert items == [{"type": "snapshot", "seq": 4, "research": {"id": "r1"}}]
+
+
+class BrokenWebSocket(FakeWebSocket):
+    def __init__(self):
+        self.closed_with = None
+
+    async def send_text(self, text):
+        raise RuntimeError("send failed")
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def test_failed_send_closes_the_socket():
+    async def run():
+        manager = WebSocketManager()
+        await manager.start()
+        websocket = BrokenWebSocket()
+        await manager.connect(websocket, "r1")
+        await manager.send_update("r1", {"type": "status_update"})
+        for _ in range(5):
+            await asyncio.sleep(0)
+        await manager.stop()
+        return websocket.closed_with, manager.active_connections
+
+    assert asyncio.run(run()) == (1011, {})
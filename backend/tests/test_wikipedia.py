@@ -0,0 +1,62 @@
+from services import agents_integration
+from services.agents_integration import _wikipedia_params, _wikipedia_results
+from services.cache import SearchCache
+
+
+RESPONSE = {
+    "batchcomplete": True,
+    "query": {
+        "pages": [
+            {"pageid": 3, "title": "Mercury (disambiguation)", "index": 1, "extract": "Mercury may refer to:",
+             "fullurl": "https://en.wikipedia.org/wiki/Mercury_(disambiguation)", "pageprops": {"disambiguation": ""}},
+            {"pageid": 2, "title": "Mercury (element)", "index": 3, "extract": "Mercury is a chemical element.",
+             "fullurl": "https://en.wikipedia.org/wiki/Mercury_(element)"},
+            {"pageid": 1, "title": "Mercury (planet)", "index": 2, "extract": "Mercury is the first planet.",
+             "fullurl": "https://en.wikipedia.org/wiki/Mercury_(planet)"},
+            {"pageid": 4, "title": "Mercury Records", "index": 4, "extract": ""},
+        ]
+    }
+}
+
+
+def test_results_follow_search_rank_and_skip_disambiguation_pages():
+    results = _wikipedia_results(RESPONSE, max_results=3)
+    assert [r["title"] for r in results] == ["Mercury (planet)", "Mercury (element)"]
+    assert results[0] == {
+        "content": "Mercury is the first planet.",
+        "source": "https://en.wikipedia.org/wiki/Mercury_(planet)",
+        "title": "Mercury (planet)",
+        "type": "wikipedia"
+    }
+    assert len(_wikipedia_results(RESPONSE, max_results=1)) == 1
+    assert _wikipedia_results({"batchcomplete": True}, max_results=3) == []
+
+
+class FakeResponse:
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return RESPONSE
+
+
+class FakeHTTPClient:
+    def __init__(self):
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests.append(params)
+        return FakeResponse()
+
+
+def test_search_and_hydration_take_one_request(monkeypatch):
+    client = FakeHTTPClient()
+    monkeypatch.setattr(agents_integration, "get_http_client", lambda: client)
+    monkeypatch.setattr(agents_integration, "search_cache", SearchCache(ttls={}))
+
+    results = agents_integration.wikipedia_search("mercury", max_results=2)
+    assert [r["title"] for r in results] == ["Mercury (planet)", "Mercury (element)"]
+    assert client.requests == [_wikipedia_params("mercury", 2)]
+    # Served from the cache the second time
+    agents_integration.wikipedia_search("Mercury", max_results=2)
+    assert len(client.requests) == 1
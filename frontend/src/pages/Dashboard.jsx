@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { useNavigate } from 'react-router-dom'
-import { Plus, Clock, CheckCircle, PlayCircle, FileText } from 'lucide-react'
+import { Plus, Clock, CheckCircle, PlayCircle, FileText, XCircle } from 'lucide-react'
 import axios from 'axios'
 
 export default function Dashboard() {
@@ -28,13 +28,15 @@ export default function Dashboard() {
 
   const fetchResearches = async () => {
     try {
-      const response = await axios.get('/api/research/list')
-      setResearches(response.data)
+      // Only the most recent page is shown; totals come from the server-side counters
+      const response = await axios.get('/api/research/list', { params: { limit: 20 } })
+      setResearches(response.data.items)
       
       // Calculate stats
-      const total = response.data.length
-      const active = response.data.filter(r => r.status === 'running' || r.status === 'waiting_approval').length
-      const completed = response.data.filter(r => r.status === 'completed').length
+      const counts = response.data.counts || {}
+      const total = Object.values(counts).reduce((sum, n) => sum + n, 0)
+      const active = (counts.queued || 0) + (counts.running || 0) + (counts.waiting_approval || 0)
+      const completed = counts.completed || 0
       
       setStats({ total, active, completed })
       setLoading(false)
@@ -46,9 +48,11 @@ export default function Dashboard() {
 
   const getStatusBadge = (status) => {
     const badges = {
+      queued: { bg: 'bg-gray-100', text: 'text-gray-800', icon: Clock, label: 'Queued' },
       running: { bg: 'bg-blue-100', text: 'text-blue-800', icon: PlayCircle, label: 'Running' },
       waiting_approval: { bg: 'bg-yellow-100', text: 'text-yellow-800', icon: Clock, label: 'Waiting Approval' },
-      completed: { bg: 'bg-green-100', text: 'text-green-800', icon: CheckCircle, label: 'Completed' }
+      completed: { bg: 'bg-green-100', text: 'text-green-800', icon: CheckCircle, label: 'Completed' },
+      cancelled: { bg: 'bg-red-100', text: 'text-red-800', icon: XCircle, label: 'Cancelled' }
     }
     
     const badge = badges[status] || badges.running
@@ -1,6 +1,6 @@
 import { useState, useEffect, useRef } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
-import { CheckCircle, Clock, Loader, FileText, Download } from 'lucide-react'
+import { CheckCircle, Clock, Loader, FileText, Download, XCircle } from 'lucide-react'
 import axios from 'axios'
 
 export default function ResearchProgress() {
@@ -10,9 +10,16 @@ export default function ResearchProgress() {
   const [loading, setLoading] = useState(true)
   const [selectedSources, setSelectedSources] = useState([])
   const [isCompleted, setIsCompleted] = useState(false)
+  const [liveBriefing, setLiveBriefing] = useState({ step: null, text: '' })
   const ws = useRef(null)
+  const lastSeq = useRef(null)
+  const researchState = useRef(null)
+  const closing = useRef(false)
+  const reconnectDelay = useRef(1000)
 
   useEffect(() => {
+    closing.current = false
+    
     // Initial status fetch
     fetchStatus()
 
@@ -20,55 +27,115 @@ export default function ResearchProgress() {
     connectWebSocket()
 
     return () => {
+      closing.current = true
       if (ws.current) {
         ws.current.close()
       }
     }
   }, [id])
 
+  // JSON Merge Patch (RFC 7386): null removes a key, objects merge, anything else replaces
+  const applyMergePatch = (target, patch) => {
+    if (patch === null || typeof patch !== 'object' || Array.isArray(patch)) return patch
+    const result = (target && typeof target === 'object' && !Array.isArray(target)) ? { ...target } : {}
+    for (const [key, value] of Object.entries(patch)) {
+      if (value === null) {
+        delete result[key]
+      } else {
+        result[key] = applyMergePatch(result[key], value)
+      }
+    }
+    return result
+  }
+
+  const applyResearchState = (state, updateType) => {
+    researchState.current = state
+    setResearch(state)
+    
+    // Auto-select all sources when ready
+    if (updateType === 'sources_ready' && state.sources) {
+      setSelectedSources(state.sources.map(s => s.id))
+      console.log('✅ Auto-selected sources:', state.sources.length)
+    }
+    
+    // Mark as completed when done
+    if (updateType === 'completed') {
+      setIsCompleted(true)
+      console.log('✅ Research completed!')
+    }
+  }
+
   const connectWebSocket = () => {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:'
-    const wsUrl = `${protocol}//${window.location.host}/ws/${id}`
+    // After a network blip, resume from the last update we applied so the
+    // server replays what we missed instead of us polling /status
+    const resume = lastSeq.current !== null ? `?last_seq=${lastSeq.current}` : ''
+    const wsUrl = `${protocol}//${window.location.host}/ws/${id}${resume}`
     
     ws.current = new WebSocket(wsUrl)
 
     ws.current.onopen = () => {
       console.log('WebSocket connected')
+      reconnectDelay.current = 1000
     }
 
     ws.current.onmessage = (event) => {
       const update = JSON.parse(event.data)
-      console.log('WebSocket update:', update)
       
-      if (update.type === 'status_update' || update.type === 'sources_ready' || update.type === 'completed') {
-        // Update research state with progress
-        const updatedResearch = update.progress || {}
-        
-        // If sources are provided, add them to research state
-        if (update.sources) {
-          updatedResearch.sources = update.sources
-          console.log('✅ Sources received:', update.sources.length)
-        }
-        
-        // If briefing is provided, add it to research state
-        if (update.briefing) {
-          updatedResearch.briefing = update.briefing
-          console.log('✅ Briefing received')
-        }
-        
-        setResearch(updatedResearch)
-        
-        // Auto-select all sources when ready
-        if (update.type === 'sources_ready' && update.sources) {
-          setSelectedSources(update.sources.map(s => s.id))
-          console.log('✅ Auto-selected sources:', update.sources.length)
+      // Full state: sent on connect and after a resync request
+      if (update.type === 'snapshot') {
+        lastSeq.current = update.seq
+        if (update.research) {
+          const snapshotType = {
+            completed: 'completed',
+            waiting_approval: 'sources_ready'
+          }[update.research.status] || null
+          applyResearchState(update.research, snapshotType)
         }
-        
-        // Mark as completed when done
-        if (update.type === 'completed') {
-          setIsCompleted(true)
-          console.log('✅ Research completed!')
+        return
+      }
+      
+      // Missed updates were replayed after a reconnect
+      if (update.type === 'resumed') {
+        console.log('✅ WebSocket resumed, replayed updates:', update.replayed)
+        return
+      }
+      
+      // The server dropped queued updates because we fell behind
+      if (update.type === 'resync_required') {
+        lastSeq.current = null
+        ws.current.send(JSON.stringify({ type: 'resync' }))
+        return
+      }
+      
+      if (typeof update.seq === 'number') {
+        // Waiting for a snapshot, or already covered by it
+        if (lastSeq.current === null || update.seq <= lastSeq.current) return
+        // Missed an update: ask for the full state again
+        if (update.seq !== lastSeq.current + 1) {
+          lastSeq.current = null
+          ws.current.send(JSON.stringify({ type: 'resync' }))
+          return
         }
+        lastSeq.current = update.seq
+      }
+      
+      // Streamed writer/critic tokens (offset 0 starts a new draft)
+      if (update.type === 'briefing_delta') {
+        setLiveBriefing(prev => (
+          update.offset === 0 || prev.step !== update.step
+            ? { step: update.step, text: update.delta }
+            : { step: update.step, text: prev.text + update.delta }
+        ))
+        return
+      }
+      
+      console.log('WebSocket update:', update)
+      
+      if (['status_update', 'sources_ready', 'completed', 'queued', 'cancelled'].includes(update.type)) {
+        // Apply only the fields that changed since the previous update
+        researchState.current = applyMergePatch(researchState.current || {}, update.changes || {})
+        applyResearchState(researchState.current, update.type)
       }
     }
 
@@ -78,13 +145,24 @@ export default function ResearchProgress() {
 
     ws.current.onclose = () => {
       console.log('WebSocket disconnected')
+      // Reconnect with exponential backoff unless the page is being left
+      if (!closing.current) {
+        setTimeout(() => {
+          if (!closing.current) connectWebSocket()
+        }, reconnectDelay.current)
+        reconnectDelay.current = Math.min(reconnectDelay.current * 2, 30000)
+      }
     }
   }
 
   const fetchStatus = async () => {
     try {
       const response = await axios.get(`/api/research/${id}/status`)
-      setResearch(response.data)
+      // The WebSocket snapshot may already have delivered fresher state
+      if (researchState.current === null) {
+        researchState.current = response.data
+        setResearch(response.data)
+      }
       
       // Auto-select all sources if waiting for approval
       if (response.data.status === 'waiting_approval' && response.data.sources) {
@@ -115,6 +193,15 @@ export default function ResearchProgress() {
     }
   }
 
+  const handleCancel = async () => {
+    try {
+      await axios.post(`/api/research/${id}/cancel`)
+    } catch (error) {
+      console.error('Error cancelling research:', error)
+      alert('Failed to cancel research. Please try again.')
+    }
+  }
+
   const toggleSource = (sourceId) => {
     setSelectedSources(prev =>
       prev.includes(sourceId)
@@ -164,10 +251,36 @@ export default function ResearchProgress() {
     <div className="space-y-6">
       {/* Header */}
       <div className="bg-white rounded-lg shadow p-6">
-        <h2 className="text-2xl font-bold text-gray-900 mb-2">{research.query}</h2>
-        <p className="text-gray-600">Research ID: {research.id}</p>
+        <div className="flex items-start justify-between gap-4">
+          <div>
+            <h2 className="text-2xl font-bold text-gray-900 mb-2">{research.query}</h2>
+            <p className="text-gray-600">Research ID: {research.id}</p>
+          </div>
+          {['queued', 'running', 'waiting_approval'].includes(research.status) && (
+            <button
+              onClick={handleCancel}
+              className="inline-flex items-center gap-1 px-3 py-2 text-sm font-medium text-red-700 bg-red-50 rounded-md hover:bg-red-100"
+            >
+              <XCircle className="h-4 w-4" />
+              Cancel
+            </button>
+          )}
+        </div>
       </div>
 
+      {/* Waiting for a free research slot */}
+      {research.queue_position > 0 && (
+        <div className="bg-yellow-50 border border-yellow-200 rounded-lg p-4 text-yellow-800">
+          ⏳ Waiting for a free slot — position {research.queue_position} in queue
+        </div>
+      )}
+
+      {research.status === 'cancelled' && (
+        <div className="bg-gray-50 border border-gray-200 rounded-lg p-4 text-gray-700">
+          🛑 This research was cancelled
+        </div>
+      )}
+
       {/* Success Message */}
       {isCompleted && (
         <div className="bg-gradient-to-r from-green-50 to-emerald-50 border-2 border-green-200 rounded-lg p-6 shadow-md">
@@ -299,6 +412,23 @@ export default function ResearchProgress() {
         </div>
       )}
 
+      {/* Live Briefing (streamed while the writer/critic are running) */}
+      {!isCompleted && liveBriefing.text && (
+        <div className="bg-white rounded-lg shadow p-6">
+          <div className="flex items-center gap-2 mb-4">
+            <Loader className="h-5 w-5 text-primary-600 animate-spin" />
+            <h3 className="text-lg font-semibold text-gray-900">
+              {liveBriefing.step === 'critic' ? 'Critic Agent: improving briefing...' : 'Writer Agent: drafting briefing...'}
+            </h3>
+          </div>
+          <div className="prose max-w-none">
+            <pre className="whitespace-pre-wrap font-sans text-gray-800">
+              {liveBriefing.text}
+            </pre>
+          </div>
+        </div>
+      )}
+
       {/* Final Briefing */}
       {research.status === 'completed' && research.briefing && (
         <div className="bg-white rounded-lg shadow p-6">